@@ -1,66 +1,171 @@
+import os
+import json
+import base64
 from fastapi import APIRouter, Depends, HTTPException
 from database import execute_query
 from auth import get_current_user
+from search_index import build_match_query
+from cache import TTLCache
 
 db_router = APIRouter()
 
+# Repeated dashboard loads are served from these until they expire or a write
+# through this API invalidates them. Each worker process has its own copy.
+LIST_CACHE_TTL = float(os.getenv("LIST_CACHE_TTL", "30"))
+LIST_CACHE_SIZE = int(os.getenv("LIST_CACHE_SIZE", "256"))
+list_page_cache = TTLCache(maxsize=LIST_CACHE_SIZE, ttl=LIST_CACHE_TTL)
+list_total_cache = TTLCache(maxsize=LIST_CACHE_SIZE, ttl=LIST_CACHE_TTL)
+
+def invalidate_application_list_caches() -> None:
+    list_page_cache.invalidate()
+    list_total_cache.invalidate()
+
+def list_cache_stats() -> dict:
+    return {"pages": list_page_cache.stats(), "totals": list_total_cache.stats()}
+
+
+# Rows come back as tuples; users are returned as dicts keyed by column
+USER_COLUMNS = ["id", "email", "is_temporary", "is_anonymous"]
+_SELECT_USER = f"SELECT {', '.join(USER_COLUMNS)} FROM user"
+
 
 # Create router@db_router.get("/users")
-def read_users(current_user: dict = Depends(get_current_user)):
-    return [dict(user) for user in execute_query("SELECT * FROM user")]
+async def read_users(current_user: dict = Depends(get_current_user)):
+    return [dict(zip(USER_COLUMNS, user)) for user in await execute_query(_SELECT_USER)]
 
 @db_router.post("/users")
-def create_user(user_id: str, email: str, isTemporary: bool, isAnonymous: bool, current_user: dict = Depends(get_current_user)):
-    execute_query(
+async def create_user(user_id: str, email: str, isTemporary: bool, isAnonymous: bool, current_user: dict = Depends(get_current_user)):
+    await execute_query(
         "INSERT INTO user (id, email, is_temporary, is_anonymous) VALUES (?, ?, ?, ?)",
         (user_id, email, isTemporary, isAnonymous)
     )
     return {"message": "User created"}
 
 @db_router.get("/users/{user_id}")
-def get_user(user_id: str, current_user: dict = Depends(get_current_user)):
-    user = execute_query("SELECT * FROM user WHERE id = ?", (user_id,))
+async def get_user(user_id: str, current_user: dict = Depends(get_current_user)):
+    user = await execute_query(f"{_SELECT_USER} WHERE id = ?", (user_id,))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return dict(user[0])
+    return dict(zip(USER_COLUMNS, user[0]))
+
+
+def encode_cursor(created_at: str, application_id: str) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor."""
+    raw = json.dumps([created_at, application_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
 
+def decode_cursor(cursor: str) -> tuple:
+    """Decode a cursor produced by encode_cursor, raising 400 if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, application_id = json.loads(raw)
+        return created_at, application_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @db_router.get("/applications")
-async def read_applications(page: int = 1, limit: int = 10, search: str = None, current_user: dict = Depends(get_current_user)):
+async def read_applications(
+    page: int = 1,
+    limit: int = 10,
+    search: str = None,
+    cursor: str = None,
+    include_total: bool = True,
+    sort: str = "recent",
+    current_user: dict = Depends(get_current_user)
+):
     """
     Get paginated applications, ordered by most recent first.
 
     Parameters:
-    - page: Page number (starts at 1)
+    - page: Page number (starts at 1); ignored when a cursor is given
     - limit: Number of items per page (default 10, max 100)
-    - search: Optional search term to filter by name, email, zip, county, or ID
+    - search: Optional search term to filter by name, email, phone, address, zip,
+      county, or ID; every word is matched as a prefix against the search index
+    - cursor: Opaque cursor from a previous response's pagination.next_cursor;
+      seeks straight to the following page instead of using OFFSET
+    - include_total: Set to false to skip counting all matching rows
+      (total and total_pages are then null)
+    - sort: "recent" (default) or "relevance" to rank search results by match
+      quality; relevance ordering supports page/limit only
+
+    Pages and totals are cached briefly in-process; "cached" in the response
+    says whether this page was served from the cache.
     """
-    import json
+    if sort not in ("recent", "relevance"):
+        raise HTTPException(status_code=400, detail="sort must be 'recent' or 'relevance'")
 
     # Validate and cap the limit
-    limit = min(limit, 100)
-    offset = (page - 1) * limit
+    limit = max(min(limit, 100), 1)
+    page = max(page, 1)
+
+    cache_key = (search or "", cursor or page, limit, include_total, sort)
+    cached = list_page_cache.get(cache_key)
+    if cached is not None:
+        return {**cached, "cached": True}
+    # A write that invalidates the caches while the queries below run makes
+    # their results stale; set() then drops them
+    page_generation = list_page_cache.generation
+    total_generation = list_total_cache.generation
 
     # Build WHERE clause for search
-    where_clause = ""
+    conditions = []
     search_params = []
-    if search:
-        where_clause = """WHERE (
+    match_query = build_match_query(search) if search else None
+    rank_by_relevance = sort == "relevance" and match_query is not None
+    if rank_by_relevance and cursor:
+        raise HTTPException(status_code=400, detail="cursor pagination is not supported with sort=relevance")
+    if match_query:
+        conditions.append("applications.rowid IN (SELECT rowid FROM applications_fts WHERE applications_fts MATCH ?)")
+        search_params = [match_query]
+    elif search:
+        # Nothing indexable in the term (e.g. only punctuation): fall back to substring matching
+        conditions.append("""(
             applications.id LIKE ? OR
             applications.zip LIKE ? OR
             applications.county LIKE ? OR
             user.email LIKE ? OR
             applications.data LIKE ?
-        )"""
+        )""")
         search_term = f"%{search}%"
         search_params = [search_term] * 5
-
-    # Get total count with search filter
-    count_query = f"SELECT COUNT(*) as total FROM applications JOIN user ON applications.user_id = user.id {where_clause}"
-    count_result = await execute_query(count_query, tuple(search_params))
-    total = count_result[0][0] if count_result else 0
-
-    # Get paginated applications with user email, ordered by created_at DESC
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    total = None
+    total_pages = None
+    if include_total:
+        # The total only depends on the search, so it is shared by every page
+        total = list_total_cache.get(search or "")
+        if total is None:
+            # Get total count with search filter
+            count_query = f"SELECT COUNT(*) as total FROM applications JOIN user ON applications.user_id = user.id {where_clause}"
+            count_result = await execute_query(count_query, tuple(search_params))
+            total = count_result[0][0] if count_result else 0
+            list_total_cache.set(search or "", total, total_generation)
+        total_pages = (total + limit - 1) // limit  # Ceiling division
+
+    # Seek past the cursor's (created_at, id) instead of skipping rows with OFFSET
+    page_params = list(search_params)
+    join_clause = ""
+    if rank_by_relevance:
+        # Join the index once so each row's bm25 rank comes with the match
+        conditions[0] = "applications_fts MATCH ?"
+        join_clause = "JOIN applications_fts ON applications_fts.rowid = applications.rowid"
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        conditions.append("(applications.created_at, applications.id) < (?, ?)")
+        page_params += [cursor_created_at, cursor_id]
+        offset = 0
+    else:
+        offset = (page - 1) * limit
+    page_where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    order_clause = "ORDER BY applications.created_at DESC, applications.id DESC"
+    if rank_by_relevance:
+        # bm25 rank; lower is better
+        order_clause = "ORDER BY applications_fts.rank, applications.created_at DESC, applications.id DESC"
+
+    # Get paginated applications with user email, ordered by created_at DESC.
+    # One extra row is fetched to tell whether another page follows.
     query = f"""SELECT
            applications.id,
            applications.user_id,
@@ -73,48 +178,46 @@ async def read_applications(page: int = 1, limit: int = 10, search: str = None,
            applications.county,
            applications.dob,
            applications.underwriting_type,
-           applications.data,
+           applications.applicant_name,
            user.email
            FROM applications
            JOIN user ON applications.user_id = user.id
-           {where_clause}
-           ORDER BY applications.created_at DESC
+           {join_clause}
+           {page_where_clause}
+           {order_clause}
            LIMIT ? OFFSET ?"""
 
-    applications = await execute_query(query, tuple(search_params + [limit, offset]))
-
-    # Calculate pagination metadata
-    total_pages = (total + limit - 1) // limit  # Ceiling division
+    applications = await execute_query(query, tuple(page_params + [limit + 1, offset]))
+    has_more = len(applications) > limit
+    applications = applications[:limit]
 
-    # Process applications to extract applicant name from data
+    # applicant_name is materialized at write time, so the data blob is never read here
     processed_apps = []
     for app in applications:
-        app_dict = dict(zip(["id", "userId", "status", "createdAt", "updatedAt", "name", "naic", "zip", "county", "dob", "underwritingType", "data", "email"], app))
-
-        # Extract applicant name from JSON data
-        try:
-            data = json.loads(app_dict["data"]) if isinstance(app_dict["data"], str) else app_dict["data"]
-            applicant_info = data.get("applicant_info", {})
-            app_dict["applicantName"] = f"{applicant_info.get('f_name', '')} {applicant_info.get('l_name', '')}".strip()
-        except:
-            app_dict["applicantName"] = ""
-
-        # Remove the full data field from response to keep it light
-        del app_dict["data"]
+        app_dict = dict(zip(["id", "userId", "status", "createdAt", "updatedAt", "name", "naic", "zip", "county", "dob", "underwritingType", "applicantName", "email"], app))
+        app_dict["applicantName"] = app_dict["applicantName"] or ""
         processed_apps.append(app_dict)
 
-    return {
+    next_cursor = None
+    if has_more and processed_apps:
+        last = processed_apps[-1]
+        next_cursor = encode_cursor(last["createdAt"], last["id"])
+
+    response = {
         "success": True,
         "data": processed_apps,
         "pagination": {
-            "page": page,
+            "page": None if cursor else page,
             "limit": limit,
             "total": total,
             "total_pages": total_pages,
-            "has_next": page < total_pages,
-            "has_prev": page > 1
+            "has_next": has_more,
+            "has_prev": bool(cursor) or page > 1,
+            "next_cursor": next_cursor
         }
     }
+    list_page_cache.set(cache_key, response, page_generation)
+    return {**response, "cached": False}
 
 @db_router.get("/applications/{application_id}")
 async def get_application(application_id: str, current_user: dict = Depends(get_current_user)):
@@ -124,7 +227,7 @@ async def get_application(application_id: str, current_user: dict = Depends(get_
     return list(application[0])
 
 @db_router.post("/applications")
-def create_application(
+async def create_application(
     application_id: str,
     user_id: str,
     status: str,
@@ -139,10 +242,11 @@ def create_application(
     naic: str = None,
     current_user: dict = Depends(get_current_user)
 ):
-    execute_query(
+    await execute_query(
         """INSERT INTO applications
            (id, user_id, status, data, name, naic, zip, county, dob, schema, original_schema, underwriting_type)
            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (application_id, user_id, status, data, name, naic, zip_code, county, dob, app_schema, app_original_schema, underwriting_type)
+        (application_id, user_id, status, json.dumps(data), name, naic, zip_code, county, dob, json.dumps(app_schema), json.dumps(app_original_schema), underwriting_type)
     )
+    invalidate_application_list_caches()
     return {"message": "Application created"}
@@ -0,0 +1,141 @@
+"""
+Logging setup.
+
+Modules log through the standard library (logging.getLogger(__name__)) and
+this module configures it once:
+
+    LOG_LEVEL    root level (default INFO)
+    LOG_LEVELS   per-module overrides, e.g. "application_formatter=DEBUG,database=WARNING"
+    LOG_FORMAT   "json" (one object per line) or "text" (default)
+
+Every record carries the id of the request it was logged under (request_id),
+set by RequestIdMiddleware. Log arguments are formatted only when a record
+is emitted, so pass payloads as arguments wrapped in LazyJson rather than
+building the string up front: disabled debug dumps then cost a level check.
+"""
+
+import os
+import json
+import uuid
+import logging
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+REQUEST_ID_HEADER = "x-request-id"
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+class LazyJson:
+    """JSON-encodes (and truncates) a payload only if the log record is emitted."""
+
+    __slots__ = ("payload", "max_length")
+
+    def __init__(self, payload: Any, max_length: int = 500):
+        self.payload = payload
+        self.max_length = max_length
+
+    def __str__(self) -> str:
+        try:
+            text = json.dumps(self.payload, default=str)
+        except (TypeError, ValueError):
+            text = repr(self.payload)
+        if len(text) <= self.max_length:
+            return text
+        return text[:self.max_length] + "..."
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+
+_configured = False
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """Parse "module=LEVEL,other=LEVEL" into {module: LEVEL}."""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level: Optional[str] = None, levels: Optional[str] = None, fmt: Optional[str] = None) -> None:
+    """Install the root handler and per-module levels (from the environment by default). Idempotent."""
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    handler = logging.StreamHandler()
+    handler.addFilter(RequestIdFilter())
+    if (fmt or os.getenv("LOG_FORMAT", "text")).lower() == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+    for name, module_level in parse_levels(levels if levels is not None else os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(module_level)
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware binding each HTTP request to an id: the caller's
+    X-Request-ID if given, else a new one. The id is echoed back in the
+    response and attached to every log record made while handling it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == REQUEST_ID_HEADER.encode():
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(REQUEST_ID_HEADER.encode(), request_id.encode("latin-1"))]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
@@ -1,10 +1,18 @@
-import json
+import logging
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 import os
 import copy
 from routing_number import lookup_routing_number
-from rapidfuzz import fuzz
+from reference_data import lookup_zip, get_producer, naic_companies
+from formatter_spec import CarrierSpec, Const, Field, Section, Spread, compile_formatter
+from app_logging import LazyJson
+from normalize import PRUNE, apply_rule
+from medications import parse_prescriptions
+from overlay import SectionOverlay
+import json_codec
+
+logger = logging.getLogger(__name__)
 
 def format_phone_number(phone: str) -> Dict[str, str]:
     """Format phone number into area code, central office code, and station code."""
@@ -36,12 +44,12 @@ def format_date(date: Optional[str]) -> Optional[str]:
 def parse_json_data(json_str: str) -> Dict:
     """Parse JSON string to dictionary."""
     try:
-        return json.loads(json_str) if isinstance(json_str, str) else json_str
+        return json_codec.loads(json_str) if isinstance(json_str, str) else json_str
     except:
         return {}
 
 def get_plan_switch_reason(target_plan: str, current_plan: str, isUHC: bool = False) -> str:
-    print(f'target_plan: {target_plan}, current_plan: {current_plan}')
+    logger.debug('target_plan: %s, current_plan: %s', target_plan, current_plan)
     """Determine the reason for switching plans."""
     if not current_plan:
         return "other"
@@ -84,74 +92,35 @@ def get_naic_code(company: str) -> str:
     Returns:
         NAIC code string if found, empty string if not found
     """
-    print(f"get_naic_code called with company: {company}")
+    logger.debug("get_naic_code called with company: %s", company)
     
     if not company:
-        print("No company name provided, returning empty values")
+        logger.debug("No company name provided, returning empty values")
         return company, ''
         
     try:
-        print("Loading company data from supp_companies_full.json")
-        with open('supp_companies_full.json', 'r') as f:
-            companies = json.load(f)
-            
-        print("Attempting exact match first")
-        # Try exact match first
-        for c in companies:
-            if c['name_full'].lower() == company.lower():
-                print(f"Found exact match: {c['name_full']} with NAIC {c['naic']}")
-                return c['name_full'], c['naic']
-        
-        print("No exact match found, checking aliases")
-        # Common abbreviations and aliases
-        company_aliases = {
-            'UHC': 'UnitedHealthcare',
-            'United Healthcare': 'UnitedHealthcare', 
-            'United Health Care': 'UnitedHealthcare',
-            'BC': 'Blue Cross',
-            'BCBS': 'Blue Cross Blue Shield',
-            'Aflac': 'American Family Life Assur Co',
-        }
-        
-        # Normalize input company name
-        search_company = company_aliases.get(company, company)
-        print(f"Normalized company name: {search_company}")
-        
-        print("Attempting fuzzy matching")
-        # Try fuzzy matching with a threshold
-        best_match_score = 0
-        best_match_dict = {}
-        
-        for c in companies:
-            # Try both token sort ratio (handles word reordering) and partial ratio
-            token_sort_score = fuzz.token_sort_ratio(search_company.lower(), c['name_full'].lower())
-            partial_score = fuzz.partial_ratio(search_company.lower(), c['name_full'].lower())
-            
-            # Take the higher of the two scores
-            score = max(token_sort_score, partial_score)
-            
-            if score > best_match_score:
-                print(f"New best match found: {c['name_full']} with score {score}")
-                best_match_score = score
-                best_match_dict = c
-        
-        # Only return a match if we're reasonably confident
-        if best_match_score >= 80:
-            print(f"Found fuzzy match above threshold: {best_match_dict['name_full']} with NAIC {best_match_dict['naic']}")
-            return best_match_dict['name_full'], best_match_dict['naic']
-        else:
-            print(f"No match found above threshold (best score: {best_match_score})")
-            return company, ''
-        
+        # Exact, alias and fuzzy matching against the prebuilt, memoized matcher
+        match = naic_companies.get().match(company)
     except Exception as e:
-        print(f"Error in get_naic_code: {str(e)}")
+        logger.warning("Error in get_naic_code: %s", e)
         return company, ''
 
+    if match:
+        logger.debug("Found match: %s with NAIC %s", match['name_full'], match['naic'])
+        return match['name_full'], match['naic']
+    logger.debug("No match found above threshold for: %s", company)
+    return company, ''
+
 def calculate_medicare_dates(birth_date: str, effective_date: str, part_a_date: str, part_b_date: str) -> Dict[str, Any]:
     """Calculate various Medicare-related dates."""
-    birth_date = datetime.strptime(birth_date, '%Y-%m-%d')
-    effective_date = datetime.strptime(effective_date, '%Y-%m-%d')
-    
+    return medicare_windows(
+        datetime.strptime(birth_date, '%Y-%m-%d'),
+        datetime.strptime(effective_date, '%Y-%m-%d'),
+        part_b_date
+    )
+
+def medicare_windows(birth_date: datetime, effective_date: datetime, part_b_date: Optional[str]) -> Dict[str, Any]:
+    """calculate_medicare_dates for already parsed birth and effective dates."""
     # Calculate turning 65 date
     t65_date = birth_date.replace(year=birth_date.year + 65)
     
@@ -177,327 +146,155 @@ def calculate_medicare_dates(birth_date: str, effective_date: str, part_a_date:
     }
 
 def load_producer_config() -> Dict[str, Any]:
-    """Load producer configuration from JSON file."""
-    try:
-        with open("producer_config.json", "r") as f:
-            config = json.load(f)
-            # Get Garrett's data from the producers array
-            garrett_data = next(p for p in config["producers"] if p["first_name"] == "Garrett")
-            return garrett_data
-    except Exception as e:
-        print(f"Error loading producer config: {e}")
-        return {}
+    """Return the producer used on applications from the cached producer config."""
+    # Get Garrett's data from the producers array
+    return get_producer("Garrett")
 
-def format_ace_application(application_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Format application data specifically for ACE/Chubb."""
-    producer_config = load_producer_config()
-    
-    data = parse_json_data(application_data.get("data"))
-    applicant_info = data.get("applicant_info", {})
-    medicare_info = data.get("medicare_information", {})
-    payment_info = data.get("payment", {})
-
-    # Add zip code lookup
-    with open('zipData.json') as f:
-        zipData = json.load(f)
-
-    zip5 = applicant_info.get("zip5")
-    if zip5:
-        zip_data = zipData.get(zip5, {})
-        address_city = zip_data.get("cities", [""])[0]
-        address_state = zip_data.get("state", "")
-    else:
-        address_city = ""
-        address_state = ""
-
-    formatted_data = {
-        "applicant_info": {
-            "f_name": applicant_info.get("f_name"),
-            "l_name": applicant_info.get("l_name"),
-            "address_line1": applicant_info.get("address_line1"),
-            "zip5": applicant_info.get("zip5"),
-            "address_city": address_city,
-            "address_state": address_state,
-            "applicant_phone": format_phone_number(applicant_info.get("applicant_phone") or applicant_info.get("phone")),
-            "applicant_dob": format_date(applicant_info.get("applicant_dob")),
-            "gender": applicant_info.get("gender"),
-            "effective_date": format_date(applicant_info.get("effective_date")),
-            "tobacco_usage": applicant_info.get("tobacco_usage") or applicant_info.get("tobacco") or False,
-            "applicant_plan": applicant_info.get("applicant_plan")
-        },
-        "medicare_information": {
-            "medicare_information_claim_number": medicare_info.get("medicareNumber"),
-            "medicare_information_ssn": medicare_info.get("max_ssn"),
-            "medicare_part_a_coverage": True if medicare_info.get("medicare_part_a") else False,
-            "medicare_part_b_coverage": True if medicare_info.get("medicare_part_b") else False,
-            "medicare_part_a_eff_date": format_date(medicare_info.get("medicare_part_a")),
-            "medicare_part_b_eff_date": format_date(medicare_info.get("medicare_part_b")),
-            "enroll_part_b_more_than_once": False,
-            "did_turn_65_in_last_six_mo": calculate_medicare_dates(
-                applicant_info.get("applicant_dob"),
-                applicant_info.get("effective_date"),
-                medicare_info.get("medicare_part_a"),
-                medicare_info.get("medicare_part_b")
-            )["t65_six_months"],
-            "enroll_part_b_last_6_mo": calculate_medicare_dates(
-                applicant_info.get("applicant_dob"),
-                applicant_info.get("effective_date"),
-                medicare_info.get("medicare_part_a"),
-                medicare_info.get("medicare_part_b")
-            )["part_b_six_months"],
-            "renal_failure": False,
-            "Electronic_Combined": False,
-            "apply_guaranteed_issue": False
-        },
-        "producer": {
-            "producer_first_name": producer_config.get("first_name"),
-            "producer_last_name": producer_config.get("last_name"),
-            "producer_phone": format_phone_number(producer_config.get("phone")),
-            "producer_email": producer_config.get("email"),
-            "business_type": "new",
-            "has_other_inforce_policies": False,
-            "deliver_policy_to": "APP",
-            "policy_delivery_type": "paper",
-            "agent_address_line1": producer_config.get("address_line1"),
-            "agent_zip5": producer_config.get("address_zip5"),
-            "agent_address_city": producer_config.get("address_city"),
-            "agent_address_state": producer_config.get("address_state"),
-            "replacement_notice_copy": True,
-            "Electronic_Combined": False
-        },
-        "payment": payment_info
-    }
-    if 'hhd_information' not in data:
-        formatted_data["hhd_information"] = {"hhd": False}
-    
-    return formatted_data
+class _computed_once:
+    """
+    cached_property without its per-access bookkeeping: the value is stored
+    in the instance __dict__, which shadows this (non-data) descriptor, so
+    __get__ only runs on first access.
+    """
 
-def format_aetna_application(application_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Format application data specifically for Aetna."""
-    producer_config = load_producer_config()
-    
-    data = parse_json_data(application_data.get("data"))
-    applicant_info = data.get("applicant_info", {})
-    medicare_info = data.get("medicare_information", {})
-    payment_info = data.get("payment", {})
-
-    # Add zip code lookup
-    with open('zipData.json') as f:
-        zipData = json.load(f)
-
-    zip5 = applicant_info.get("zip5")
-    if zip5:
-        zip_data = zipData.get(zip5, {})
-        address_city = zip_data.get("cities", [""])[0]
-        address_state = zip_data.get("state", "")
-    else:
-        address_city = ""
-        address_state = ""
-
-    formatted_data = {
-        "applicant_info": {
-            "f_name": applicant_info.get("f_name"),
-            "l_name": applicant_info.get("l_name"),
-            "address_line1": applicant_info.get("address_line1"),
-            "zip5": applicant_info.get("zip5"),
-            "address_city": address_city,
-            "address_state": address_state,
-            "applicant_phone": format_phone_number(applicant_info.get("applicant_phone")),
-            "applicant_dob": format_date(applicant_info.get("applicant_dob")),
-            "gender": applicant_info.get("gender"),
-            "effective_date": format_date(applicant_info.get("effective_date")),
-            "tobacco_usage": applicant_info.get("tobacco_usage") or applicant_info.get("tobacco") or False,
-            "height": applicant_info.get("height"),
-            "weight": applicant_info.get("weight"),
-            "legal_resident": True,
-            "applicant_plan": applicant_info.get("applicant_plan")
-        },
-        "physician_information": data.get("physician_information", {}),
-        "medicare_information": {
-            "medicare_information_claim_number": medicare_info.get("medicareNumber"),
-            "medicare_information_ssn": medicare_info.get("max_ssn"),
-            "medicare_part_a_coverage": True if medicare_info.get("medicare_part_a") else False,
-            "medicare_part_b_coverage": True if medicare_info.get("medicare_part_b") else False,
-            "medicare_part_a_eff_date": format_date(medicare_info.get("medicare_part_a")),
-            "medicare_part_b_eff_date": format_date(medicare_info.get("medicare_part_b")),
-            "did_turn_65_in_last_six_mo": calculate_medicare_dates(
-                applicant_info.get("applicant_dob"),
-                applicant_info.get("effective_date"),
-                medicare_info.get("medicare_part_a"),
-                medicare_info.get("medicare_part_b")
-            )["t65_six_months"],
-            "enroll_part_b_last_6_mo": calculate_medicare_dates(
-                applicant_info.get("applicant_dob"),
-                applicant_info.get("effective_date"),
-                medicare_info.get("medicare_part_a"),
-                medicare_info.get("medicare_part_b")
-            )["part_b_six_months"],
-            "apply_guaranteed_issue": False
-        },
-        "producer": {
-            "producer_first_name": producer_config.get("first_name"),
-            "producer_last_name": producer_config.get("last_name"),
-            "producer_phone": format_phone_number(producer_config.get("phone")),
-            "producer_email": producer_config.get("email"),
-            "producer_writing_number": producer_config.get("writing_numbers", {}).get("aetna"),
-            "deliver_policy_to": "applicant",
-            "e_delivery": False,
-            "accurate_recording": True,
-            "interviewed_applicants": True,
-            "application_provided": True,
-            "replacement_notice_copy": True,
-            "agent_requests_split_commissions": False
-        },
-        "payment": payment_info
-    }
+    __slots__ = ("func", "name")
+
+    def __init__(self, func):
+        self.func = func
+        self.name = func.__name__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = instance.__dict__[self.name] = self.func(instance)
+        return value
+
+class ApplicationContext:
+    """
+    Everything derived from one application while formatting it: the parsed
+    data and its sections, parsed dates, Medicare windows, the ZIP lookup,
+    the producer and the term date for existing coverage. Each value is
+    computed on first use and at most once; create one per request and pass
+    it to the formatter and format_application.
+    """
+
+    def __init__(self, application_data: Dict[str, Any], carrier: Optional[str] = None):
+        self.application_data = application_data
+        self.carrier = carrier
+
+    @_computed_once
+    def data(self) -> Dict[str, Any]:
+        data = parse_json_data(self.application_data.get("data"))
+        if isinstance(data, dict):
+            # Every formatter reads these next; fill them in now rather than
+            # one lookup each (the properties below still cover other data)
+            self.__dict__.update(
+                applicant_info=data.get("applicant_info", {}),
+                medicare_information=data.get("medicare_information", {}),
+                payment=data.get("payment", {}),
+            )
+        return data
+
+    @_computed_once
+    def applicant_info(self) -> Dict[str, Any]:
+        return self.data.get("applicant_info", {})
+
+    @_computed_once
+    def medicare_information(self) -> Dict[str, Any]:
+        return self.data.get("medicare_information", {})
+
+    @_computed_once
+    def payment(self) -> Dict[str, Any]:
+        return self.data.get("payment", {})
+
+    @_computed_once
+    def birth_date(self) -> datetime:
+        return datetime.strptime(self.applicant_info.get("applicant_dob"), '%Y-%m-%d')
+
+    @_computed_once
+    def effective_date(self) -> datetime:
+        return datetime.strptime(self.applicant_info.get("effective_date"), '%Y-%m-%d')
+
+    @_computed_once
+    def medicare_dates(self) -> Dict[str, Any]:
+        return medicare_windows(self.birth_date, self.effective_date, self.medicare_information.get("medicare_part_b"))
+
+    @_computed_once
+    def address(self) -> Tuple[str, str]:
+        """(city, state) for the applicant's ZIP code."""
+        return lookup_zip(self.applicant_info.get("zip5"))
+
+    @_computed_once
+    def producer(self) -> Dict[str, Any]:
+        return load_producer_config()
+
+    @_computed_once
+    def medicare_status(self) -> Optional[str]:
+        return self.application_data.get("onboarding_data", {}).get("medicare_status")
+
+    @_computed_once
+    def term_date(self) -> datetime:
+        """Day before the new policy takes effect, when existing coverage ends."""
+        return self.effective_date - timedelta(days=1)
+
+    @_computed_once
+    def term_date_str(self) -> str:
+        return format_date(self.term_date.strftime("%Y-%m-%d"))
+
+def _prescription_drug_list(section: Any) -> list:
+    if isinstance(section, dict):
+        return section.get("prescription_drug_list", [])
+    # Not a mapping: fails the way popping it from a copy always did
+    return copy.copy(section).pop("prescription_drug_list", [])
+
+def _aetna_health_history(data: Dict[str, Any], formatted_data: Dict[str, Any]) -> None:
+    """
+    Replace the drug list in data's health_history with Aetna's
+    prescribed_medications, as an overlay on the original section.
+    """
     if "health_history" in data:
-        out = copy.deepcopy(data["health_history"])
-        prescription_drug_list = out.pop("prescription_drug_list", [])
+        section = data["health_history"]
+        prescription_drug_list = _prescription_drug_list(section)
         if prescription_drug_list:
             prescribed_medications = {}
             med_name_upper = ""
-            for i,dic in enumerate(prescription_drug_list):
-                full_name = dic.get("drug", {}).get("drugName")
-                if full_name:
-                    parts = full_name.split()
-                    med_name = []
-                    found_upper = False
-                    for part in parts:
-                        if part.isupper():
-                            found_upper = True
-                        elif not found_upper:
-                            med_name.append(part)
-                    med_name = " ".join(med_name)   
+            parsed = parse_prescriptions(prescription_drug_list)
+            for i, (dic, drug) in enumerate(zip(prescription_drug_list, parsed)):
+                if drug is not None:
+                    med_name = drug[0]
                     med_name_upper = med_name
                     prescribed_medications[str(i)] = {
                         "med_name": med_name,
                         "diagnosis": dic.get("diagnosis"),
                     }
-            out["med_name"] = med_name_upper
-            out["prescribed_medications"] = prescribed_medications
-            data["health_history"] = out
-    
-    if 'hhd_information' not in data:
-        formatted_data['hhd_information'] = {
-            "household_resident": False,
-            "household_resident_has_carrier": False
-        }
-    
-
-    return formatted_data
+            data["health_history"] = SectionOverlay(section, remove=("prescription_drug_list",), updates={
+                "med_name": med_name_upper,
+                "prescribed_medications": prescribed_medications,
+            })
 
-def format_allstate_application(application_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Format application data specifically for Allstate."""
-    producer_config = load_producer_config()
-    
-    data = parse_json_data(application_data.get("data"))
-    applicant_info = data.get("applicant_info", {})
-    medicare_info = data.get("medicare_information", {})
-    payment_info = data.get("payment", {})
-
-    # Add zip code lookup
-    with open('zipData.json') as f:
-        zipData = json.load(f)
-
-    zip5 = applicant_info.get("zip5")
-    if zip5:
-        zip_data = zipData.get(zip5, {})
-        address_city = zip_data.get("cities", [""])[0]
-        address_state = zip_data.get("state", "")
-    else:
-        address_city = ""
-        address_state = ""
-
-    formatted_data = {
-        "applicant_info": {
-            **applicant_info,
-            "address_city": address_city,
-            "address_state": address_state,
-            "poa": True,
-            "applicant_phone": format_phone_number(applicant_info.get("applicant_phone")),
-            "tobacco_usage": applicant_info.get("tobacco_usage") or applicant_info.get("tobacco") or False
-        },
-        "medicare_information": {
-            "medicare_information_claim_number": medicare_info.get("medicareNumber"),
-            "medicare_information_ssn": medicare_info.get("max_ssn"),
-            "medicare_part_a_coverage": True if medicare_info.get("medicare_part_a") else False,
-            "medicare_part_b_coverage": True if medicare_info.get("medicare_part_b") else False,
-            "medicare_part_a_eff_date": format_date(medicare_info.get("medicare_part_a")),
-            "medicare_part_b_eff_date": format_date(medicare_info.get("medicare_part_b")),
-            "enroll_part_b_last_6_mo": calculate_medicare_dates(
-                applicant_info.get("applicant_dob"),
-                applicant_info.get("effective_date"),
-                medicare_info.get("medicare_part_a"),
-                medicare_info.get("medicare_part_b")
-            )["part_b_six_months"],
-            "did_turn_65_in_last_six_mo": calculate_medicare_dates(
-                applicant_info.get("applicant_dob"),
-                applicant_info.get("effective_date"),
-                medicare_info.get("medicare_part_a"),
-                medicare_info.get("medicare_part_b")
-            )["t65_six_months"],
-            "disabled_esrd": False,
-            "received_outline": True,
-            "apply_guaranteed_issue": False
-        },
-        "producer": {
-            "producer_first_name": producer_config.get("first_name"),
-            "producer_last_name": producer_config.get("last_name"),
-            "producer_phone": format_phone_number(producer_config.get("phone")),
-            "producer_email": producer_config.get("email"),
-            "producer_writing_number": producer_config.get("writing_numbers", {}).get("allstate"),
-            "sale": "internet",
-            "other_sale_type_description": "",
-            "has_other_inforce_policies": False,
-            "deliver_policy_to": "applicant",
-            "additional_witness": False,
-            "agent_related": False,
-            "agent_reviewed": True,
-            "applicant_reviewed": True,
-            "replacement_notice_copy": True
-        },
-        "payment": payment_info
-    }
+def _allstate_payment_mode(data: Dict[str, Any], formatted_data: Dict[str, Any]) -> None:
     formatted_data["payment"]["payment_mode"] = "monthly"
 
-    if "hhd_information" not in data:
-        formatted_data["hhd_information"] = {"hhd": False}
-    else:
-        formatted_data["hhd_information"] = data["hhd_information"]
+def _allstate_activity_tracker(data: Dict[str, Any], formatted_data: Dict[str, Any]) -> None:
     formatted_data["hhd_information"]["activity_tracker"] = False
     formatted_data["hhd_information"]["activity_tacker"] = False
- 
+
+def _allstate_medication_information(data: Dict[str, Any], formatted_data: Dict[str, Any]) -> None:
+    """
+    Replace the drug list in data's medication_information with Allstate's
+    prescribed_medications, as an overlay on the original section.
+    """
     if "medication_information" in data:
-        out = copy.deepcopy(data["medication_information"])
-        prescription_drug_list = out.pop("prescription_drug_list", [])
+        section = data["medication_information"]
+        prescription_drug_list = _prescription_drug_list(section)
         if prescription_drug_list:
             prescribed_medications = {}
             med_name_upper = ""
             dosage_upper = ""
-            for i,dic in enumerate(prescription_drug_list):
-                full_name = dic.get("drug", {}).get("drugName")
-                if full_name:
-                    # Split on uppercase word (SOL, TAB, etc)
-                    parts = full_name.split()
-                    print(f"parts: {parts}")
-                    med_name = []
-                    dosage = []
-                    found_upper = False
-                    
-                    for part in parts:
-                        if not found_upper and part.isupper():
-                            found_upper = True
-                        elif found_upper:
-                            # Include all remaining parts in dosage
-                            dosage.append(part)
-                        else:
-                            med_name.append(part)
-                            
-                    med_name = " ".join(med_name)
-                    dosage = " ".join(dosage)
-                else:
-                    med_name = ""
-                    dosage = ""
+            # Split on uppercase word (SOL, TAB, etc)
+            parsed = parse_prescriptions(prescription_drug_list)
+            for i, (dic, drug) in enumerate(zip(prescription_drug_list, parsed)):
+                med_name, dosage = drug if drug is not None else ("", "")
                 dosage = dosage.replace("/", ";")
                 d = {
                     "med_name": med_name,
@@ -510,101 +307,223 @@ def format_allstate_application(application_data: Dict[str, Any]) -> Dict[str, A
                 prescribed_medications[str(i)] = d 
                 med_name_upper = med_name
                 dosage_upper = dosage
-            out["med_name"] = med_name_upper
-            out["dosage"] = dosage_upper
-            out["prescribed_medications"] = prescribed_medications
-            data["medication_information"] = out
+            data["medication_information"] = SectionOverlay(section, remove=("prescription_drug_list",), updates={
+                "med_name": med_name_upper,
+                "dosage": dosage_upper,
+                "prescribed_medications": prescribed_medications,
+            })
 
-    # Handle tobacco_last_date removal after the dictionary definition
+def _allstate_tobacco_last_date(data: Dict[str, Any], formatted_data: Dict[str, Any]) -> None:
+    applicant_info = data.get("applicant_info", {})
     if (not applicant_info.get("tobacco_usage") and 
         "tobacco_last_date" in applicant_info and 
         "tobacco_last_date" in formatted_data["applicant_info"]):
         del formatted_data["applicant_info"]["tobacco_last_date"]
 
-    return formatted_data
-
-def format_uhc_application(application_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Format application data specifically for UnitedHealthcare."""
-    producer_config = load_producer_config()
-    
-    data = parse_json_data(application_data.get("data"))
-    applicant_info = data.get("applicant_info", {})
-    medicare_info = data.get("medicare_information", {})
-    payment_info = data.get("payment", {})
-    payment_info["eft_confirm"] = "ongoing"
-    
-    medicare_dates = calculate_medicare_dates(
-        applicant_info.get("applicant_dob"),
-        applicant_info.get("effective_date"),
-        medicare_info.get("medicare_part_a"),
-        medicare_info.get("medicare_part_b")
-    )
-
-    with open('zipData.json') as f:
-        zipData = json.load(f)
-
-    zip5 = applicant_info.get("zip5")
-    if zip5:
-        zip_data = zipData.get(zip5, {})
-        address_city = zip_data.get("cities", [""])[0]
-        address_state = zip_data.get("state", "")
-    else:
-        address_city = ""
-        address_state = ""
-
-    formatted_data = {
-        "applicant_info": {
-            **applicant_info,
-            "poa": True,
-            "enroll_kit": True,
-            "applicant_plan": applicant_info.get("plan") or applicant_info.get("applicant_plan"),
-            "effective_date": format_date(applicant_info.get("effective_date")),
-            "applicant_phone": format_phone_number(applicant_info.get("applicant_phone") or applicant_info.get("phone")),
-            "applicant_dob": format_date(applicant_info.get("applicant_dob")),
-            "tobacco_usage": applicant_info.get("tobacco_usage") or applicant_info.get("tobacco") or False,
-            "address_city": address_city,
-            "address_state": address_state,
-        },
-        "medicare_information": {
-            "medicare_information_claim_number": medicare_info.get("medicareNumber"),
-            "medicare_information_ssn": medicare_info.get("max_ssn"),
-            "medicare_part_a_coverage": True if medicare_info.get("medicare_part_a") else False,
-            "medicare_part_b_coverage": True if medicare_info.get("medicare_part_b") else False,
-            "medicare_part_a_eff_date": format_date(medicare_info.get("medicare_part_a")),
-            "medicare_part_b_eff_date": format_date(medicare_info.get("medicare_part_b")),
-            "enroll_part_b_last_6_mo": medicare_dates["part_b_six_months"],
-            "did_turn_65_in_last_six_mo": medicare_dates["t65_six_months"],
-            "apply_guaranteed_issue": False,
-            "medicare_active": True
-        },
-        "producer": {
-            "agent_first_name": producer_config.get("first_name"),
-            "agent_last_name": producer_config.get("last_name"),
-            "producer_phone": format_phone_number(producer_config.get("phone")),
-            "producer_email": producer_config.get("email"),
-            "producer_writing_number": producer_config.get("writing_numbers", {}).get("uhc"),
-            "policy_delivery_type": "Mail"
-        },
-        "plan_documents": {
-            "policy_delivery_type": "Mail"
-        },
-        "payment": payment_info
-    }
+def _uhc_eft_confirm(data: Dict[str, Any], formatted_data: Dict[str, Any]) -> None:
+    formatted_data["payment"]["eft_confirm"] = "ongoing"
+
+# Fields several carriers share
+_PHONE = Field("applicant_phone", "applicant_info.applicant_phone", format_phone_number)
+_PHONE_OR_ALT = Field("applicant_phone", ("applicant_info.applicant_phone", "applicant_info.phone"), format_phone_number)
+_TOBACCO = Field("tobacco_usage", ("applicant_info.tobacco_usage", "applicant_info.tobacco"), default=False)
+_MEDICARE_IDS = [
+    Field("medicare_information_claim_number", "medicare_information.medicareNumber"),
+    Field("medicare_information_ssn", "medicare_information.max_ssn"),
+    Field("medicare_part_a_coverage", "medicare_information.medicare_part_a", bool),
+    Field("medicare_part_b_coverage", "medicare_information.medicare_part_b", bool),
+    Field("medicare_part_a_eff_date", "medicare_information.medicare_part_a", format_date),
+    Field("medicare_part_b_eff_date", "medicare_information.medicare_part_b", format_date),
+]
+_T65 = Field("did_turn_65_in_last_six_mo", "medicare_dates.t65_six_months")
+_PART_B = Field("enroll_part_b_last_6_mo", "medicare_dates.part_b_six_months")
+_PRODUCER_CONTACT = [
+    Field("producer_phone", "producer.phone", format_phone_number),
+    Field("producer_email", "producer.email"),
+]
+_PRODUCER_NAME = [
+    Field("producer_first_name", "producer.first_name"),
+    Field("producer_last_name", "producer.last_name"),
+]
+
+ACE_SPEC = CarrierSpec("ACE", [
+    Section("applicant_info", [
+        Field("f_name", "applicant_info.f_name"),
+        Field("l_name", "applicant_info.l_name"),
+        Field("address_line1", "applicant_info.address_line1"),
+        Field("zip5", "applicant_info.zip5"),
+        Field("address_city", "address_city"),
+        Field("address_state", "address_state"),
+        _PHONE_OR_ALT,
+        Field("applicant_dob", "applicant_info.applicant_dob", format_date),
+        Field("gender", "applicant_info.gender"),
+        Field("effective_date", "applicant_info.effective_date", format_date),
+        _TOBACCO,
+        Field("applicant_plan", "applicant_info.applicant_plan"),
+    ]),
+    Section("medicare_information", [
+        *_MEDICARE_IDS,
+        Const("enroll_part_b_more_than_once", False),
+        _T65,
+        _PART_B,
+        Const("renal_failure", False),
+        Const("Electronic_Combined", False),
+        Const("apply_guaranteed_issue", False),
+    ]),
+    Section("producer", [
+        *_PRODUCER_NAME,
+        *_PRODUCER_CONTACT,
+        Const("business_type", "new"),
+        Const("has_other_inforce_policies", False),
+        Const("deliver_policy_to", "APP"),
+        Const("policy_delivery_type", "paper"),
+        Field("agent_address_line1", "producer.address_line1"),
+        Field("agent_zip5", "producer.address_zip5"),
+        Field("agent_address_city", "producer.address_city"),
+        Field("agent_address_state", "producer.address_state"),
+        Const("replacement_notice_copy", True),
+        Const("Electronic_Combined", False),
+    ]),
+    Field("payment", "payment"),
+    Const("hhd_information", {"hhd": False}, when_missing="hhd_information"),
+])
+
+AETNA_SPEC = CarrierSpec("Aetna", [
+    Section("applicant_info", [
+        Field("f_name", "applicant_info.f_name"),
+        Field("l_name", "applicant_info.l_name"),
+        Field("address_line1", "applicant_info.address_line1"),
+        Field("zip5", "applicant_info.zip5"),
+        Field("address_city", "address_city"),
+        Field("address_state", "address_state"),
+        _PHONE,
+        Field("applicant_dob", "applicant_info.applicant_dob", format_date),
+        Field("gender", "applicant_info.gender"),
+        Field("effective_date", "applicant_info.effective_date", format_date),
+        _TOBACCO,
+        Field("height", "applicant_info.height"),
+        Field("weight", "applicant_info.weight"),
+        Const("legal_resident", True),
+        Field("applicant_plan", "applicant_info.applicant_plan"),
+    ]),
+    Field("physician_information", "data.physician_information", default={}),
+    Section("medicare_information", [
+        *_MEDICARE_IDS,
+        _T65,
+        _PART_B,
+        Const("apply_guaranteed_issue", False),
+    ]),
+    Section("producer", [
+        *_PRODUCER_NAME,
+        *_PRODUCER_CONTACT,
+        Field("producer_writing_number", "producer.writing_numbers.aetna"),
+        Const("deliver_policy_to", "applicant"),
+        Const("e_delivery", False),
+        Const("accurate_recording", True),
+        Const("interviewed_applicants", True),
+        Const("application_provided", True),
+        Const("replacement_notice_copy", True),
+        Const("agent_requests_split_commissions", False),
+    ]),
+    Field("payment", "payment"),
+    Const("hhd_information", {
+        "household_resident": False,
+        "household_resident_has_carrier": False
+    }, when_missing="hhd_information"),
+], hooks=[_aetna_health_history])
+
+ALLSTATE_SPEC = CarrierSpec("Allstate", [
+    Section("applicant_info", [
+        Spread("applicant_info"),
+        Field("address_city", "address_city"),
+        Field("address_state", "address_state"),
+        Const("poa", True),
+        _PHONE,
+        _TOBACCO,
+    ]),
+    Section("medicare_information", [
+        *_MEDICARE_IDS,
+        _PART_B,
+        _T65,
+        Const("disabled_esrd", False),
+        Const("received_outline", True),
+        Const("apply_guaranteed_issue", False),
+    ]),
+    Section("producer", [
+        *_PRODUCER_NAME,
+        *_PRODUCER_CONTACT,
+        Field("producer_writing_number", "producer.writing_numbers.allstate"),
+        Const("sale", "internet"),
+        Const("other_sale_type_description", ""),
+        Const("has_other_inforce_policies", False),
+        Const("deliver_policy_to", "applicant"),
+        Const("additional_witness", False),
+        Const("agent_related", False),
+        Const("agent_reviewed", True),
+        Const("applicant_reviewed", True),
+        Const("replacement_notice_copy", True),
+    ]),
+    Field("payment", "payment"),
+    # Shares data's hhd_information when present, so the hook below flags both
+    Field("hhd_information", "data.hhd_information", default={"hhd": False}),
+], hooks=[
+    _allstate_payment_mode,
+    _allstate_activity_tracker,
+    _allstate_medication_information,
+    _allstate_tobacco_last_date,
+])
+
+UHC_SPEC = CarrierSpec("UnitedHealthcare", [
+    Section("applicant_info", [
+        Spread("applicant_info"),
+        Const("poa", True),
+        Const("enroll_kit", True),
+        Field("applicant_plan", ("applicant_info.plan", "applicant_info.applicant_plan")),
+        Field("effective_date", "applicant_info.effective_date", format_date),
+        _PHONE_OR_ALT,
+        Field("applicant_dob", "applicant_info.applicant_dob", format_date),
+        _TOBACCO,
+        Field("address_city", "address_city"),
+        Field("address_state", "address_state"),
+    ]),
+    Section("medicare_information", [
+        *_MEDICARE_IDS,
+        _PART_B,
+        _T65,
+        Const("apply_guaranteed_issue", False),
+        Const("medicare_active", True),
+    ]),
+    Section("producer", [
+        Field("agent_first_name", "producer.first_name"),
+        Field("agent_last_name", "producer.last_name"),
+        *_PRODUCER_CONTACT,
+        Field("producer_writing_number", "producer.writing_numbers.uhc"),
+        Const("policy_delivery_type", "Mail"),
+    ]),
+    Section("plan_documents", [
+        Const("policy_delivery_type", "Mail"),
+    ]),
+    Field("payment", "payment"),
+], hooks=[_uhc_eft_confirm])
+
+format_ace_application = compile_formatter(ACE_SPEC, globals())
+format_aetna_application = compile_formatter(AETNA_SPEC, globals())
+format_allstate_application = compile_formatter(ALLSTATE_SPEC, globals())
+format_uhc_application = compile_formatter(UHC_SPEC, globals())
+
+async def format_application(
+    application_data: Dict[str, Any],
+    carrier: str,
+    context: Optional[ApplicationContext] = None
+) -> Dict[str, Any]:
+    """
+    Main formatting function that handles different carriers.
 
-    
-    return formatted_data
-
-def truncate_json(data: Dict, max_length: int = 500) -> str:
-    """Truncate JSON string representation for logging."""
-    json_str = json.dumps(data)
-    if len(json_str) <= max_length:
-        return json_str
-    return json_str[:max_length] + "..."
-
-def format_application(application_data: Dict[str, Any], carrier: str) -> Dict[str, Any]:
-    """Main formatting function that handles different carriers."""
-    print(f"Starting format_application for carrier: {carrier}")
-    print(f"Input application_data (truncated): {truncate_json(application_data)}")
+    Formatting itself is synchronous; the coroutine only waits on the
+    bank-name lookup for payment sections that lack one.
+    """
+    logger.debug("Starting format_application for carrier: %s", carrier)
+    logger.debug("Input application_data (truncated): %s", LazyJson(application_data))
     
     carrier_formatters = {
         "UnitedHealthcare": format_uhc_application,
@@ -617,34 +536,31 @@ def format_application(application_data: Dict[str, Any], carrier: str) -> Dict[s
     formatter = carrier_formatters.get(carrier)
     if not formatter:
         error_msg = f"Unsupported carrier: {carrier}"
-        print(f"Error: {error_msg}")
+        logger.warning(error_msg)
         raise ValueError(error_msg)
     
+    if context is None:
+        context = ApplicationContext(application_data, carrier)
+
     try:
-        formatted_data = formatter(application_data)
-        print(f"Base formatted data (truncated): {truncate_json(formatted_data)}")
+        formatted_data = formatter(application_data, context)
+        logger.debug("Base formatted data (truncated): %s", LazyJson(formatted_data))
         
-        data = parse_json_data(application_data.get("data", "{}"))
-
-
-        # If skip_medication is True, add original medication sections back if they exist
-
+        data = context.data
         
-        medicare_status = application_data.get("onboarding_data", {}).get("medicare_status")
-        print(f"Medicare status: {medicare_status}")
+        medicare_status = context.medicare_status
+        logger.debug("Medicare status: %s", medicare_status)
         
         if "existing_coverage" in data:
-            print("Processing existing coverage data")
+            logger.debug("Processing existing coverage data")
             existing_coverage = data["existing_coverage"]
-            applicant_info = data.get("applicant_info", {})
+            applicant_info = context.applicant_info
             
             try:
-                effective_date = datetime.strptime(applicant_info.get("effective_date", ""), "%Y-%m-%d")
-                term_date = effective_date - timedelta(days=1)
-                print(f"Calculated term_date: {term_date}")
+                term_date = context.term_date_str
+                logger.debug("Calculated term_date: %s", term_date)
             except ValueError as e:
-                print(f"Error parsing effective_date: {e}")
-                print(f"Raw effective_date value: {applicant_info.get('effective_date')}")
+                logger.error("Error parsing effective_date %r: %s", applicant_info.get('effective_date'), e)
                 raise
             
             if medicare_status == "advantage-plan":
@@ -654,12 +570,12 @@ def format_application(application_data: Dict[str, Any], carrier: str) -> Dict[s
                     "other_health_ins_past_x_days": False,
                     "existing_coverage_medicare_plan_is_active": True,
                     "existing_coverage_medicare_plan_start_date": format_date(existing_coverage.get("advantage_start_date")),
-                    "existing_coverage_medicare_plan_end_date": format_date(term_date.strftime("%Y-%m-%d")),
+                    "existing_coverage_medicare_plan_end_date": term_date,
                     "existing_coverage_medicare_plan_replacement_indicator": True,
                     "existing_coverage_medicare_plan_repl_notice_copy": True,
                     "existing_coverage_medicare_plan_company": existing_coverage.get("advantage_company"),
                     "existing_coverage_medicare_plan_policy_number": "Advantage Plan" if existing_coverage.get('advantage_company') is None else f"{existing_coverage.get('advantage_company')} Advantage Plan",
-                    "existing_coverage_medicare_plan_planned_term_date": format_date(term_date.strftime("%Y-%m-%d")),
+                    "existing_coverage_medicare_plan_planned_term_date": term_date,
                     "existing_coverage_medicare_plan_was_first_enrollment": True,
                     "existing_coverage_medicare_plan_was_dropped": False,
                     "existing_coverage_medicare_plan_reason": {
@@ -685,8 +601,8 @@ def format_application(application_data: Dict[str, Any], carrier: str) -> Dict[s
                     ),
                     "replacement_reason_other": "More Comprehensive Coverage",
                     "other_ms_carrier_start_date": format_date(existing_coverage.get("supplemental_start_date")),
-                    "other_ms_carrier_term": format_date(term_date.strftime("%Y-%m-%d")),
-                    "other_health_ins_carrier_end_date": format_date(term_date.strftime("%Y-%m-%d")),
+                    "other_ms_carrier_term": term_date,
+                    "other_health_ins_carrier_end_date": term_date,
                     "other_ms_carrier_product_code": existing_coverage.get("supplemental_other_ms_carrier_product_code"),
                     "other_ms_carrier_policy_number": "Supplemental Plan" if existing_coverage.get('supplemental_company') is None else f"{existing_coverage.get('supplemental_other_ms_carrier_product_code')} {existing_coverage.get('supplemental_company')}",
                 }
@@ -701,13 +617,13 @@ def format_application(application_data: Dict[str, Any], carrier: str) -> Dict[s
                     "other_health_ins_past_x_days": existing_coverage.get("other_insurance"),
                     "other_health_ins_coverage_active": existing_coverage.get("other_insurance_coverage_active"),
                     "other_health_ins_carrier_eff_date": format_date(existing_coverage.get("other_insurance_start_date")),
-                    "other_health_ins_carrier_end_date": format_date(term_date.strftime("%Y-%m-%d")),
+                    "other_health_ins_carrier_end_date": term_date,
                     "other_health_ins_carrier_company": existing_coverage.get("other_insurance_company"),
                     "other_health_ins_carrier_phone_number": format_phone_number("1234567890"),
                     "other_health_ins_carrier_product_code": existing_coverage.get("other_insurance_plan_type"),
                     "other_health_ins_carrier_policy_number": "Other Plan" if existing_coverage.get('other_insurance_plan_type') is None and existing_coverage.get('other_insurance_company') is None else f"{existing_coverage.get('other_insurance_plan_type')} {existing_coverage.get('other_insurance_company')}",
                     "other_health_ins_carrier_disenrollment_reason": "Now covered by Medicare",
-                    "other_health_ins_carrier_term_date": format_date(term_date.strftime("%Y-%m-%d"))
+                    "other_health_ins_carrier_term_date": term_date
                 }
 
             formatted_data["existing_coverage"]["state_covered_medical_assistance"] = existing_coverage.get("state_covered_medical_assistance")
@@ -718,34 +634,22 @@ def format_application(application_data: Dict[str, Any], carrier: str) -> Dict[s
             formatted_data["existing_coverage"]["apply_guaranteed_issue"] = False
          
         # Remove any None or empty values recursively
-        def remove_empty_values(d):
-            if not isinstance(d, dict):
-                return d
-            return {
-                k: remove_empty_values(v)
-                for k, v in d.items()
-                if v is not None and (not isinstance(v, dict) or v)
-            }
-            
-        formatted_data = remove_empty_values(formatted_data)
+        formatted_data = apply_rule(formatted_data, PRUNE)
         
         if "payment" in formatted_data:
             payment_info = formatted_data["payment"]
             routing_number = payment_info.get("eft_routing_number")
             existing_bank_name = payment_info.get("eft_financial_institution_name")
-            print(f"existing_bank_name: {existing_bank_name}")
+            logger.debug("existing_bank_name: %s", existing_bank_name)
             existing_bank_name = None if existing_bank_name == "" else existing_bank_name
             if routing_number and not existing_bank_name:
-                bank_info = lookup_routing_number(routing_number)
+                bank_info = await lookup_routing_number(routing_number)
                 if bank_info.get("code") == 200:
                     payment_info["eft_financial_institution_name"] = bank_info.get("name")
         
-        print(f"Final formatted data (truncated): {truncate_json(formatted_data)}")
-        print(f'sections: {formatted_data.keys()}')
+        logger.debug("Final formatted data (truncated): %s", LazyJson(formatted_data))
+        logger.debug("sections: %s", list(formatted_data))
         return formatted_data
     except Exception as e:
-        print(f"Error in format_application: {str(e)}")
-        print(f"Error type: {type(e)}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Error in format_application (%s): %s", type(e).__name__, e)
         raise
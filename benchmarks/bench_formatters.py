@@ -0,0 +1,171 @@
+"""
+Compiled carrier formatters versus the hand-written originals.
+
+Checks that every carrier's compiled formatter produces byte-identical JSON,
+and leaves the input data in the same state, as handwritten_formatters.py on
+a set of synthetic applications, then times both.
+
+    python benchmarks/bench_formatters.py --samples 500 --repeat 5
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import random
+import argparse
+import contextlib
+import io
+from collections.abc import Mapping
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import application_formatter as compiled
+import handwritten_formatters as handwritten
+
+CARRIERS = {
+    "ACE": "format_ace_application",
+    "Aetna": "format_aetna_application",
+    "Allstate": "format_allstate_application",
+    "UnitedHealthcare": "format_uhc_application",
+}
+
+DRUGS = [
+    "Lisinopril TAB 10 MG/5ML",
+    "Atorvastatin Calcium TAB 20MG/1",
+    "Metformin HCl ER 500 MG",
+    "Levothyroxine Sodium",
+    "",
+]
+
+
+def sample_application(rng: random.Random, i: int) -> dict:
+    """One synthetic application, with sections present or missing at random."""
+    applicant_info = {
+        "f_name": f"First{i}",
+        "l_name": f"Last{i}",
+        "zip5": rng.choice(["66210", "01001", "99999", None]),
+        "applicant_dob": f"1959-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}" + rng.choice(["", "T00:00:00Z"]),
+        "effective_date": "2024-06-01",
+        "gender": rng.choice(["M", "F"]),
+        "applicant_plan": rng.choice(["G", "N", None]),
+        "address_line1": "1 Main St",
+        "height": "70",
+        "weight": "180",
+    }
+    if rng.random() < 0.7:
+        applicant_info["applicant_phone"] = rng.choice(["8165551234", "555", ""])
+    if rng.random() < 0.3:
+        applicant_info["phone"] = "9135550000"
+    if rng.random() < 0.3:
+        applicant_info["tobacco_usage"] = rng.choice([True, False, "yes"])
+    if rng.random() < 0.2:
+        applicant_info["tobacco"] = True
+    if rng.random() < 0.3:
+        applicant_info["tobacco_last_date"] = "2010-01-01"
+    if rng.random() < 0.2:
+        applicant_info["plan"] = "N"
+
+    data = {
+        "applicant_info": applicant_info,
+        "medicare_information": {
+            "medicareNumber": "1EG4TE5MK72",
+            "max_ssn": rng.choice(["123456789", None]),
+            "medicare_part_a": rng.choice(["2024-03-01", "2024-03-01T00:00:00Z", None]),
+            "medicare_part_b": rng.choice(["2024-06-01", None]),
+        },
+    }
+    if rng.random() < 0.8:
+        data["payment"] = {"eft_routing_number": "", "eft_account_number": "123"}
+    if rng.random() < 0.5:
+        data["hhd_information"] = {"hhd": True}
+    if rng.random() < 0.3:
+        data["physician_information"] = rng.choice([{"name": "Dr X"}, None, ""])
+    for section in ("health_history", "medication_information"):
+        if rng.random() < 0.7:
+            data[section] = {
+                "q1": False,
+                "prescription_drug_list": [
+                    {
+                        "drug": {"drugName": rng.choice(DRUGS)},
+                        "diagnosis": "dx",
+                        "frequency": "daily",
+                        "quantity": "30",
+                    }
+                    for _ in range(rng.randint(0, 4))
+                ],
+            }
+    return {"id": f"app-{i}", "data": data}
+
+
+def run(formatter, application):
+    """(formatted JSON, mutated input data JSON), or the exception raised."""
+    application = copy.deepcopy(application)
+    try:
+        formatted = formatter(application)
+    except Exception as e:
+        return ("error", type(e).__name__, str(e))
+    return json.dumps(formatted, default=str), json.dumps(application["data"], default=_plain)
+
+
+def _plain(value):
+    # Sections the formatters rewrite are left as overlays on the input
+    return dict(value) if isinstance(value, Mapping) else str(value)
+
+
+def check(samples):
+    mismatches = 0
+    for carrier, name in CARRIERS.items():
+        for application in samples:
+            for variant in (application, {**application, "data": json.dumps(application["data"])}):
+                if run(getattr(compiled, name), variant) != run(getattr(handwritten, name), variant):
+                    mismatches += 1
+                    print(f"MISMATCH {carrier} {application['id']}", file=sys.stderr)
+    return mismatches
+
+
+def time_formatter(formatter, samples, repeat):
+    # Formatters mutate their input, so each pass works on fresh copies
+    batches = [copy.deepcopy(samples) for _ in range(repeat)]
+    started = time.perf_counter()
+    for batch in batches:
+        for application in batch:
+            formatter(application)
+    return (time.perf_counter() - started) / (repeat * len(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    samples = [sample_application(rng, i) for i in range(args.samples)]
+
+    # The Allstate medication rewrite prints every drug it splits
+    with contextlib.redirect_stdout(io.StringIO()):
+        mismatches = check(samples)
+        results = []
+        for carrier, name in CARRIERS.items():
+            # Time only applications the formatter accepts (unparseable dates raise)
+            valid = [a for a in samples if run(getattr(handwritten, name), a)[0] != "error"]
+            hand_us = time_formatter(getattr(handwritten, name), valid, args.repeat) * 1e6
+            compiled_us = time_formatter(getattr(compiled, name), valid, args.repeat) * 1e6
+            results.append({
+                "carrier": carrier,
+                "timed": len(valid),
+                "handwritten_us": round(hand_us, 2),
+                "compiled_us": round(compiled_us, 2),
+                "speedup": round(hand_us / compiled_us, 2),
+            })
+
+    print(json.dumps({"samples": args.samples, "mismatches": mismatches}))
+    for row in results:
+        print(json.dumps(row))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
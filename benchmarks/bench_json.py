@@ -0,0 +1,136 @@
+"""
+Stdlib json versus json_codec (orjson when installed) on real-size
+applications: decoding the JSON columns of an applications row, and
+rendering formatted responses.
+
+Applications carry 20-50 drug medication lists and a form schema of a few
+hundred fields, the size the formatter endpoint reads per request. Decoded
+values and rendered documents are checked to match before timing.
+
+    python benchmarks/bench_json.py --samples 200 --repeat 5
+    JSON_CODEC=json python benchmarks/bench_json.py   # stdlib on both sides
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import contextlib
+import io
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_codec
+from fastapi.responses import JSONResponse
+from routes.formatter_routes import build_formatted_response
+from bench_medications import sample_with_medications
+
+COLUMNS = ("data", "schema", "originalSchema", "onboarding_data")
+
+
+def sample_schema(rng: random.Random) -> dict:
+    """A form schema shaped like the ones stored with applications."""
+    return {
+        "sections": [
+            {
+                "id": f"section_{s}",
+                "title": f"Section {s}",
+                "fields": [
+                    {
+                        "name": f"field_{s}_{f}",
+                        "label": f"Question {s}.{f}",
+                        "type": rng.choice(["text", "date", "select", "boolean"]),
+                        "required": rng.random() < 0.5,
+                        "options": [f"Option {o}" for o in range(rng.randint(0, 5))],
+                    }
+                    for f in range(rng.randint(10, 30))
+                ],
+            }
+            for s in range(rng.randint(8, 15))
+        ]
+    }
+
+
+def sample_row(rng: random.Random, i: int) -> dict:
+    """The JSON columns of one applications row, as stored (strings)."""
+    application = sample_with_medications(rng, i)
+    schema = sample_schema(rng)
+    return {
+        "data": json.dumps(application["data"]),
+        "schema": json.dumps(schema),
+        "originalSchema": json.dumps(schema),
+        "onboarding_data": json.dumps({"medicare_status": "supplemental-plan", "answers": {"q1": True}}),
+    }
+
+
+def decode_row(loads, row: dict) -> dict:
+    return {column: loads(row[column]) for column in COLUMNS}
+
+
+def per_item_us(fn, items, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            fn(item)
+    return (time.perf_counter() - started) / (repeat * len(items)) * 1e6
+
+
+async def formatted_responses(rows):
+    responses = []
+    for i, row in enumerate(rows):
+        application = {"id": f"app-{i}", "naic": "60380", "email": "agent@example.com", **decode_row(json.loads, row)}
+        try:
+            responses.append(await build_formatted_response(application, application["id"]))
+        except Exception:
+            # Unparseable sample dates; the same applications fail over HTTP
+            continue
+    return responses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(24)
+    rows = [sample_row(rng, i) for i in range(args.samples)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        responses = asyncio.run(formatted_responses(rows))
+
+    mismatches = sum(decode_row(json.loads, row) != decode_row(json_codec.loads, row) for row in rows)
+    mismatches += sum(
+        json.loads(JSONResponse(response).body) != json.loads(json_codec.CodecJSONResponse(response).body)
+        for response in responses
+    )
+
+    decode_std = per_item_us(lambda row: decode_row(json.loads, row), rows, args.repeat)
+    decode_codec = per_item_us(lambda row: decode_row(json_codec.loads, row), rows, args.repeat)
+    render_std = per_item_us(lambda response: JSONResponse(response).body, responses, args.repeat)
+    render_codec = per_item_us(lambda response: json_codec.CodecJSONResponse(response).body, responses, args.repeat)
+
+    print(json.dumps({
+        "backend": json_codec.BACKEND,
+        "rows": len(rows),
+        "mean_row_bytes": round(sum(len(row[column]) for row in rows for column in COLUMNS) / len(rows)),
+        "responses": len(responses),
+        "mean_response_bytes": round(sum(len(JSONResponse(r).body) for r in responses) / max(len(responses), 1)),
+        "mismatches": mismatches,
+    }))
+    for name, std_us, codec_us in (("decode_row", decode_std, decode_codec), ("render_response", render_std, render_codec)):
+        print(json.dumps({
+            "path": name,
+            "stdlib_us": round(std_us, 2),
+            "codec_us": round(codec_us, 2),
+            "speedup": round(std_us / codec_us, 2),
+        }))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
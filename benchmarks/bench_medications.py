@@ -0,0 +1,178 @@
+"""
+Drug-name parsing: the per-prescription split loop the Aetna and Allstate
+formatters used to run versus the shared, memoized parser in medications.py.
+
+Medication lists of 20-50 drugs are drawn from a vocabulary of common
+drug-search results. Parses are checked against the loop, then timed per
+list (warm memo, and with the memo cleared before every list), and the two
+formatters are timed end to end against handwritten_formatters.py.
+
+    python benchmarks/bench_medications.py --lists 300 --repeat 5
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import random
+import argparse
+import contextlib
+import io
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import medications
+import application_formatter as compiled
+import handwritten_formatters as handwritten
+from bench_formatters import sample_application, run
+
+VOCABULARY = [
+    "Lisinopril TAB 10 MG/5ML",
+    "Lisinopril TAB 20MG",
+    "Atorvastatin Calcium TAB 20MG/1",
+    "Atorvastatin Calcium TAB 40MG/1",
+    "Metformin HCl ER TAB 500 MG",
+    "Metformin HCl TAB 1000 MG",
+    "Levothyroxine Sodium TAB 50 MCG",
+    "Amlodipine Besylate TAB 5 MG",
+    "Omeprazole CPDR 20 MG",
+    "Losartan Potassium TAB 50 MG",
+    "Simvastatin TAB 20 MG",
+    "Hydrochlorothiazide TAB 25 MG",
+    "Gabapentin CAPS 300 MG",
+    "Sertraline HCl TAB 50 MG",
+    "Furosemide TAB 40 MG",
+    "Pantoprazole Sodium TBEC 40 MG",
+    "Prednisone TAB 10 MG",
+    "Tamsulosin HCl CAPS 0.4 MG",
+    "Meloxicam TAB 15 MG",
+    "Clopidogrel Bisulfate TAB 75 MG",
+    "Rosuvastatin Calcium TAB 10 MG",
+    "Escitalopram Oxalate TAB 10 MG",
+    "Montelukast Sodium TAB 10 MG",
+    "Carvedilol TAB 12.5 MG",
+    "Trazodone HCl TAB 50 MG",
+    "Insulin Glargine SOLN 100 UNIT/ML",
+    "Albuterol Sulfate AERS 108 (90 Base) MCG/ACT",
+    "Fluticasone Propionate SUSP 50 MCG/ACT",
+    "Warfarin Sodium TAB 5 MG",
+    "Eliquis TAB 5 MG",
+    "Vitamin D3",
+    "",
+]
+
+
+def loop_parse(full_name):
+    """The split loop the formatters ran for every prescription."""
+    med_name = []
+    dosage = []
+    found_upper = False
+    for part in full_name.split():
+        if not found_upper and part.isupper():
+            found_upper = True
+        elif found_upper:
+            dosage.append(part)
+        else:
+            med_name.append(part)
+    return " ".join(med_name), " ".join(dosage)
+
+
+def loop_parse_prescriptions(prescription_drug_list):
+    results = []
+    for prescription in prescription_drug_list:
+        full_name = prescription.get("drug", {}).get("drugName")
+        results.append(loop_parse(full_name) if full_name else None)
+    return results
+
+
+def medication_list(rng: random.Random):
+    return [
+        {
+            "drug": {"drugName": rng.choice(VOCABULARY)},
+            "diagnosis": "dx",
+            "frequency": "daily",
+            "quantity": "30",
+        }
+        for _ in range(rng.randint(20, 50))
+    ]
+
+
+def sample_with_medications(rng: random.Random, i: int) -> dict:
+    application = sample_application(rng, i)
+    drugs = medication_list(rng)
+    for section in ("health_history", "medication_information"):
+        application["data"][section] = {"q1": False, "prescription_drug_list": copy.deepcopy(drugs)}
+    return application
+
+
+def per_list_us(fn, lists, repeat, before_each=None):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for drugs in lists:
+            if before_each is not None:
+                before_each()
+            fn(drugs)
+    return (time.perf_counter() - started) / (repeat * len(lists)) * 1e6
+
+
+def per_application_us(formatter, applications, repeat):
+    batches = [copy.deepcopy(applications) for _ in range(repeat)]
+    started = time.perf_counter()
+    for batch in batches:
+        for application in batch:
+            formatter(application)
+    return (time.perf_counter() - started) / (repeat * len(applications)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lists", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(22)
+    lists = [medication_list(rng) for _ in range(args.lists)]
+
+    mismatches = sum(
+        medications.parse_prescriptions(drugs) != loop_parse_prescriptions(drugs) for drugs in lists
+    )
+
+    loop_us = per_list_us(loop_parse_prescriptions, lists, args.repeat)
+    cold_us = per_list_us(medications.parse_prescriptions, lists, args.repeat,
+                          before_each=medications.clear_parse_cache)
+    medications.parse_prescriptions(lists[0])
+    warm_us = per_list_us(medications.parse_prescriptions, lists, args.repeat)
+    print(json.dumps({
+        "lists": args.lists,
+        "mean_drugs": round(sum(map(len, lists)) / len(lists), 1),
+        "mismatches": mismatches,
+        "loop_us": round(loop_us, 2),
+        "memo_cold_us": round(cold_us, 2),
+        "memo_warm_us": round(warm_us, 2),
+        "speedup_warm": round(loop_us / warm_us, 2),
+    }))
+
+    # End to end: only applications the formatters accept (unparseable dates raise)
+    applications = [sample_with_medications(rng, i) for i in range(args.lists)]
+    for carrier, name in (("Aetna", "format_aetna_application"), ("Allstate", "format_allstate_application")):
+        # The hand-written Allstate formatter prints every drug it splits
+        with contextlib.redirect_stdout(io.StringIO()):
+            valid = [a for a in applications if run(getattr(handwritten, name), a)[0] != "error"]
+            carrier_mismatches = sum(run(getattr(compiled, name), a) != run(getattr(handwritten, name), a) for a in valid)
+            hand_us = per_application_us(getattr(handwritten, name), valid, args.repeat)
+            compiled_us = per_application_us(getattr(compiled, name), valid, args.repeat)
+        mismatches += carrier_mismatches
+        print(json.dumps({
+            "carrier": carrier,
+            "timed": len(valid),
+            "mismatches": carrier_mismatches,
+            "handwritten_us": round(hand_us, 2),
+            "compiled_us": round(compiled_us, 2),
+            "speedup": round(hand_us / compiled_us, 2),
+        }))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+NAIC lookup latency versus registry size.
+
+Grows supp_companies_full.json into synthetic registries of the requested
+sizes (real names recombined with state and line-of-business suffixes) and
+times uncached lookups with the candidate index against a full scan.
+"mismatches" lists the queries where the indexed lookup returned a
+different company (name and NAIC) than the full scan; the index must only
+change speed, so the script exits 1 if there are any. "default" is what
+NaicMatcher uses at that size (NAIC_INDEX_MIN_COMPANIES).
+
+    python benchmarks/bench_naic.py --sizes 269 2000 20000 50000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from naic_matcher import NaicMatcher, NAIC_INDEX_MIN_COMPANIES
+
+STATES = [
+    "Alabama", "Arizona", "California", "Colorado", "Florida", "Georgia", "Illinois", "Iowa",
+    "Kentucky", "Maine", "Michigan", "Missouri", "Nebraska", "New York", "Ohio", "Oregon",
+    "Texas", "Utah", "Virginia", "Wisconsin",
+]
+LINES = ["Life", "Health", "Casualty", "Assurance", "Benefit", "Mutual", "Reinsurance", "Dental"]
+SUFFIXES = ["Insurance Company", "Ins Co", "Company", "Inc.", "Corporation", "of America"]
+SYLLABLES = ["ber", "kes", "lan", "mor", "ton", "vel", "hal", "dri", "son", "gar", "wick", "ash", "ley", "ford"]
+
+QUERIES = [
+    "UHC", "Mutual of Omaha", "Humana", "Aetna", "Cigna", "BCBS", "Aflac", "Blue Cross",
+    "Anthem", "Wellcare", "Medico", "Transamerica", "Colonial Penn", "Bankers Fidelity",
+    "Manhattan Life", "Allstate", "Globe Life", "Physicians Mutual", "no such carrier",
+]
+
+
+def synthetic_registry(base, size, seed=7):
+    rng = random.Random(seed)
+    companies = list(base[:size])
+    while len(companies) < size:
+        words = rng.choice(base)["name_full"].split()
+        stem = " ".join(words[: rng.randint(1, max(1, len(words) - 1))])
+        if rng.random() < 0.7:
+            # Invented surname so the registry isn't just recombined real names
+            surname = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).title()
+            stem = f"{surname} {stem}" if rng.random() < 0.5 else surname
+        name_full = f"{stem} {rng.choice(LINES)} {rng.choice(SUFFIXES)} of {rng.choice(STATES)}"
+        companies.append({
+            "name": name_full[:40],
+            "name_full": name_full,
+            "naic": str(10000 + len(companies)),
+        })
+    return companies
+
+
+def identity(matcher, query):
+    company = matcher.match(query)
+    return (company["name_full"], company["naic"]) if company else None
+
+
+def time_lookups(matcher, queries, repeat):
+    samples = []
+    for _ in range(repeat):
+        for query in queries:
+            started = time.perf_counter()
+            matcher.match(query)
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95)] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--companies", default="supp_companies_full.json")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[269, 2000, 20000, 50000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-full-scan", action="store_true", help="skip the full-scan baseline")
+    args = parser.parse_args()
+
+    with open(args.companies) as f:
+        base = json.load(f)
+
+    queries = QUERIES + [company["name"] for company in random.Random(3).sample(base, 40)]
+    results = []
+    mismatches = 0
+    for size in args.sizes:
+        companies = synthetic_registry(base, size)
+        started = time.perf_counter()
+        indexed = NaicMatcher(companies, cache_size=0, index_min_companies=0)
+        build_seconds = time.perf_counter() - started
+        row = {
+            "size": size,
+            "default": "indexed" if size >= NAIC_INDEX_MIN_COMPANIES else "full_scan",
+            "build_ms": round(build_seconds * 1000, 1),
+            "indexed": summarize(time_lookups(indexed, queries, args.repeat)),
+        }
+        if not args.no_full_scan:
+            full_scan = NaicMatcher(companies, cache_size=0, index_min_companies=size + 1)
+            row["full_scan"] = summarize(time_lookups(full_scan, queries, args.repeat))
+            row["mismatches"] = [
+                {"query": query, "indexed": identity(indexed, query), "full_scan": identity(full_scan, query)}
+                for query in queries
+                if identity(indexed, query) != identity(full_scan, query)
+            ]
+            mismatches += len(row["mismatches"])
+        results.append(row)
+        print(json.dumps(row))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Hand-written carrier formatters, as they were before being replaced by the
+declarative specs in application_formatter.py. Kept as the reference that
+bench_formatters.py times and checks the compiled formatters against.
+"""
+
+import copy
+from typing import Any, Dict
+
+from application_formatter import (
+    calculate_medicare_dates,
+    format_date,
+    format_phone_number,
+    load_producer_config,
+    lookup_zip,
+    parse_json_data,
+)
+
+def format_ace_application(application_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Format application data specifically for ACE/Chubb."""
+    producer_config = load_producer_config()
+    
+    data = parse_json_data(application_data.get("data"))
+    applicant_info = data.get("applicant_info", {})
+    medicare_info = data.get("medicare_information", {})
+    payment_info = data.get("payment", {})
+
+    # Add zip code lookup
+    address_city, address_state = lookup_zip(applicant_info.get("zip5"))
+
+    formatted_data = {
+        "applicant_info": {
+            "f_name": applicant_info.get("f_name"),
+            "l_name": applicant_info.get("l_name"),
+            "address_line1": applicant_info.get("address_line1"),
+            "zip5": applicant_info.get("zip5"),
+            "address_city": address_city,
+            "address_state": address_state,
+            "applicant_phone": format_phone_number(applicant_info.get("applicant_phone") or applicant_info.get("phone")),
+            "applicant_dob": format_date(applicant_info.get("applicant_dob")),
+            "gender": applicant_info.get("gender"),
+            "effective_date": format_date(applicant_info.get("effective_date")),
+            "tobacco_usage": applicant_info.get("tobacco_usage") or applicant_info.get("tobacco") or False,
+            "applicant_plan": applicant_info.get("applicant_plan")
+        },
+        "medicare_information": {
+            "medicare_information_claim_number": medicare_info.get("medicareNumber"),
+            "medicare_information_ssn": medicare_info.get("max_ssn"),
+            "medicare_part_a_coverage": True if medicare_info.get("medicare_part_a") else False,
+            "medicare_part_b_coverage": True if medicare_info.get("medicare_part_b") else False,
+            "medicare_part_a_eff_date": format_date(medicare_info.get("medicare_part_a")),
+            "medicare_part_b_eff_date": format_date(medicare_info.get("medicare_part_b")),
+            "enroll_part_b_more_than_once": False,
+            "did_turn_65_in_last_six_mo": calculate_medicare_dates(
+                applicant_info.get("applicant_dob"),
+                applicant_info.get("effective_date"),
+                medicare_info.get("medicare_part_a"),
+                medicare_info.get("medicare_part_b")
+            )["t65_six_months"],
+            "enroll_part_b_last_6_mo": calculate_medicare_dates(
+                applicant_info.get("applicant_dob"),
+                applicant_info.get("effective_date"),
+                medicare_info.get("medicare_part_a"),
+                medicare_info.get("medicare_part_b")
+            )["part_b_six_months"],
+            "renal_failure": False,
+            "Electronic_Combined": False,
+            "apply_guaranteed_issue": False
+        },
+        "producer": {
+            "producer_first_name": producer_config.get("first_name"),
+            "producer_last_name": producer_config.get("last_name"),
+            "producer_phone": format_phone_number(producer_config.get("phone")),
+            "producer_email": producer_config.get("email"),
+            "business_type": "new",
+            "has_other_inforce_policies": False,
+            "deliver_policy_to": "APP",
+            "policy_delivery_type": "paper",
+            "agent_address_line1": producer_config.get("address_line1"),
+            "agent_zip5": producer_config.get("address_zip5"),
+            "agent_address_city": producer_config.get("address_city"),
+            "agent_address_state": producer_config.get("address_state"),
+            "replacement_notice_copy": True,
+            "Electronic_Combined": False
+        },
+        "payment": payment_info
+    }
+    if 'hhd_information' not in data:
+        formatted_data["hhd_information"] = {"hhd": False}
+    
+    return formatted_data
+
+def format_aetna_application(application_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Format application data specifically for Aetna."""
+    producer_config = load_producer_config()
+    
+    data = parse_json_data(application_data.get("data"))
+    applicant_info = data.get("applicant_info", {})
+    medicare_info = data.get("medicare_information", {})
+    payment_info = data.get("payment", {})
+
+    # Add zip code lookup
+    address_city, address_state = lookup_zip(applicant_info.get("zip5"))
+
+    formatted_data = {
+        "applicant_info": {
+            "f_name": applicant_info.get("f_name"),
+            "l_name": applicant_info.get("l_name"),
+            "address_line1": applicant_info.get("address_line1"),
+            "zip5": applicant_info.get("zip5"),
+            "address_city": address_city,
+            "address_state": address_state,
+            "applicant_phone": format_phone_number(applicant_info.get("applicant_phone")),
+            "applicant_dob": format_date(applicant_info.get("applicant_dob")),
+            "gender": applicant_info.get("gender"),
+            "effective_date": format_date(applicant_info.get("effective_date")),
+            "tobacco_usage": applicant_info.get("tobacco_usage") or applicant_info.get("tobacco") or False,
+            "height": applicant_info.get("height"),
+            "weight": applicant_info.get("weight"),
+            "legal_resident": True,
+            "applicant_plan": applicant_info.get("applicant_plan")
+        },
+        "physician_information": data.get("physician_information", {}),
+        "medicare_information": {
+            "medicare_information_claim_number": medicare_info.get("medicareNumber"),
+            "medicare_information_ssn": medicare_info.get("max_ssn"),
+            "medicare_part_a_coverage": True if medicare_info.get("medicare_part_a") else False,
+            "medicare_part_b_coverage": True if medicare_info.get("medicare_part_b") else False,
+            "medicare_part_a_eff_date": format_date(medicare_info.get("medicare_part_a")),
+            "medicare_part_b_eff_date": format_date(medicare_info.get("medicare_part_b")),
+            "did_turn_65_in_last_six_mo": calculate_medicare_dates(
+                applicant_info.get("applicant_dob"),
+                applicant_info.get("effective_date"),
+                medicare_info.get("medicare_part_a"),
+                medicare_info.get("medicare_part_b")
+            )["t65_six_months"],
+            "enroll_part_b_last_6_mo": calculate_medicare_dates(
+                applicant_info.get("applicant_dob"),
+                applicant_info.get("effective_date"),
+                medicare_info.get("medicare_part_a"),
+                medicare_info.get("medicare_part_b")
+            )["part_b_six_months"],
+            "apply_guaranteed_issue": False
+        },
+        "producer": {
+            "producer_first_name": producer_config.get("first_name"),
+            "producer_last_name": producer_config.get("last_name"),
+            "producer_phone": format_phone_number(producer_config.get("phone")),
+            "producer_email": producer_config.get("email"),
+            "producer_writing_number": producer_config.get("writing_numbers", {}).get("aetna"),
+            "deliver_policy_to": "applicant",
+            "e_delivery": False,
+            "accurate_recording": True,
+            "interviewed_applicants": True,
+            "application_provided": True,
+            "replacement_notice_copy": True,
+            "agent_requests_split_commissions": False
+        },
+        "payment": payment_info
+    }
+    if "health_history" in data:
+        out = copy.deepcopy(data["health_history"])
+        prescription_drug_list = out.pop("prescription_drug_list", [])
+        if prescription_drug_list:
+            prescribed_medications = {}
+            med_name_upper = ""
+            for i,dic in enumerate(prescription_drug_list):
+                full_name = dic.get("drug", {}).get("drugName")
+                if full_name:
+                    parts = full_name.split()
+                    med_name = []
+                    found_upper = False
+                    for part in parts:
+                        if part.isupper():
+                            found_upper = True
+                        elif not found_upper:
+                            med_name.append(part)
+                    med_name = " ".join(med_name)   
+                    med_name_upper = med_name
+                    prescribed_medications[str(i)] = {
+                        "med_name": med_name,
+                        "diagnosis": dic.get("diagnosis"),
+                    }
+            out["med_name"] = med_name_upper
+            out["prescribed_medications"] = prescribed_medications
+            data["health_history"] = out
+    
+    if 'hhd_information' not in data:
+        formatted_data['hhd_information'] = {
+            "household_resident": False,
+            "household_resident_has_carrier": False
+        }
+    
+
+    return formatted_data
+
+def format_allstate_application(application_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Format application data specifically for Allstate."""
+    producer_config = load_producer_config()
+    
+    data = parse_json_data(application_data.get("data"))
+    applicant_info = data.get("applicant_info", {})
+    medicare_info = data.get("medicare_information", {})
+    payment_info = data.get("payment", {})
+
+    # Add zip code lookup
+    address_city, address_state = lookup_zip(applicant_info.get("zip5"))
+
+    formatted_data = {
+        "applicant_info": {
+            **applicant_info,
+            "address_city": address_city,
+            "address_state": address_state,
+            "poa": True,
+            "applicant_phone": format_phone_number(applicant_info.get("applicant_phone")),
+            "tobacco_usage": applicant_info.get("tobacco_usage") or applicant_info.get("tobacco") or False
+        },
+        "medicare_information": {
+            "medicare_information_claim_number": medicare_info.get("medicareNumber"),
+            "medicare_information_ssn": medicare_info.get("max_ssn"),
+            "medicare_part_a_coverage": True if medicare_info.get("medicare_part_a") else False,
+            "medicare_part_b_coverage": True if medicare_info.get("medicare_part_b") else False,
+            "medicare_part_a_eff_date": format_date(medicare_info.get("medicare_part_a")),
+            "medicare_part_b_eff_date": format_date(medicare_info.get("medicare_part_b")),
+            "enroll_part_b_last_6_mo": calculate_medicare_dates(
+                applicant_info.get("applicant_dob"),
+                applicant_info.get("effective_date"),
+                medicare_info.get("medicare_part_a"),
+                medicare_info.get("medicare_part_b")
+            )["part_b_six_months"],
+            "did_turn_65_in_last_six_mo": calculate_medicare_dates(
+                applicant_info.get("applicant_dob"),
+                applicant_info.get("effective_date"),
+                medicare_info.get("medicare_part_a"),
+                medicare_info.get("medicare_part_b")
+            )["t65_six_months"],
+            "disabled_esrd": False,
+            "received_outline": True,
+            "apply_guaranteed_issue": False
+        },
+        "producer": {
+            "producer_first_name": producer_config.get("first_name"),
+            "producer_last_name": producer_config.get("last_name"),
+            "producer_phone": format_phone_number(producer_config.get("phone")),
+            "producer_email": producer_config.get("email"),
+            "producer_writing_number": producer_config.get("writing_numbers", {}).get("allstate"),
+            "sale": "internet",
+            "other_sale_type_description": "",
+            "has_other_inforce_policies": False,
+            "deliver_policy_to": "applicant",
+            "additional_witness": False,
+            "agent_related": False,
+            "agent_reviewed": True,
+            "applicant_reviewed": True,
+            "replacement_notice_copy": True
+        },
+        "payment": payment_info
+    }
+    formatted_data["payment"]["payment_mode"] = "monthly"
+
+    if "hhd_information" not in data:
+        formatted_data["hhd_information"] = {"hhd": False}
+    else:
+        formatted_data["hhd_information"] = data["hhd_information"]
+    formatted_data["hhd_information"]["activity_tracker"] = False
+    formatted_data["hhd_information"]["activity_tacker"] = False
+ 
+    if "medication_information" in data:
+        out = copy.deepcopy(data["medication_information"])
+        prescription_drug_list = out.pop("prescription_drug_list", [])
+        if prescription_drug_list:
+            prescribed_medications = {}
+            med_name_upper = ""
+            dosage_upper = ""
+            for i,dic in enumerate(prescription_drug_list):
+                full_name = dic.get("drug", {}).get("drugName")
+                if full_name:
+                    # Split on uppercase word (SOL, TAB, etc)
+                    parts = full_name.split()
+                    print(f"parts: {parts}")
+                    med_name = []
+                    dosage = []
+                    found_upper = False
+                    
+                    for part in parts:
+                        if not found_upper and part.isupper():
+                            found_upper = True
+                        elif found_upper:
+                            # Include all remaining parts in dosage
+                            dosage.append(part)
+                        else:
+                            med_name.append(part)
+                            
+                    med_name = " ".join(med_name)
+                    dosage = " ".join(dosage)
+                else:
+                    med_name = ""
+                    dosage = ""
+                dosage = dosage.replace("/", ";")
+                d = {
+                    "med_name": med_name,
+                    "diagnosis": dic.get("diagnosis"),
+                    "dosage": dosage,
+                    "frequency": dic.get("frequency"),
+                    "prescription_freq_other": dic.get("quantity"),
+                    "using": True,
+                }
+                prescribed_medications[str(i)] = d 
+                med_name_upper = med_name
+                dosage_upper = dosage
+            out["med_name"] = med_name_upper
+            out["dosage"] = dosage_upper
+            out["prescribed_medications"] = prescribed_medications
+            data["medication_information"] = out
+
+    # Handle tobacco_last_date removal after the dictionary definition
+    if (not applicant_info.get("tobacco_usage") and 
+        "tobacco_last_date" in applicant_info and 
+        "tobacco_last_date" in formatted_data["applicant_info"]):
+        del formatted_data["applicant_info"]["tobacco_last_date"]
+
+    return formatted_data
+
+def format_uhc_application(application_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Format application data specifically for UnitedHealthcare."""
+    producer_config = load_producer_config()
+    
+    data = parse_json_data(application_data.get("data"))
+    applicant_info = data.get("applicant_info", {})
+    medicare_info = data.get("medicare_information", {})
+    payment_info = data.get("payment", {})
+    payment_info["eft_confirm"] = "ongoing"
+    
+    medicare_dates = calculate_medicare_dates(
+        applicant_info.get("applicant_dob"),
+        applicant_info.get("effective_date"),
+        medicare_info.get("medicare_part_a"),
+        medicare_info.get("medicare_part_b")
+    )
+
+    address_city, address_state = lookup_zip(applicant_info.get("zip5"))
+
+    formatted_data = {
+        "applicant_info": {
+            **applicant_info,
+            "poa": True,
+            "enroll_kit": True,
+            "applicant_plan": applicant_info.get("plan") or applicant_info.get("applicant_plan"),
+            "effective_date": format_date(applicant_info.get("effective_date")),
+            "applicant_phone": format_phone_number(applicant_info.get("applicant_phone") or applicant_info.get("phone")),
+            "applicant_dob": format_date(applicant_info.get("applicant_dob")),
+            "tobacco_usage": applicant_info.get("tobacco_usage") or applicant_info.get("tobacco") or False,
+            "address_city": address_city,
+            "address_state": address_state,
+        },
+        "medicare_information": {
+            "medicare_information_claim_number": medicare_info.get("medicareNumber"),
+            "medicare_information_ssn": medicare_info.get("max_ssn"),
+            "medicare_part_a_coverage": True if medicare_info.get("medicare_part_a") else False,
+            "medicare_part_b_coverage": True if medicare_info.get("medicare_part_b") else False,
+            "medicare_part_a_eff_date": format_date(medicare_info.get("medicare_part_a")),
+            "medicare_part_b_eff_date": format_date(medicare_info.get("medicare_part_b")),
+            "enroll_part_b_last_6_mo": medicare_dates["part_b_six_months"],
+            "did_turn_65_in_last_six_mo": medicare_dates["t65_six_months"],
+            "apply_guaranteed_issue": False,
+            "medicare_active": True
+        },
+        "producer": {
+            "agent_first_name": producer_config.get("first_name"),
+            "agent_last_name": producer_config.get("last_name"),
+            "producer_phone": format_phone_number(producer_config.get("phone")),
+            "producer_email": producer_config.get("email"),
+            "producer_writing_number": producer_config.get("writing_numbers", {}).get("uhc"),
+            "policy_delivery_type": "Mail"
+        },
+        "plan_documents": {
+            "policy_delivery_type": "Mail"
+        },
+        "payment": payment_info
+    }
+
+    
+    return formatted_data
@@ -0,0 +1,368 @@
+"""
+Per-carrier benchmark suite for the formatting pipeline.
+
+Times the stages of GET /api/applications/{id}/formatted separately, on
+synthetic applications (synthetic.py) for every carrier, Medicare status
+and medication list size:
+
+    format_application  carrier formatter plus existing coverage and payment
+    get_naic_code       existing-carrier lookup, cold and warm matcher cache
+    decode_values       URL decoding of the raw application data
+    route_postprocess   build_formatted_response around a precomputed format
+
+The bank-name lookup is stubbed, so nothing touches the network. Each case
+is calibrated to run for at least --min-time per round (like timeit) and
+reports per-call statistics over --rounds rounds. Results print as JSON
+lines and --output saves them, with the commit, Python and JSON codec they
+were measured on, for --compare:
+
+    python benchmarks/suite.py --output base.json
+    python benchmarks/suite.py --output new.json --filter format_application
+    python benchmarks/suite.py --compare base.json new.json --threshold 0.1
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import statistics
+import subprocess
+import logging
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_codec
+import application_formatter
+import routes.formatter_routes as formatter_routes
+from normalize import normalize_input
+from reference_data import naic_companies
+from synthetic import CARRIER_NAICS, MEDICARE_STATUSES, MEDICATION_SIZES, EXISTING_CARRIERS, generate_application
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAX_NUMBER = 100_000
+
+
+async def stub_lookup_routing_number(routing_number: str) -> dict:
+    return {"code": 200, "name": "Synthetic Bank", "routing_number": routing_number}
+
+
+def formatter_input(application: dict) -> dict:
+    """application as format_application receives it from the route."""
+    return {**application, "data": normalize_input(application["data"])}
+
+
+def fresh(application: dict) -> dict:
+    """
+    A copy format_application can consume. Formatters replace the
+    medication sections (see overlay.py) but some write into others in
+    place (UnitedHealthcare and Allstate into payment, Allstate into
+    hhd_information), so each section of data is copied as well; check()
+    verifies the source is left as it was.
+    """
+    return {
+        **application,
+        "data": {
+            key: dict(section) if isinstance(section, dict) else section
+            for key, section in application["data"].items()
+        },
+    }
+
+
+def case_id(benchmark: str, params: dict) -> str:
+    return f"{benchmark}[{','.join(f'{key}={value}' for key, value in params.items())}]"
+
+
+def case(benchmark: str, params: dict, call, setup, is_async: bool = False, source=None) -> dict:
+    """
+    One benchmark case: setup(number) returns the arguments for `number`
+    calls, prepared outside the timed region, and call(argument) is timed.
+    source is the input setup copies from, if any.
+    """
+    return {
+        "id": case_id(benchmark, params),
+        "benchmark": benchmark,
+        "params": params,
+        "call": call,
+        "setup": setup,
+        "async": is_async,
+        "source": source,
+    }
+
+
+def format_application_cases(rng: random.Random) -> list:
+    cases = []
+    for carrier in CARRIER_NAICS:
+        for medicare_status in MEDICARE_STATUSES:
+            for size, count in MEDICATION_SIZES.items():
+                application = formatter_input(generate_application(rng, len(cases), carrier, medicare_status, count))
+
+                async def call(application, carrier=carrier):
+                    return await application_formatter.format_application(application, carrier)
+
+                cases.append(case(
+                    "format_application",
+                    {"carrier": carrier, "medicare_status": medicare_status, "medications": size},
+                    call,
+                    lambda number, application=application: [fresh(application) for _ in range(number)],
+                    is_async=True,
+                    source=application,
+                ))
+    return cases
+
+
+def get_naic_code_cases(rng: random.Random) -> list:
+    companies = naic_companies.get().companies
+    queries = {
+        "exact": [company["name_full"] for company in rng.sample(companies, min(20, len(companies)))],
+        "fuzzy": EXISTING_CARRIERS,
+        "unknown": ["Acme Widget Holdings", "No Such Carrier", "Zzyzx Mutual"],
+    }
+    cases = []
+    for kind, names in queries.items():
+        def cycle(number, names=names):
+            return [names[i % len(names)] for i in range(number)]
+
+        def cold(company):
+            naic_companies.get().clear_cache()
+            return application_formatter.get_naic_code(company)
+
+        def warm_setup(number, names=names):
+            for name in names:
+                application_formatter.get_naic_code(name)
+            return cycle(number)
+
+        cases.append(case("get_naic_code", {"query": kind, "cache": "cold"}, cold, cycle))
+        cases.append(case("get_naic_code", {"query": kind, "cache": "warm"}, application_formatter.get_naic_code, warm_setup))
+    return cases
+
+
+def decode_values_cases(rng: random.Random) -> list:
+    cases = []
+    for size, count in MEDICATION_SIZES.items():
+        data = generate_application(rng, len(cases), "Aetna", "supplemental-plan", count)["data"]
+        cases.append(case(
+            "decode_values",
+            {"medications": size},
+            formatter_routes.decode_values,
+            lambda number, data=data: [data] * number,
+        ))
+    return cases
+
+
+# Formatted output for route_postprocess, by application id
+PRECOMPUTED = {}
+
+
+async def precomputed_format_application(application, carrier, context=None):
+    # build_formatted_response only adds and removes top-level sections
+    return dict(PRECOMPUTED[application["id"]])
+
+
+def route_postprocess_cases(rng: random.Random) -> list:
+    cases = []
+    for carrier in CARRIER_NAICS:
+        for size, count in MEDICATION_SIZES.items():
+            for skip in (False, True):
+                application = generate_application(rng, len(cases), carrier, "supplemental-plan", count)
+                application["id"] = f"route-{len(cases)}"
+                PRECOMPUTED[application["id"]] = asyncio.run(
+                    application_formatter.format_application(formatter_input(application), carrier)
+                )
+
+                async def call(application, skip=skip):
+                    return await formatter_routes.build_formatted_response(
+                        application, application["id"], skip_medication=skip, skip_producer=skip
+                    )
+
+                cases.append(case(
+                    "route_postprocess",
+                    {"carrier": carrier, "medications": size, "skip": skip},
+                    call,
+                    lambda number, application=application: [dict(application) for _ in range(number)],
+                    is_async=True,
+                ))
+    return cases
+
+
+def all_cases(seed: int) -> list:
+    rng = random.Random(seed)
+    return (
+        format_application_cases(rng)
+        + get_naic_code_cases(rng)
+        + decode_values_cases(rng)
+        + route_postprocess_cases(rng)
+    )
+
+
+def check(cases: list) -> int:
+    """
+    Cases whose call changes the input setup copies from, or gives
+    different results on setup's copies and on a deep copy of that input.
+    """
+    mismatches = 0
+    for bench in cases:
+        if bench["benchmark"] != "format_application":
+            continue
+        source = bench["source"]
+        before = copy.deepcopy(source)
+        application, other = bench["setup"](2)
+        first = asyncio.run(bench["call"](application))
+        # Formatting the first copy must have left the source as it was
+        unchanged = source == before
+        again = asyncio.run(bench["call"](other))
+        deep = asyncio.run(bench["call"](copy.deepcopy(before)))
+        mismatches += not (unchanged and first == again == deep)
+    return mismatches
+
+
+async def _drive(call, arguments) -> float:
+    started = time.perf_counter()
+    for argument in arguments:
+        await call(argument)
+    return time.perf_counter() - started
+
+
+def run_batch(loop, bench: dict, number: int) -> float:
+    """Seconds for `number` calls."""
+    arguments = bench["setup"](number)
+    call = bench["call"]
+    if bench["async"]:
+        return loop.run_until_complete(_drive(call, arguments))
+    started = time.perf_counter()
+    for argument in arguments:
+        call(argument)
+    return time.perf_counter() - started
+
+
+def time_case(loop, bench: dict, rounds: int, min_time: float) -> dict:
+    number = 1
+    while True:
+        elapsed = run_batch(loop, bench, number)
+        if elapsed >= min_time or number >= MAX_NUMBER:
+            break
+        number = min(MAX_NUMBER, number * 2 if elapsed <= 0 else max(number * 2, int(number * min_time / elapsed * 1.2)))
+    per_call_us = [run_batch(loop, bench, number) / number * 1e6 for _ in range(rounds)]
+    return {
+        "id": bench["id"],
+        "benchmark": bench["benchmark"],
+        "params": bench["params"],
+        "number": number,
+        "rounds": rounds,
+        "mean_us": round(statistics.mean(per_call_us), 3),
+        "median_us": round(statistics.median(per_call_us), 3),
+        "min_us": round(min(per_call_us), 3),
+        "stdev_us": round(statistics.stdev(per_call_us), 3) if rounds > 1 else 0.0,
+    }
+
+
+def git_commit() -> str:
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def metadata(args) -> dict:
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "json_codec": json_codec.BACKEND,
+        "seed": args.seed,
+        "rounds": args.rounds,
+        "min_time": args.min_time,
+    }
+
+
+def compare(base_path: str, new_path: str, threshold: float) -> int:
+    """Print median ratios new/base per case; the number of regressions beyond threshold."""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    base_results = {result["id"]: result for result in base["results"]}
+    regressions = improvements = 0
+    for result in new["results"]:
+        before = base_results.get(result["id"])
+        if before is None:
+            continue
+        ratio = result["median_us"] / before["median_us"] if before["median_us"] else float("inf")
+        if ratio > 1 + threshold:
+            status = "slower"
+            regressions += 1
+        elif ratio < 1 - threshold:
+            status = "faster"
+            improvements += 1
+        else:
+            status = "same"
+        print(json.dumps({
+            "id": result["id"],
+            "base_us": before["median_us"],
+            "new_us": result["median_us"],
+            "ratio": round(ratio, 3),
+            "status": status,
+        }))
+    print(json.dumps({
+        "base_commit": base["meta"].get("commit"),
+        "new_commit": new["meta"].get("commit"),
+        "compared": sum(result["id"] in base_results for result in new["results"]),
+        "slower": regressions,
+        "faster": improvements,
+        "threshold": threshold,
+    }))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", help="save results as JSON to this path")
+    parser.add_argument("--filter", default="", help="only run cases whose id contains this")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per round")
+    parser.add_argument("--quick", action="store_true", help="3 rounds of 10ms, for a smoke run")
+    parser.add_argument("--seed", type=int, default=25)
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two saved runs")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change --compare reports")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+    if args.quick:
+        args.rounds, args.min_time = 3, 0.01
+
+    logging.disable(logging.CRITICAL)
+    application_formatter.lookup_routing_number = stub_lookup_routing_number
+    formatter_routes.format_application = precomputed_format_application
+
+    cases = [bench for bench in all_cases(args.seed) if args.filter in bench["id"]]
+    mismatches = check(cases)
+    print(json.dumps({"cases": len(cases), "json_codec": json_codec.BACKEND, "mismatches": mismatches}))
+
+    loop = asyncio.new_event_loop()
+    results = []
+    try:
+        for bench in cases:
+            result = time_case(loop, bench, args.rounds, args.min_time)
+            results.append(result)
+            print(json.dumps(result))
+    finally:
+        loop.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": metadata(args), "results": results}, f, indent=2)
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Synthetic applications for the benchmark suite, shaped like rows loaded by
+row_to_application: URL-encoded data, the carrier's NAIC and onboarding
+answers. Unlike bench_formatters.sample_application every application is
+valid (parseable dates, known ZIP), so each one exercises the full
+formatting path of its carrier, Medicare status and medication list size.
+
+    python benchmarks/synthetic.py --carrier Aetna --medicare-status no-plan --medications large
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_medications import VOCABULARY
+
+CARRIER_NAICS = {
+    "UnitedHealthcare": "79413",
+    "Aetna": "78700",
+    "Allstate": "60380",
+    "Chubb": "20699",
+}
+
+MEDICARE_STATUSES = ("advantage-plan", "supplemental-plan", "no-plan")
+
+# Drugs per medication list
+MEDICATION_SIZES = {"none": 0, "small": 3, "large": 50, "huge": 500}
+
+EXISTING_CARRIERS = [
+    "Mutual of Omaha", "Humana", "Cigna Health and Life", "Blue Cross Blue Shield of Kansas City",
+    "Aflac", "Transamerica", "Medico", "Anthem Blue Cross",
+]
+
+
+def _encoded(value: str) -> str:
+    """value as the application form stores free text."""
+    return quote(value, safe="")
+
+
+def medication_list(rng: random.Random, count: int) -> list:
+    return [
+        {
+            "drug": {"drugName": rng.choice(VOCABULARY)},
+            "diagnosis": _encoded(rng.choice(["High blood pressure", "Type 2 diabetes", "Cholesterol"])),
+            "frequency": "daily",
+            "quantity": str(rng.choice([30, 60, 90])),
+        }
+        for _ in range(count)
+    ]
+
+
+def existing_coverage(rng: random.Random, medicare_status: str) -> dict:
+    """The existing_coverage answers the onboarding flow collects for medicare_status."""
+    coverage = {"state_covered_medical_assistance": False, "medicaid_pay_premiums": rng.random() < 0.2}
+    if medicare_status == "advantage-plan":
+        coverage.update({
+            "advantage_company": _encoded(rng.choice(EXISTING_CARRIERS)),
+            "advantage_start_date": "2022-01-01",
+        })
+    elif medicare_status == "supplemental-plan":
+        coverage.update({
+            "supplemental_company": _encoded(rng.choice(EXISTING_CARRIERS)),
+            "supplemental_start_date": "2021-07-01",
+            "supplemental_other_ms_carrier_product_code": rng.choice(["F", "G", "N", "C"]),
+        })
+    else:
+        coverage.update({
+            "other_insurance": rng.random() < 0.5,
+            "other_insurance_coverage_active": True,
+            "other_insurance_start_date": "2015-03-01",
+            "other_insurance_company": _encoded(rng.choice(EXISTING_CARRIERS)),
+            "other_insurance_plan_type": rng.choice(["Employer", "COBRA", None]),
+        })
+    return coverage
+
+
+def generate_application(
+    rng: random.Random,
+    i: int,
+    carrier: str,
+    medicare_status: str,
+    medications: int,
+) -> dict:
+    """One application for carrier with `medications` drugs on each medication section."""
+    drugs = medication_list(rng, medications)
+    data = {
+        "applicant_info": {
+            "f_name": _encoded(rng.choice(["Mary Ann", "José", "John"])),
+            "l_name": _encoded(f"O'Neil {i}"),
+            "zip5": rng.choice(["66210", "64111", "01001"]),
+            "applicant_dob": f"1959-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00Z",
+            "effective_date": "2024-07-01",
+            "gender": rng.choice(["M", "F"]),
+            "applicant_plan": rng.choice(["G", "N"]),
+            "address_line1": _encoded(f"{rng.randint(1, 9999)} Main St, Apt #{rng.randint(1, 40)}"),
+            "applicant_phone": "8165551234",
+            "height": str(rng.randint(60, 76)),
+            "weight": str(rng.randint(120, 260)),
+            "tobacco_usage": rng.random() < 0.2,
+        },
+        "medicare_information": {
+            "medicareNumber": "1EG4TE5MK72",
+            "max_ssn": "123456789",
+            "medicare_part_a": "2024-03-01T00:00:00Z",
+            "medicare_part_b": "2024-06-01",
+        },
+        "payment": {
+            "eft_routing_number": "021000021",
+            "eft_account_number": str(rng.randint(10 ** 7, 10 ** 9)),
+            "eft_financial_institution_name": "",
+        },
+        "hhd_information": {"hhd": rng.random() < 0.5},
+        "physician_information": {"name": _encoded("Dr. Smith & Associates")},
+        "existing_coverage": existing_coverage(rng, medicare_status),
+        "health_history": {"q1": False, "q2": False, "prescription_drug_list": drugs},
+        "medication_information": {"q1": False, "prescription_drug_list": [dict(drug) for drug in drugs]},
+        "notes": {"comment": _encoded("Called 3/4, prefers email & text")},
+    }
+    return {
+        "id": f"app-{i}",
+        "data": data,
+        "naic": CARRIER_NAICS[carrier],
+        "email": f"applicant{i}@example.com",
+        "status": "submitted",
+        "onboarding_data": {"medicare_status": medicare_status},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--carrier", choices=sorted(CARRIER_NAICS), default="Aetna")
+    parser.add_argument("--medicare-status", choices=MEDICARE_STATUSES, default="supplemental-plan")
+    parser.add_argument("--medications", choices=list(MEDICATION_SIZES), default="small")
+    parser.add_argument("--seed", type=int, default=25)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    application = generate_application(rng, 0, args.carrier, args.medicare_status, MEDICATION_SIZES[args.medications])
+    print(json.dumps(application, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded LRU cache whose entries expire after ttl seconds.
+
+    A ttl of None disables expiry; a ttl or maxsize of 0 disables the cache.
+
+    generation counts invalidate() calls. A caller that computes a value
+    while a write may invalidate the cache reads it first and passes it to
+    set(), which then drops the value if an invalidation happened meanwhile.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._skipped = 0
+
+    @property
+    def generation(self) -> int:
+        return self._invalidations
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._data[key]
+            self._misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """Store value, unless generation is given and the cache was invalidated since."""
+        if self.maxsize <= 0 or (self.ttl is not None and self.ttl <= 0):
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if generation is not None and generation != self._invalidations:
+                self._skipped += 1
+                return
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Drop every entry, or only those whose key matches predicate."""
+        with self._lock:
+            if predicate is None:
+                keys = list(self._data)
+            else:
+                keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            self._invalidations += 1
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else None,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "stale_sets_skipped": self._skipped,
+            }
@@ -1,19 +1,573 @@
 import os
+import re
+import time
+import logging
+import contextvars
+import asyncio
+import sqlite3
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 import libsql_experimental as libsql
-import asyncio
 
 # Load environment variables from .env
 load_dotenv()
 
-# Create the connection
+logger = logging.getLogger(__name__)
+
+# Backend: "remote" (Turso primary), "replica" (libsql embedded replica synced
+# from the primary) or "sqlite" (plain local file)
+DB_BACKEND = os.getenv("DB_BACKEND", "remote").lower()
+DB_REPLICA_PATH = os.getenv("DB_REPLICA_PATH", "replica.db")
+DB_REPLICA_SYNC_INTERVAL = float(os.getenv("DB_REPLICA_SYNC_INTERVAL", "60"))
+DB_SQLITE_PATH = os.getenv("DB_SQLITE_PATH", "local.db")
+
+# Pool configuration
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_POOL_IDLE_TIMEOUT = float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300"))
+DB_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "30"))
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "10"))
+
+# Executor configuration: worker threads, how many more calls may queue behind
+# them, and how long a caller waits for a queue slot (0 = fail fast)
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", str(DB_POOL_SIZE)))
+DB_EXECUTOR_QUEUE_SIZE = int(os.getenv("DB_EXECUTOR_QUEUE_SIZE", "100"))
+DB_EXECUTOR_QUEUE_TIMEOUT = float(os.getenv("DB_EXECUTOR_QUEUE_TIMEOUT", "0"))
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the acquire timeout."""
+
+
+class DatabaseBusyError(Exception):
+    """Raised when the database executor queue is saturated; surfaced as HTTP 503."""
+
+
+class PooledConnection:
+    """A libsql connection plus the bookkeeping the pool needs."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of long-lived database connections.
+
+    Connections are created lazily up to max_size, health-checked when they
+    have been idle longer than health_check_interval, reconnected when a
+    health check or query fails, and closed once idle for idle_timeout.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        max_size: int = DB_POOL_SIZE,
+        idle_timeout: float = DB_POOL_IDLE_TIMEOUT,
+        health_check_interval: float = DB_POOL_HEALTH_CHECK_INTERVAL,
+        acquire_timeout: float = DB_POOL_ACQUIRE_TIMEOUT,
+    ):
+        self._connect = connect
+        self.max_size = max(1, max_size)
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+
+        self._idle: List[PooledConnection] = []
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        # Counters exposed through stats()
+        self._created = 0
+        self._discarded = 0
+        self._reaped = 0
+        self._errors = 0
+        self._timeouts = 0
+        self._acquired = 0
+
+    def _open(self) -> PooledConnection:
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._errors += 1
+            raise
+        with self._cond:
+            self._created += 1
+        return PooledConnection(conn)
+
+    def _close_quietly(self, pooled: PooledConnection) -> None:
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, pooled: PooledConnection) -> bool:
+        try:
+            pooled.conn.execute("SELECT 1").fetchall()
+            return True
+        except Exception:
+            return False
+
+    def acquire(self) -> PooledConnection:
+        """Borrow a connection, waiting up to acquire_timeout for one to free up."""
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._in_use < self.max_size:
+                    pooled = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Timed out after {self.acquire_timeout}s waiting for a database connection"
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            self._in_use += 1
+            self._acquired += 1
+
+        try:
+            if pooled is not None and time.monotonic() - pooled.last_used_at > self.health_check_interval:
+                if not self._is_healthy(pooled):
+                    # Stale connection (e.g. dropped by the server): reconnect
+                    self._close_quietly(pooled)
+                    with self._cond:
+                        self._discarded += 1
+                        self._errors += 1
+                    pooled = None
+            if pooled is None:
+                pooled = self._open()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return pooled
+
+    def release(self, pooled: PooledConnection, discard: bool = False) -> None:
+        """Return a borrowed connection, or close it if it is no longer usable."""
+        pooled.last_used_at = time.monotonic()
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._discarded += 1
+            else:
+                self._idle.append(pooled)
+                pooled = None
+            self._cond.notify()
+        if pooled is not None:
+            self._close_quietly(pooled)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with-block."""
+        pooled = self.acquire()
+        try:
+            yield pooled.conn
+        except Exception:
+            with self._cond:
+                self._errors += 1
+            # A failed query may just be bad SQL; only drop the connection if it is broken
+            try:
+                pooled.conn.rollback()
+            except Exception:
+                pass
+            self.release(pooled, discard=not self._is_healthy(pooled))
+            raise
+        else:
+            self.release(pooled)
+
+    def reap_idle(self) -> int:
+        """Close connections that have sat idle longer than idle_timeout."""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._cond:
+            expired = [p for p in self._idle if p.last_used_at < cutoff]
+            self._idle = [p for p in self._idle if p.last_used_at >= cutoff]
+            self._reaped += len(expired)
+        for pooled in expired:
+            self._close_quietly(pooled)
+        return len(expired)
+
+    def close(self) -> None:
+        """Close all idle connections; borrowed ones are closed when released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for pooled in idle:
+            self._close_quietly(pooled)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "size": self._in_use + len(self._idle),
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "created": self._created,
+                "discarded": self._discarded,
+                "reaped": self._reaped,
+                "acquired": self._acquired,
+                "timeouts": self._timeouts,
+                "errors": self._errors,
+            }
+
+
+class DatabaseExecutor:
+    """
+    Dedicated thread pool for blocking database calls.
+
+    At most max_workers calls run at once and at most max_queue more may wait
+    behind them. Further submissions wait up to queue_timeout seconds for a
+    slot (backpressure) and then fail with DatabaseBusyError.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DB_EXECUTOR_WORKERS,
+        max_queue: int = DB_EXECUTOR_QUEUE_SIZE,
+        queue_timeout: float = DB_EXECUTOR_QUEUE_TIMEOUT,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="db")
+        self._slots = asyncio.Semaphore(self.max_workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _call(self, fn, *args, **kwargs):
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    async def _acquire_slot(self) -> None:
+        if self._slots.locked() and self.queue_timeout <= 0:
+            raise DatabaseBusyError("Database is busy, please retry shortly")
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout or None)
+        except asyncio.TimeoutError:
+            raise DatabaseBusyError("Database is busy, please retry shortly")
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run a blocking callable on the executor and await its result."""
+        try:
+            await self._acquire_slot()
+        except DatabaseBusyError:
+            with self._lock:
+                self._rejected += 1
+            raise
+        with self._lock:
+            self._pending += 1
+            self._submitted += 1
+        try:
+            loop = asyncio.get_running_loop()
+            # Run in the caller's context so log records keep its request id
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(context.run, self._call, fn, *args, **kwargs)
+            )
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": max(self._pending - self._running, 0),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+
+class DatabaseBackend:
+    """
+    Remote backend: every query goes over the network to the Turso primary.
+
+    Backends decide which pool serves reads and which serves writes, and get
+    a hook after each write. Subclasses cover local deployments.
+    """
+
+    name = "remote"
+
+    def __init__(self):
+        self.write_pool = ConnectionPool(self._connect_primary)
+        self.read_pool = self.write_pool
+
+    def _connect_primary(self):
+        return libsql.connect(
+            os.getenv("TURSO_DATABASE_URL"),
+            auth_token=os.getenv("TURSO_AUTH_TOKEN"),
+            check_same_thread=False,
+        )
+
+    def pools(self) -> Dict[str, ConnectionPool]:
+        return {"primary": self.write_pool}
+
+    def after_write(self) -> None:
+        pass
 
-# Updated function to execute queries asynchronously
+    def close(self) -> None:
+        for pool in self.pools().values():
+            pool.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, **{name: pool.stats() for name, pool in self.pools().items()}}
+
+
+class ReplicaBackend(DatabaseBackend):
+    """
+    libsql embedded replica: reads are served from a local file that is
+    synced from the primary; writes go to the primary, after which the
+    replica is synced so callers read their own writes.
+    """
+
+    name = "replica"
+
+    def __init__(self):
+        super().__init__()
+        self.path = DB_REPLICA_PATH
+        self.read_pool = ConnectionPool(self._connect_local)
+        self._sync_lock = threading.Lock()
+        self._syncs = 0
+        self._sync_errors = 0
+        self._last_sync_at: Optional[float] = None
+        # The replica connection owns the local file and pulls frames from the primary
+        self._replica = libsql.connect(
+            self.path,
+            sync_url=os.getenv("TURSO_DATABASE_URL"),
+            auth_token=os.getenv("TURSO_AUTH_TOKEN"),
+            sync_interval=DB_REPLICA_SYNC_INTERVAL or None,
+            check_same_thread=False,
+        )
+        self.sync()
+
+    def _connect_local(self):
+        return libsql.connect(self.path, check_same_thread=False)
+
+    def pools(self) -> Dict[str, ConnectionPool]:
+        return {"replica": self.read_pool, "primary": self.write_pool}
+
+    def sync(self) -> None:
+        with self._sync_lock:
+            try:
+                self._replica.sync()
+                self._syncs += 1
+                self._last_sync_at = time.time()
+            except Exception as e:
+                self._sync_errors += 1
+                logger.warning("Replica sync error: %s", e)
+
+    def after_write(self) -> None:
+        self.sync()
+
+    def close(self) -> None:
+        super().close()
+        try:
+            self._replica.close()
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["sync"] = {
+            "path": self.path,
+            "syncs": self._syncs,
+            "errors": self._sync_errors,
+            "last_sync_at": self._last_sync_at,
+        }
+        return stats
+
+
+class SQLiteBackend(DatabaseBackend):
+    """Plain local SQLite file, for on-prem deployments and benchmarking."""
+
+    name = "sqlite"
+
+    def __init__(self):
+        self.path = DB_SQLITE_PATH
+        self.write_pool = ConnectionPool(self._connect_local)
+        self.read_pool = self.write_pool
+
+    def _connect_local(self):
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def pools(self) -> Dict[str, ConnectionPool]:
+        return {"local": self.write_pool}
+
+
+BACKENDS = {
+    "remote": DatabaseBackend,
+    "replica": ReplicaBackend,
+    "sqlite": SQLiteBackend,
+}
+
+_backend: Optional[DatabaseBackend] = None
+_backend_lock = threading.Lock()
+
+def init_backend() -> DatabaseBackend:
+    """Create the process-wide database backend and its pools (called from the app lifespan)."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            backend_class = BACKENDS.get(DB_BACKEND)
+            if backend_class is None:
+                raise ValueError(f"Unknown DB_BACKEND {DB_BACKEND!r}; expected one of {', '.join(BACKENDS)}")
+            _backend = backend_class()
+        return _backend
+
+def get_backend() -> DatabaseBackend:
+    """Return the backend, creating it on first use outside the app lifespan."""
+    return _backend or init_backend()
+
+def close_backend() -> None:
+    global _backend
+    with _backend_lock:
+        backend, _backend = _backend, None
+    if backend is not None:
+        backend.close()
+
+def pool_stats() -> Dict[str, Any]:
+    return _backend.stats() if _backend is not None else {}
+
+_executor: Optional[DatabaseExecutor] = None
+
+def init_executor() -> DatabaseExecutor:
+    """Create the process-wide database executor (called from the app lifespan)."""
+    global _executor
+    with _backend_lock:
+        if _executor is None:
+            _executor = DatabaseExecutor()
+        return _executor
+
+def get_executor() -> DatabaseExecutor:
+    return _executor or init_executor()
+
+def close_executor() -> None:
+    global _executor
+    with _backend_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
+
+def executor_stats() -> Dict[str, Any]:
+    return _executor.stats() if _executor is not None else {}
+
+async def run_pool_reaper(interval: Optional[float] = None) -> None:
+    """Periodically close idle connections; runs for the lifetime of the app."""
+    interval = interval or max(DB_POOL_IDLE_TIMEOUT / 2, 1)
+    while True:
+        await asyncio.sleep(interval)
+        if _backend is not None:
+            for pool in _backend.pools().values():
+                pool.reap_idle()
+
+# String literals, quoted identifiers, comments, parentheses and words
+_SQL_TOKEN = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\]|--[^\n]*|/\*.*?\*/|([()])|(\w+)""", re.S)
+_STATEMENT_KEYWORDS = ("SELECT", "VALUES", "INSERT", "REPLACE", "UPDATE", "DELETE")
+
+def _statement_after_ctes(query: str) -> Optional[str]:
+    """The statement a WITH clause leads into: the first keyword outside the CTE bodies."""
+    depth = 0
+    for match in _SQL_TOKEN.finditer(query):
+        paren, word = match.groups()
+        if paren:
+            depth += 1 if paren == "(" else -1
+        elif word and depth == 0 and word.upper() in _STATEMENT_KEYWORDS:
+            return word.upper()
+    return None
+
+def is_read_query(query: str) -> bool:
+    """Whether a statement only reads, and so may be served by a replica."""
+    words = query.lstrip().split(None, 1)
+    if not words:
+        return False
+    keyword = words[0].upper()
+    if keyword == "WITH":
+        return _statement_after_ctes(words[1] if len(words) > 1 else "") in ("SELECT", "VALUES")
+    return keyword in ("SELECT", "EXPLAIN")
+
+def _execute_sync(query: str, params: tuple = ()):
+    backend = get_backend()
+    is_read = is_read_query(query)
+    with (backend.read_pool if is_read else backend.write_pool).connection() as conn:
+        result = conn.execute(query, params)
+        rows = result.fetchall()
+        # Don't hand a connection with an open transaction back to the pool
+        if conn.in_transaction:
+            conn.commit()
+    if not is_read:
+        backend.after_write()
+    return rows
+
+def _execute_transaction_sync(statements: List[Tuple[str, tuple]], sync_replica: bool = True):
+    backend = get_backend()
+    with backend.write_pool.connection() as conn:
+        conn.execute("BEGIN")
+        try:
+            for query, params in statements:
+                conn.execute(query, params)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    if sync_replica:
+        backend.after_write()
+
+# Execute a query on a pooled connection without blocking the event loop
 async def execute_query(query: str, params: tuple = ()):
-    conn = libsql.connect(os.getenv("TURSO_DATABASE_URL"), auth_token=os.getenv("TURSO_AUTH_TOKEN"))
     try:
-        result = conn.execute(query, params)
-        return result.fetchall()
+        return await get_executor().run(_execute_sync, query, params)
+    except DatabaseBusyError:
+        raise
+    except Exception as e:
+        logger.error("Database error: %s", e)
+        raise
+
+# Execute several statements atomically on a single pooled connection.
+# sync_replica=False skips the replica sync after the commit, for writes
+# nobody needs to read back right away (the replica catches up on its
+# sync interval or with the next write)
+async def execute_transaction(statements: List[Tuple[str, tuple]], sync_replica: bool = True):
+    try:
+        return await get_executor().run(_execute_transaction_sync, statements, sync_replica)
+    except DatabaseBusyError:
+        raise
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.error("Database error: %s", e)
         raise
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Format many applications offline, e.g. to re-run every export after a
+carrier mapping change.
+
+Applications are read from a JSONL file (one application per line, shaped
+like the database rows: id, data, naic, email, onboarding_data, ...) or from
+a SQLite copy of the database, split into chunks and formatted across a
+process pool. Results are written as JSONL in input order, one line per
+application with the same shape as the batch endpoint's results, as soon as
+their chunk finishes. Throughput stats go to stderr.
+
+    python format_batch.py applications.jsonl -o formatted.jsonl
+    python format_batch.py local.db --workers 8 --chunk-size 100 --skip-producer
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import sqlite3
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import json_codec
+from app_logging import configure_logging
+from routes.formatter_routes import APPLICATION_SELECT, row_to_application, error_result, format_result
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+# (application_id, application), or the exception instead of the application
+# when its input could not be read
+Item = Tuple[Optional[str], Any]
+
+JSON_FIELDS = ("data", "schema", "originalSchema", "onboarding_data")
+
+
+def read_jsonl(path: str) -> Iterator[Item]:
+    with open(path, "r") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                application = json_codec.loads(line)
+                if not isinstance(application, dict):
+                    raise ValueError("expected a JSON object")
+                # Exported rows may carry the JSON columns still encoded
+                for field in JSON_FIELDS:
+                    if isinstance(application.get(field), str) and application[field]:
+                        application[field] = json_codec.loads(application[field])
+            except ValueError as e:
+                yield None, ValueError(f"Line {line_number}: {e}")
+                continue
+            yield application.get("id"), application
+
+
+def read_sqlite(path: str) -> Iterator[Item]:
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        last_id = None
+        for row in conn.execute(APPLICATION_SELECT + "ORDER BY applications.id"):
+            application_id = row[0]
+            # The onboarding join can repeat an application; keep its first row
+            if application_id == last_id:
+                continue
+            last_id = application_id
+            try:
+                application = row_to_application(row)
+            except Exception as e:
+                application = e
+            yield application_id, application
+    finally:
+        conn.close()
+
+
+def chunked(items: Iterator[Item], size: int) -> Iterator[List[Item]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Per-process state, set up once by _init_worker
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_options: Tuple[bool, bool] = (False, False)
+
+
+def _init_worker(skip_medication: bool, skip_producer: bool, log_level: str) -> None:
+    global _loop, _options
+    configure_logging(level=log_level)
+    from reference_data import registry
+    from routing_number import init_routing_client
+    # Reference data and the HTTP client are loaded once per worker, and one
+    # event loop serves every chunk so pooled connections stay usable
+    registry.load_all()
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+    init_routing_client()
+    _options = (skip_medication, skip_producer)
+
+
+async def _format_chunk(chunk: List[Item]) -> List[Dict[str, Any]]:
+    async def format_one(application_id, application):
+        if isinstance(application, Exception):
+            return error_result(application_id, application)
+        return await format_result(application, application_id, *_options)
+
+    return await asyncio.gather(*(format_one(application_id, application) for application_id, application in chunk))
+
+
+def format_chunk(chunk: List[Item]) -> Tuple[List[str], int]:
+    """JSON lines for a chunk (serialized in the worker) and how many succeeded."""
+    results = _loop.run_until_complete(_format_chunk(chunk))
+    return [json_codec.dumps(result) for result in results], sum(1 for result in results if result["success"])
+
+
+def run(items: Iterator[Item], out, workers: int, chunk_size: int, skip_medication: bool, skip_producer: bool, log_level: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    total = succeeded = 0
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(skip_medication, skip_producer, log_level)
+    ) as executor:
+        # A bounded window of chunks in flight keeps memory flat on large inputs
+        # while results are written in input order
+        pending = deque()
+        chunks = chunked(items, chunk_size)
+        for chunk in chunks:
+            pending.append((len(chunk), executor.submit(format_chunk, chunk)))
+            if len(pending) >= workers * 2:
+                total, succeeded = _drain(pending.popleft(), out, total, succeeded)
+        while pending:
+            total, succeeded = _drain(pending.popleft(), out, total, succeeded)
+    elapsed = time.perf_counter() - started
+    return {
+        "applications": total,
+        "succeeded": succeeded,
+        "failed": total - succeeded,
+        "workers": workers,
+        "chunk_size": chunk_size,
+        "elapsed_seconds": round(elapsed, 3),
+        "applications_per_second": round(total / elapsed, 1) if elapsed else None,
+    }
+
+
+def _drain(entry, out, total: int, succeeded: int) -> Tuple[int, int]:
+    count, future = entry
+    lines, chunk_succeeded = future.result()
+    out.write("\n".join(lines) + "\n")
+    out.flush()
+    return total + count, succeeded + chunk_succeeded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Format applications offline across a process pool.")
+    parser.add_argument("input", help="JSONL file of applications, or a SQLite database (.db/.sqlite/.sqlite3)")
+    parser.add_argument("-o", "--output", help="JSONL file to write (default: stdout)")
+    parser.add_argument("--format", choices=("jsonl", "sqlite"), help="Input format (default: from the file extension)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=50, help="Applications per task sent to a worker")
+    parser.add_argument("--skip-medication", action="store_true")
+    parser.add_argument("--skip-producer", action="store_true")
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "WARNING"))
+    args = parser.parse_args()
+
+    configure_logging(level=args.log_level)
+    input_format = args.format or ("sqlite" if args.input.endswith(SQLITE_SUFFIXES) else "jsonl")
+    items = read_sqlite(args.input) if input_format == "sqlite" else read_jsonl(args.input)
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        stats = run(items, out, max(args.workers, 1), max(args.chunk_size, 1),
+                    args.skip_medication, args.skip_producer, args.log_level)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
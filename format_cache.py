@@ -0,0 +1,232 @@
+"""
+Read-through cache of formatted applications.
+
+Formatted responses are keyed by (application_id, version, carrier,
+skip_medication, skip_producer), where version combines applications.updated_at
+with applications.revision, a counter that triggers bump whenever the
+application's data, NAIC or owner changes, or the owner's onboarding data or
+email does (see CREATE_STATEMENTS). The version is read in the same query
+that loads the application, so the key always matches the row being served
+and a hit skips the JSON decoding and the formatting. Any change to an
+application changes its key: stale entries are never served, whichever
+service wrote the change. Entries are stored without metadata.formatted_at;
+the route stamps it when serving them.
+
+There are two tiers: an in-process LRU (TTLCache) per worker, and the
+formatted_application_cache table shared by all workers and restarts. Both
+expire entries after FORMAT_CACHE_TTL seconds, which bounds how long output
+derived from reference data (ZIP codes, producers, bank names) can lag.
+
+Writes to the table never hold up a request: set() queues them, and a
+background task writes everything queued within FORMAT_CACHE_WRITE_DELAY
+seconds in one transaction, without the replica sync other writes get.
+"""
+
+import os
+import json_codec
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+from database import execute_query, execute_transaction, DatabaseBusyError
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+FORMAT_CACHE_TTL = float(os.getenv("FORMAT_CACHE_TTL", "3600"))
+FORMAT_CACHE_SIZE = int(os.getenv("FORMAT_CACHE_SIZE", "512"))
+FORMAT_CACHE_PERSIST = os.getenv("FORMAT_CACHE_PERSIST", "true").lower() not in ("0", "false", "no")
+FORMAT_CACHE_WRITE_DELAY = float(os.getenv("FORMAT_CACHE_WRITE_DELAY", "0.5"))
+# Queued table writes beyond this are dropped (the in-process tier still has them)
+FORMAT_CACHE_MAX_PENDING = int(os.getenv("FORMAT_CACHE_MAX_PENDING", "1000"))
+
+# Part of every version; bump it when a code change alters formatted output so
+# entries written by the previous release are not served
+FORMAT_REVISION = 1
+
+_BUMP_REVISION = "UPDATE applications SET revision = revision + 1"
+
+CREATE_STATEMENTS = [
+    "ALTER TABLE applications ADD COLUMN revision INTEGER NOT NULL DEFAULT 0",
+    f"""CREATE TRIGGER IF NOT EXISTS applications_revision_after_update
+    AFTER UPDATE OF data, naic, user_id, updated_at ON applications BEGIN
+        {_BUMP_REVISION} WHERE rowid = new.rowid;
+    END""",
+    # Formatted output includes the owner's medicare_status and email
+    f"""CREATE TRIGGER IF NOT EXISTS onboarding_revision_after_insert AFTER INSERT ON onboarding BEGIN
+        {_BUMP_REVISION} WHERE user_id = new.user_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS onboarding_revision_after_update AFTER UPDATE ON onboarding BEGIN
+        {_BUMP_REVISION} WHERE user_id IN (old.user_id, new.user_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS onboarding_revision_after_delete AFTER DELETE ON onboarding BEGIN
+        {_BUMP_REVISION} WHERE user_id = old.user_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS user_revision_after_update AFTER UPDATE OF email ON user BEGIN
+        {_BUMP_REVISION} WHERE user_id = new.id;
+    END""",
+    """CREATE TABLE IF NOT EXISTS formatted_application_cache (
+        application_id TEXT NOT NULL,
+        skip_medication INTEGER NOT NULL,
+        skip_producer INTEGER NOT NULL,
+        version TEXT NOT NULL,
+        carrier TEXT NOT NULL,
+        response TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        PRIMARY KEY (application_id, skip_medication, skip_producer)
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS applications_format_cache_after_delete AFTER DELETE ON applications BEGIN
+        DELETE FROM formatted_application_cache WHERE application_id = old.id;
+    END""",
+]
+
+CacheKey = Tuple[str, str, str, bool, bool]
+
+_INSERT = """INSERT OR REPLACE INTO formatted_application_cache
+    (application_id, skip_medication, skip_producer, version, carrier, response, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)"""
+
+
+def application_version(updated_at: Optional[str], revision: int) -> str:
+    """Cache version of an application from its updated_at and revision columns."""
+    return f"{FORMAT_REVISION}:{updated_at}:{revision}"
+
+
+class FormattedApplicationCache:
+    """The in-process LRU in front of the formatted_application_cache table."""
+
+    def __init__(
+        self,
+        maxsize: int = FORMAT_CACHE_SIZE,
+        ttl: float = FORMAT_CACHE_TTL,
+        persist: bool = FORMAT_CACHE_PERSIST,
+        write_delay: float = FORMAT_CACHE_WRITE_DELAY,
+        max_pending: int = FORMAT_CACHE_MAX_PENDING
+    ):
+        self.ttl = ttl
+        self.enabled = maxsize > 0 and ttl > 0
+        self.persist = persist and self.enabled
+        self.write_delay = write_delay
+        self.max_pending = max_pending
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._errors = 0
+        self._dropped = 0
+        # Table rows waiting to be written, by primary key; the latest response wins
+        self._pending: Dict[Tuple[str, bool, bool], Tuple[CacheKey, Dict[str, Any], float]] = {}
+        self._writer: Optional[asyncio.Task] = None
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    async def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        response = self.memory.get(key)
+        if response is not None or not self.persist:
+            return response
+
+        application_id, version, _, skip_medication, skip_producer = key
+        try:
+            rows = await execute_query(
+                """SELECT response FROM formatted_application_cache
+                WHERE application_id = ? AND skip_medication = ? AND skip_producer = ?
+                AND version = ? AND created_at > ?""",
+                (application_id, int(skip_medication), int(skip_producer), version, time.time() - self.ttl)
+            )
+        except DatabaseBusyError:
+            raise
+        except Exception as e:
+            # A broken persistent tier degrades to formatting every time
+            self._count("_errors")
+            logger.warning("Formatted application cache read failed for %s: %s", application_id, e)
+            return None
+        if not rows:
+            self._count("_misses")
+            return None
+        self._count("_hits")
+        response = json_codec.loads(rows[0][0])
+        self.memory.set(key, response)
+        return response
+
+    def set(self, key: CacheKey, response: Dict[str, Any]) -> None:
+        """Cache response in process now, and queue it for the shared table."""
+        self.memory.set(key, response)
+        if not self.persist:
+            return
+
+        application_id, _, _, skip_medication, skip_producer = key
+        row = (application_id, skip_medication, skip_producer)
+        if row not in self._pending and len(self._pending) >= self.max_pending:
+            self._count("_dropped")
+            return
+        self._pending[row] = (key, response, time.time())
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_soon())
+
+    async def _write_soon(self) -> None:
+        await asyncio.sleep(self.write_delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write every queued entry to the table."""
+        while self._pending:
+            pending, self._pending = self._pending, {}
+            statements = [
+                (_INSERT, (application_id, int(skip_medication), int(skip_producer), version, carrier,
+                           json_codec.dumps(response), created_at))
+                for (application_id, version, carrier, skip_medication, skip_producer), response, created_at
+                in pending.values()
+            ]
+            try:
+                # Nothing reads these rows back right away: skip the replica sync
+                await execute_transaction(statements, sync_replica=False)
+                with self._lock:
+                    self._writes += len(statements)
+            except Exception as e:
+                with self._lock:
+                    self._errors += 1
+                    self._dropped += len(statements)
+                logger.warning("Formatted application cache write of %d entries failed: %s", len(statements), e)
+
+    async def close(self) -> None:
+        """Write what is still queued; call before the database executor shuts down."""
+        writer, self._writer = self._writer, None
+        if writer is not None and not writer.done():
+            writer.cancel()
+            try:
+                await writer
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    def invalidate(self, application_id: Optional[str] = None) -> int:
+        """Drop in-process entries for one application, or all of them."""
+        if application_id is None:
+            return self.memory.invalidate()
+        return self.memory.invalidate(lambda key: key[0] == application_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            persistent = {
+                "enabled": self.persist,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else None,
+                "writes": self._writes,
+                "errors": self._errors,
+                "pending": len(self._pending),
+                "dropped": self._dropped,
+            }
+        return {"memory": self.memory.stats(), "persistent": persistent}
+
+
+formatted_application_cache = FormattedApplicationCache()
+
+
+def format_cache_stats() -> Dict[str, Any]:
+    return formatted_application_cache.stats()
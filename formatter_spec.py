@@ -0,0 +1,225 @@
+"""
+Declarative carrier formatter specs.
+
+A CarrierSpec lists the output sections of a carrier's application payload as
+Fields (source path, transform, default), Consts and Spreads. compile_formatter()
+turns a spec into Python source for a specialized formatter function, once at
+import time, so formatting an application is a single pass of inlined dict
+lookups with no per-call interpretation of the spec.
+
+Paths start from one of the ROOTS below and continue through nested dict
+keys, e.g. "applicant_info.zip5" or "producer.writing_numbers.aetna".
+Intermediate keys fall back to {} the way the hand-written .get() chains did.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# Values a path can start from: the code reading each one and the roots it
+# needs first, in evaluation order. Derived values come from the
+# ApplicationContext (resolved in the namespace passed to compile_formatter()),
+# which computes each at most once per application. Only the roots a spec
+# uses are read.
+ROOTS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "producer": ("ctx.producer", ()),
+    "data": ("ctx.data", ()),
+    "applicant_info": ("ctx.applicant_info", ("data",)),
+    "medicare_information": ("ctx.medicare_information", ("data",)),
+    "payment": ("ctx.payment", ("data",)),
+    "address": ("ctx.address", ("applicant_info",)),
+    "address_city": ("address[0]", ("address",)),
+    "address_state": ("address[1]", ("address",)),
+    "medicare_dates": ("ctx.medicare_dates", ("applicant_info", "medicare_information")),
+}
+
+_MISSING = object()
+
+Path = Union[str, Tuple[str, ...]]
+
+
+@dataclass(frozen=True)
+class Field:
+    """
+    Output key `name` read from `source`.
+
+    source is a path, or a tuple of paths where the first truthy value wins
+    (a or b). default is used when the source yields nothing: for a single
+    path when its last key is absent, for alternatives when none is truthy.
+    transform, if given, is applied to the result.
+
+    when_missing names a top-level data key; the field is only emitted when
+    the application data doesn't have it.
+    """
+    name: str
+    source: Path
+    transform: Optional[Callable[[Any], Any]] = None
+    default: Any = _MISSING
+    when_missing: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Const:
+    """Output key `name` with a fixed JSON-style value (a fresh copy per call)."""
+    name: str
+    value: Any
+    when_missing: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Spread:
+    """Copy every key of the dict at `source` into the enclosing section (**source)."""
+    source: str
+
+
+@dataclass(frozen=True)
+class Section:
+    """Output key `name` holding a nested dict built from `fields`."""
+    name: str
+    fields: Sequence[Union[Field, Const, Spread, "Section"]]
+    when_missing: Optional[str] = None
+
+
+Entry = Union[Field, Const, Spread, Section]
+
+
+@dataclass
+class CarrierSpec:
+    """
+    A carrier's output payload. hooks run in order after the sections are
+    built, as hook(data, formatted_data), for rewrites that don't fit a
+    field mapping (medication lists, flags set on nested sections).
+    """
+    name: str
+    sections: List[Entry]
+    hooks: List[Callable[[Dict[str, Any], Dict[str, Any]], None]] = field(default_factory=list)
+
+
+class _Compiler:
+    def __init__(self, spec: CarrierSpec):
+        self.spec = spec
+        self.bindings: Dict[str, Any] = {}
+        self.roots = set()
+
+    def bind(self, value: Any, prefix: str) -> str:
+        for name, bound in self.bindings.items():
+            if bound is value:
+                return name
+        name = f"_{getattr(value, '__name__', '').lstrip('_')}"
+        if not name[1:].isidentifier() or name in self.bindings:
+            name = f"{prefix}{len(self.bindings)}"
+        self.bindings[name] = value
+        return name
+
+    def use_root(self, root: str) -> str:
+        if root not in ROOTS:
+            raise ValueError(f"{self.spec.name}: unknown path root {root!r}")
+        if root not in self.roots:
+            for dependency in ROOTS[root][1]:
+                self.use_root(dependency)
+            self.roots.add(root)
+        return root
+
+    def path(self, path: str, default: Any = _MISSING) -> str:
+        root, *keys = path.split(".")
+        code = self.use_root(root)
+        for i, key in enumerate(keys):
+            if i < len(keys) - 1:
+                code += f".get({key!r}, {{}})"
+            elif default is _MISSING:
+                code += f".get({key!r})"
+            else:
+                code += f".get({key!r}, {self.literal(default)})"
+        return code
+
+    def literal(self, value: Any) -> str:
+        # repr() round-trips the JSON-style constants specs use; a mutable
+        # literal in the generated code is rebuilt on every call
+        if isinstance(value, (dict, list)) or value is None or isinstance(value, (bool, int, float, str)):
+            return repr(value)
+        return self.bind(value, "_const")
+
+    def field_value(self, entry: Field) -> str:
+        if isinstance(entry.source, tuple):
+            parts = [self.path(path) for path in entry.source]
+            if entry.default is not _MISSING:
+                parts.append(self.literal(entry.default))
+            code = f"({' or '.join(parts)})"
+        else:
+            code = self.path(entry.source, entry.default)
+        if entry.transform is not None:
+            code = f"{self.bind(entry.transform, '_transform')}({code})"
+        return code
+
+    def value(self, entry: Entry) -> str:
+        if isinstance(entry, Field):
+            return self.field_value(entry)
+        if isinstance(entry, Const):
+            return self.literal(entry.value)
+        if isinstance(entry, Section):
+            return self.dict_literal(entry.fields)
+        raise TypeError(f"{self.spec.name}: unexpected entry {entry!r}")
+
+    def dict_literal(self, entries: Sequence[Entry]) -> str:
+        items = []
+        for entry in entries:
+            if isinstance(entry, Spread):
+                items.append(f"**{self.path(entry.source)}")
+            else:
+                if getattr(entry, "when_missing", None):
+                    raise ValueError(f"{self.spec.name}: when_missing is only supported on top-level sections")
+                items.append(f"{entry.name!r}: {self.value(entry)}")
+        return "{" + ", ".join(items) + "}"
+
+    def compile(self) -> Tuple[str, Dict[str, Any]]:
+        # Leading unconditional sections form one dict literal; everything
+        # from the first conditional one on is assigned in order so key order
+        # matches the spec
+        sections = list(self.spec.sections)
+        split = next((i for i, entry in enumerate(sections) if getattr(entry, "when_missing", None)), len(sections))
+        body = [f"formatted_data = {self.dict_literal(sections[:split])}"]
+        for entry in sections[split:]:
+            if isinstance(entry, Spread):
+                raise ValueError(f"{self.spec.name}: Spread is only supported inside a Section")
+            assignment = f"formatted_data[{entry.name!r}] = {self.value(entry)}"
+            if entry.when_missing:
+                self.use_root("data")
+                body.append(f"if {entry.when_missing!r} not in data:")
+                body.append(f"    {assignment}")
+            else:
+                body.append(assignment)
+        for hook in self.spec.hooks:
+            self.use_root("data")
+            body.append(f"{self.bind(hook, '_hook')}(data, formatted_data)")
+        body.append("return formatted_data")
+
+        prelude = ["if ctx is None:", "    ctx = ApplicationContext(application_data)"]
+        prelude += [f"{root} = {ROOTS[root][0]}" for root in ROOTS if root in self.roots]
+        function_name = f"format_{_slug(self.spec.name)}_application"
+        lines = [f"def _make({', '.join(self.bindings)}):"]
+        lines.append(f"    def {function_name}(application_data, ctx=None):")
+        lines.extend(f"        {line}" for line in prelude + body)
+        lines.append(f"    return {function_name}")
+        return "\n".join(lines) + "\n", self.bindings
+
+
+def _slug(name: str) -> str:
+    return "".join(ch if ch.isalnum() else "_" for ch in name.lower())
+
+
+def compile_formatter(spec: CarrierSpec, namespace: Dict[str, Any]) -> Callable[..., Dict[str, Any]]:
+    """
+    Compile spec into a formatter(application_data, ctx=None) -> formatted_data,
+    where ctx is the request's ApplicationContext (one is created if omitted).
+
+    namespace supplies ApplicationContext (usually the calling module's
+    globals()). The generated source is kept on the function as __source__
+    for debugging.
+    """
+    source, bindings = _Compiler(spec).compile()
+    code = compile(source, f"<carrier spec {spec.name}>", "exec")
+    factory_namespace: Dict[str, Any] = {}
+    exec(code, namespace, factory_namespace)
+    formatter = factory_namespace["_make"](**bindings)
+    formatter.__doc__ = f"Format application data for {spec.name} (compiled from its CarrierSpec)."
+    formatter.__source__ = source
+    return formatter
@@ -0,0 +1,67 @@
+"""
+JSON encoding and decoding for the hot paths: application columns read from
+the database, cached and streamed responses, and API response bodies.
+
+Uses orjson when it is installed (the "fast" extra: pip install ".[fast]")
+and the standard library otherwise; JSON_CODEC=json forces the standard
+library. Input orjson rejects but json accepts (NaN and Infinity literals)
+and values orjson can't serialize are handed to json instead of failing, so
+behaviour matches the standard library with two exceptions under orjson:
+integers beyond 64 bits decode as floats, and NaN and infinities encode as
+null (json writes NaN/Infinity, which is not valid JSON). Application data
+is written by JavaScript clients, which produce neither.
+"""
+
+import os
+import json
+from typing import Any, Callable, Optional
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+JSON_CODEC = os.getenv("JSON_CODEC", "auto").lower()
+
+if orjson is not None and JSON_CODEC != "json":
+    BACKEND = "orjson"
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def loads(data):
+        """Decode a JSON document (str or bytes)."""
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return json.loads(data)
+
+    def dumps_bytes(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        """Encode obj as compact UTF-8 JSON."""
+        try:
+            return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return _stdlib_dumps(obj, default).encode("utf-8")
+
+    def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+        """Encode obj as a compact JSON string."""
+        return dumps_bytes(obj, default).decode("utf-8")
+else:
+    BACKEND = "json"
+    loads = json.loads
+
+    def dumps_bytes(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        return _stdlib_dumps(obj, default).encode("utf-8")
+
+    def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+        return _stdlib_dumps(obj, default)
+
+
+def _stdlib_dumps(obj: Any, default: Optional[Callable[[Any], Any]]) -> str:
+    return json.dumps(obj, default=default, ensure_ascii=False, separators=(",", ":"))
+
+
+class CodecJSONResponse(JSONResponse):
+    """JSONResponse rendered with the configured codec (the app's default response class)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
@@ -1,12 +1,60 @@
-from fastapi import FastAPI
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from routes.csg_routes import csg_routes
 from routes.formatter_routes import formatter_router
 from routes.auth_routes import auth_router
+from routes.metrics_routes import metrics_router
 from api_endpoints import db_router
+from reference_data import registry as reference_data
+from migrations import apply_migrations, auto_migrate_enabled
+from database import init_backend, close_backend, init_executor, close_executor, run_pool_reaper, DatabaseBusyError
+from app_logging import configure_logging, RequestIdMiddleware
+from routing_number import init_routing_client, close_routing_client
+from json_codec import CodecJSONResponse
+from format_cache import formatted_application_cache
 
-app = FastAPI()
+configure_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Parse reference data files once, up front
+    reference_data.load_all()
+    # Open the database backend, its pools and the executor once for the lifetime of the app
+    init_backend()
+    init_executor()
+    # One keep-alive HTTP client for bank-name lookups
+    init_routing_client()
+    reaper = asyncio.create_task(run_pool_reaper())
+    try:
+        if auto_migrate_enabled():
+            await apply_migrations()
+        yield
+    finally:
+        # Runs even if startup or the app failed, so nothing is left open
+        reaper.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await reaper
+        try:
+            # Queued formatted-application cache rows go out before the executor closes
+            await formatted_application_cache.close()
+            await close_routing_client()
+        finally:
+            close_executor()
+            close_backend()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=CodecJSONResponse)
+
+@app.exception_handler(DatabaseBusyError)
+async def database_busy_handler(request: Request, exc: DatabaseBusyError):
+    # Shed load instead of queueing unbounded work behind a slow database
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
 
 # Add CORS middleware
 app.add_middleware(
@@ -15,8 +63,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
 
+# Tag each request (and every log record made while handling it) with an id
+app.add_middleware(RequestIdMiddleware)
+
 # Include authentication routes (no auth required for login)
 app.include_router(auth_router, prefix="/api/auth", tags=["authentication"])
 
@@ -29,6 +81,9 @@ app.include_router(db_router, prefix="/api/db", tags=["database"])
 # Include the new formatter routes
 app.include_router(formatter_router, prefix="/api/formatter", tags=["formatter"])
 
+# Include runtime metrics routes
+app.include_router(metrics_router, prefix="/api/metrics", tags=["metrics"])
+
 # Mount static files directory for the front-end interface
 app.mount("/", StaticFiles(directory="static", html=True), name="static")
 
@@ -0,0 +1,85 @@
+"""
+Drug-name parsing for medication sections.
+
+Drug names come from the drug search as "<name> <FORM> <strength...>", e.g.
+"Atorvastatin Calcium TAB 20MG/1": the first all-uppercase token marks where
+the medication name ends and the dosage begins. The vocabulary applicants
+pick from is small and repeats across applications, so parses are memoized
+in a bounded LRU shared by every carrier.
+"""
+
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+MEDICATION_PARSE_CACHE_SIZE = int(os.getenv("MEDICATION_PARSE_CACHE_SIZE", "4096"))
+
+
+def _parse_drug_name(full_name: str) -> Tuple[str, str]:
+    med_name = []
+    dosage = []
+    found_upper = False
+    for part in full_name.split():
+        if found_upper:
+            # Everything after the form is dosage
+            dosage.append(part)
+        elif part.isupper():
+            found_upper = True
+        else:
+            med_name.append(part)
+    return " ".join(med_name), " ".join(dosage)
+
+
+_parse_drug_name_cached = lru_cache(maxsize=MEDICATION_PARSE_CACHE_SIZE)(_parse_drug_name)
+
+
+def parse_drug_name(full_name: str) -> Tuple[str, str]:
+    """
+    (med_name, dosage) for a drug name: the words before its first
+    all-uppercase token, and the words after it.
+
+        >>> parse_drug_name("Lisinopril TAB 10 MG/5ML")
+        ('Lisinopril', '10 MG/5ML')
+    """
+    if type(full_name) is str:
+        return _parse_drug_name_cached(full_name)
+    return _parse_drug_name(full_name)
+
+
+def parse_prescriptions(prescription_drug_list: Sequence[Dict[str, Any]]) -> List[Optional[Tuple[str, str]]]:
+    """
+    parse_drug_name() for each prescription's drug.drugName, in order; None
+    for prescriptions without a drug name. Names repeated within the list
+    are parsed once.
+    """
+    parsed: Dict[str, Tuple[str, str]] = {}
+    results = []
+    for prescription in prescription_drug_list:
+        full_name = prescription.get("drug", {}).get("drugName")
+        if not full_name:
+            results.append(None)
+        elif type(full_name) is str:
+            result = parsed.get(full_name)
+            if result is None:
+                result = parsed[full_name] = _parse_drug_name_cached(full_name)
+            results.append(result)
+        else:
+            results.append(_parse_drug_name(full_name))
+    return results
+
+
+def parse_cache_stats() -> Dict[str, Any]:
+    """Statistics of the shared parse memo."""
+    info = _parse_drug_name_cached.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_ratio": round(info.hits / lookups, 4) if lookups else None,
+    }
+
+
+def clear_parse_cache() -> None:
+    _parse_drug_name_cached.cache_clear()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Schema migrations for the indexes and derived tables this service relies on.
+
+Each migration runs once, atomically, and is recorded in schema_migrations.
+Apply them as a deploy step, before starting the app:
+    python migrations.py
+or at startup with DB_AUTO_MIGRATE=true. Runs hold the database write lock
+from reading schema_migrations until the last migration commits, so
+concurrent runs (e.g. several workers starting at once) apply each migration
+exactly once.
+"""
+
+import os
+import asyncio
+import logging
+from typing import List, Tuple
+from database import get_backend, get_executor, close_executor, close_backend
+import search_index
+import format_cache
+from app_logging import configure_logging
+
+logger = logging.getLogger(__name__)
+
+def _applicant_name_expr(row: str) -> str:
+    # Same display name the list view used to build in Python: "f_name l_name", stripped
+    return f"""CASE WHEN json_valid({row}.data) THEN trim(
+        coalesce(json_extract({row}.data, '$.applicant_info.f_name'), '') || ' ' ||
+        coalesce(json_extract({row}.data, '$.applicant_info.l_name'), '')
+    ) ELSE '' END"""
+
+MIGRATIONS: List[Tuple[str, List[str]]] = [
+    ("0001_applications_created_at_id_index", [
+        # Keyset pagination seeks on (created_at, id) in descending order
+        "CREATE INDEX IF NOT EXISTS idx_applications_created_at_id ON applications (created_at DESC, id DESC)",
+    ]),
+    ("0002_applications_fts", [
+        # Full-text search index, its sync triggers, and a backfill of existing rows
+        *search_index.CREATE_STATEMENTS,
+        *search_index.REBUILD_STATEMENTS,
+    ]),
+    ("0003_applications_applicant_name", [
+        # Materialized display name so list pages never read or decode data
+        "ALTER TABLE applications ADD COLUMN applicant_name TEXT",
+        # Writing applicant_name must not re-trigger the search index
+        "DROP TRIGGER IF EXISTS applications_fts_after_update",
+        search_index.UPDATE_TRIGGER,
+        f"UPDATE applications SET applicant_name = {_applicant_name_expr('applications')}",
+        f"""CREATE TRIGGER IF NOT EXISTS applications_applicant_name_after_insert AFTER INSERT ON applications BEGIN
+            UPDATE applications SET applicant_name = {_applicant_name_expr('new')} WHERE rowid = new.rowid;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS applications_applicant_name_after_update AFTER UPDATE OF data ON applications BEGIN
+            UPDATE applications SET applicant_name = {_applicant_name_expr('new')} WHERE rowid = new.rowid;
+        END""",
+        "CREATE INDEX IF NOT EXISTS idx_applications_applicant_name ON applications (applicant_name)",
+    ]),
+    ("0004_formatted_application_cache", [
+        # Revision counter bumped on every change formatted output depends on,
+        # and the persistent tier of the formatted-output cache
+        *format_cache.CREATE_STATEMENTS,
+    ]),
+]
+
+def auto_migrate_enabled() -> bool:
+    return os.getenv("DB_AUTO_MIGRATE", "false").lower() in ("1", "true", "yes")
+
+def _apply_migrations_sync() -> List[str]:
+    backend = get_backend()
+    newly_applied = []
+    with backend.write_pool.connection() as conn:
+        # Take the write lock before reading what is applied, so a concurrent
+        # run waits here and then finds everything already done
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS schema_migrations (name TEXT PRIMARY KEY, applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+            )
+            applied = {row[0] for row in conn.execute("SELECT name FROM schema_migrations").fetchall()}
+            for name, statements in MIGRATIONS:
+                if name in applied:
+                    continue
+                logger.info("Applying migration %s", name)
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute("INSERT INTO schema_migrations (name) VALUES (?)", (name,))
+                newly_applied.append(name)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    if newly_applied:
+        backend.after_write()
+    return newly_applied
+
+async def apply_migrations() -> List[str]:
+    """Apply pending migrations in order; returns the names of those applied."""
+    try:
+        return await get_executor().run(_apply_migrations_sync)
+    except Exception as e:
+        logger.error("Migration failed: %s", e)
+        raise
+
+async def _main():
+    try:
+        applied = await apply_migrations()
+        print(f"Applied {len(applied)} migration(s)" if applied else "Schema is up to date")
+    finally:
+        close_executor()
+        close_backend()
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(_main())
@@ -28,9 +28,13 @@ class Application(Base):
     schema = Column(JSON, nullable=False)
     originalSchema = Column(JSON, nullable=False)
     underwritingType = Column(Integer, nullable=False, default=0)
+    # Derived from data.applicant_info by a trigger; see migrations.py
+    applicantName = Column(Text)
 
     __table_args__ = (
         Index('idx_applications_csg_key', "id"),
+        Index('idx_applications_created_at_id', "createdAt", "id"),
+        Index('idx_applications_applicant_name', "applicantName"),
         CheckConstraint("underwritingType IN (0, 1, 2)", name="underwriting_type_check"),
     )
 
@@ -0,0 +1,199 @@
+"""
+NAIC company matcher.
+
+Resolves a free-text insurance company name to an entry in
+supp_companies_full.json: exact and alias hits are dict lookups, everything
+else goes through rapidfuzz's batched extractOne over preprocessed names.
+
+Every lookup returns what scoring every company would. Large registries
+(NAIC_INDEX_MIN_COMPANIES or more, e.g. the full NAIC list) first score a
+shortlist of candidates drawn from token and character-trigram inverted
+indexes over name_full and name; the best shortlist score then serves as the
+cutoff for the full pass, so rapidfuzz can reject most companies early.
+Below that size the shortlist costs more than it saves
+(benchmarks/bench_naic.py compares both). Results are memoized per input
+string.
+"""
+
+import os
+import re
+import math
+import heapq
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+from rapidfuzz import fuzz, process
+
+NAIC_MATCH_THRESHOLD = 80
+NAIC_MATCH_CACHE_SIZE = int(os.getenv("NAIC_MATCH_CACHE_SIZE", "1024"))
+# Registries with fewer companies than this skip the candidate shortlist
+NAIC_INDEX_MIN_COMPANIES = int(os.getenv("NAIC_INDEX_MIN_COMPANIES", "50000"))
+# Candidates scored per index and lookup in indexed registries
+NAIC_CANDIDATE_LIMIT = int(os.getenv("NAIC_CANDIDATE_LIMIT", "32"))
+# Features shared by more companies than this ("ins", "co") carry little
+# signal and are skipped when ranking, unless the query has nothing rarer
+NAIC_MAX_POSTINGS = int(os.getenv("NAIC_MAX_POSTINGS", "1000"))
+
+# Common abbreviations and aliases, keyed by the name exactly as entered
+COMPANY_ALIASES = {
+    'UHC': 'UnitedHealthcare',
+    'United Healthcare': 'UnitedHealthcare',
+    'United Health Care': 'UnitedHealthcare',
+    'BC': 'Blue Cross',
+    'BCBS': 'Blue Cross Blue Shield',
+    'Aflac': 'American Family Life Assur Co',
+}
+
+
+def name_features(name: str) -> Set[str]:
+    """Word tokens plus space-padded character trigrams of each word."""
+    features = set()
+    for token in re.findall(r"\w+", name.lower()):
+        features.add(token)
+        padded = f" {token} "
+        features.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return features
+
+
+def sort_tokens(text: str) -> str:
+    """text with its whitespace-separated tokens sorted, as token_sort_ratio compares it."""
+    return " ".join(sorted(text.split()))
+
+
+class CandidateIndex:
+    """
+    Inverted index from name features to company positions. shortlist()
+    ranks companies by the IDF-weighted share of the query's features they
+    contain, which favours both whole-name (token_sort_ratio) and substring
+    (partial_ratio) matches.
+    """
+
+    def __init__(self, names: List[str]):
+        postings = defaultdict(list)
+        for index, name in enumerate(names):
+            for feature in name_features(name):
+                postings[feature].append(index)
+        self.size = len(names)
+        self.postings = dict(postings)
+        self.idf = {
+            feature: math.log(1 + self.size / len(indexes))
+            for feature, indexes in self.postings.items()
+        }
+
+    def shortlist(self, query: str, limit: int, max_postings: int = NAIC_MAX_POSTINGS) -> List[int]:
+        """Up to `limit` company positions sharing the most query weight."""
+        features = [feature for feature in name_features(query) if feature in self.postings]
+        rare = [feature for feature in features if len(self.postings[feature]) <= max_postings]
+        if not rare and features:
+            rare = [min(features, key=lambda feature: len(self.postings[feature]))]
+        scores = defaultdict(float)
+        for feature in rare:
+            weight = self.idf[feature]
+            for index in self.postings[feature]:
+                scores[index] += weight
+        # Ties go to earlier companies so the linear-scan tie break survives
+        return heapq.nsmallest(limit, scores, key=lambda index: (-scores[index], index))
+
+
+class NaicMatcher:
+    """Prebuilt matcher over a list of companies ({"name_full", "name", "naic", ...})."""
+
+    def __init__(
+        self,
+        companies: List[Dict[str, Any]],
+        cache_size: int = NAIC_MATCH_CACHE_SIZE,
+        candidate_limit: int = NAIC_CANDIDATE_LIMIT,
+        index_min_companies: int = NAIC_INDEX_MIN_COMPANIES,
+    ):
+        self.companies = companies
+        self.candidate_limit = candidate_limit
+        # Choice strings are preprocessed once instead of per lookup;
+        # token_sort_ratio is ratio over token-sorted strings, so those are
+        # sorted up front as well
+        self.choices = [company["name_full"].lower() for company in companies]
+        self.sorted_choices = [sort_tokens(choice) for choice in self.choices]
+        self.exact: Dict[str, Dict[str, Any]] = {}
+        for company in companies:
+            self.exact.setdefault(company["name_full"].lower(), company)
+        # Ranked separately so short abbreviated names don't crowd out
+        # candidates whose full name is what gets scored
+        self.indexes = [
+            CandidateIndex(self.choices),
+            CandidateIndex([company.get("name") or "" for company in companies]),
+        ] if len(companies) >= index_min_companies else []
+        self._match_cached = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _candidates(self, query: str) -> List[int]:
+        if not self.indexes or len(self.companies) <= self.candidate_limit * len(self.indexes):
+            return list(range(len(self.companies)))
+        candidates = set()
+        for index in self.indexes:
+            candidates.update(index.shortlist(query, self.candidate_limit))
+        # Nothing indexable in the query (e.g. punctuation only): fall back to a scan
+        return sorted(candidates) or list(range(len(self.companies)))
+
+    def _best_fuzzy_index(self, query: str) -> Optional[int]:
+        best = None
+        if self.indexes:
+            # The shortlist's best score is the cutoff for the full pass
+            # below, so most companies are rejected without being fully scored
+            best = self._best_among(query, self._candidates(query), NAIC_MATCH_THRESHOLD)
+        # The shortlist can miss the best company; scoring every company
+        # keeps the result the same as without an index
+        best = self._best_among(query, None, best[0] if best else NAIC_MATCH_THRESHOLD) or best
+        return best[1] if best else None
+
+    def _best_among(self, query: str, candidates: Optional[List[int]], score_cutoff: float) -> Optional[Tuple[float, int]]:
+        # Score is max(token_sort_ratio, partial_ratio); the earliest company
+        # with the best score wins, as in a linear scan. candidates=None
+        # scores every company
+        scorers = (
+            (fuzz.ratio, sort_tokens(query), self.sorted_choices),  # token_sort_ratio
+            (fuzz.partial_ratio, query, self.choices),
+        )
+        best = None
+        for scorer, scored_query, all_choices in scorers:
+            choices = all_choices if candidates is None else [all_choices[index] for index in candidates]
+            result = process.extractOne(
+                scored_query, choices, scorer=scorer, processor=None, score_cutoff=score_cutoff
+            )
+            if result is None:
+                continue
+            _, score, position = result
+            index = position if candidates is None else candidates[position]
+            if best is None or score > best[0] or (score == best[0] and index < best[1]):
+                best = (score, index)
+        return best
+
+    def _resolve(self, company: str) -> Optional[Dict[str, Any]]:
+        # Exact names match ignoring case; aliases only as entered
+        exact = self.exact.get(company.lower())
+        if exact is not None:
+            return exact
+        search_company = COMPANY_ALIASES.get(company, company).lower()
+        index = self._best_fuzzy_index(search_company)
+        return self.companies[index] if index is not None else None
+
+    def match(self, company: str) -> Optional[Dict[str, Any]]:
+        """Return the matching company entry, or None if nothing scores above the threshold."""
+        if not company or not self.companies:
+            return None
+        return self._match_cached(company)
+
+    def stats(self) -> Dict[str, Any]:
+        info = self._match_cached.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            "companies": len(self.companies),
+            "indexed": bool(self.indexes),
+            "indexed_features": sum(len(index.postings) for index in self.indexes),
+            "candidate_limit": self.candidate_limit,
+            "cache_size": info.currsize,
+            "cache_maxsize": info.maxsize,
+            "hits": info.hits,
+            "misses": info.misses,
+            "hit_ratio": round(info.hits / lookups, 4) if lookups else None,
+        }
+
+    def clear_cache(self) -> None:
+        self._match_cached.cache_clear()
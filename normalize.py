@@ -0,0 +1,172 @@
+"""
+Single-pass normalization of application data.
+
+A Rule says what to do to a value: URL-decode strings, prune None and empty
+dicts, substitute "NA" for empty values, truncate date fields. apply_rule()
+does all of a rule's steps in one traversal that allocates one new tree,
+instead of one pass (and one copy) per step.
+
+Rules are chosen per top-level section: INPUT_RULES covers the sections the
+carrier formatters read, which are decoded before formatting. Every other
+section is only ever copied to the response, so it goes from raw to final
+form in one decode + "NA" pass (COPY_RAW).
+"""
+
+import collections.abc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Mapping, Tuple
+from urllib.parse import unquote
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    decode:      URL-decode (and strip) strings containing '%'
+    prune:       drop dict entries that are None or empty dicts, checked
+                 before the entry is transformed; lists are not pruned
+    na:          replace None, "" and "undefined" with "NA" (after decoding)
+    date_fields: keys of the top-level dict whose string values lose any
+                 time component ("2024-01-01T00:00:00Z" -> "2024-01-01")
+    """
+    decode: bool = False
+    prune: bool = False
+    na: bool = False
+    date_fields: Tuple[str, ...] = ()
+
+
+DECODE = Rule(decode=True)
+PRUNE = Rule(prune=True)
+NA = Rule(na=True)
+COPY_RAW = Rule(decode=True, na=True)
+
+# Sections the formatters (and format_application) read, decoded up front
+INPUT_RULES: Dict[str, Rule] = {
+    "applicant_info": Rule(decode=True, date_fields=("applicant_dob", "effective_date")),
+    "medicare_information": DECODE,
+    "payment": DECODE,
+    "hhd_information": DECODE,
+    "physician_information": DECODE,
+    "health_history": DECODE,
+    "medication_information": DECODE,
+    "existing_coverage": DECODE,
+}
+
+
+def _make_walker(decode: bool, prune: bool, na: bool) -> Callable[[Any], Any]:
+    """
+    Build the traversal for one combination of steps. Leaves are handled
+    inline in the container loops, since most values are scalars and a
+    call per leaf would dominate the cost.
+    """
+
+    def leaf(value: Any) -> Any:
+        if isinstance(value, str):
+            if decode and '%' in value:
+                value = unquote(value).strip()
+            if na and (not value or value == "undefined"):
+                return "NA"
+            return value
+        if value is None and na:
+            return "NA"
+        return value
+
+    def walk_dict(obj: dict) -> dict:
+        out = {}
+        for k, v in obj.items():
+            cls = type(v)
+            if cls is str:
+                if decode and '%' in v:
+                    v = unquote(v).strip()
+                if na and (not v or v == "undefined"):
+                    v = "NA"
+            elif v is None:
+                if prune:
+                    continue
+                if na:
+                    v = "NA"
+            elif cls is dict:
+                # Emptiness is checked before the entry is transformed
+                if prune and not v:
+                    continue
+                v = walk_dict(v)
+            elif cls is list:
+                v = walk_list(v)
+            elif cls is not int and cls is not bool and cls is not float:
+                if prune and isinstance(v, collections.abc.Mapping) and not v:
+                    continue
+                v = walk(v)
+            out[k] = v
+        return out
+
+    def walk_list(obj: list) -> list:
+        if list_walk is None:
+            return obj
+        return [list_walk(item) for item in obj]
+
+    def walk(value: Any) -> Any:
+        if isinstance(value, dict):
+            return walk_dict(value)
+        if isinstance(value, list):
+            return walk_list(value)
+        # Other mappings (SectionOverlay) come out as plain dicts
+        if isinstance(value, collections.abc.Mapping):
+            return walk_dict(value)
+        return leaf(value)
+
+    # Pruning never reaches into lists: their items only get the other steps,
+    # and with no other steps the list is kept as is
+    if not prune:
+        list_walk = walk
+    elif decode or na:
+        list_walk = _make_walker(decode, False, na)
+    else:
+        list_walk = None
+    return walk
+
+
+_WALKERS: Dict[Tuple[bool, bool, bool], Callable[[Any], Any]] = {}
+
+
+def _walker(decode: bool, prune: bool, na: bool) -> Callable[[Any], Any]:
+    key = (decode, prune, na)
+    walker = _WALKERS.get(key)
+    if walker is None:
+        walker = _WALKERS[key] = _make_walker(decode, prune, na)
+    return walker
+
+
+def apply_rule(value: Any, rule: Rule) -> Any:
+    """Return value transformed by every step of rule, in one pass."""
+    if not (rule.decode or rule.prune or rule.na):
+        result = value
+    else:
+        result = _walker(rule.decode, rule.prune, rule.na)(value)
+    if rule.date_fields and isinstance(result, dict):
+        for date_field in rule.date_fields:
+            date_value = result.get(date_field)
+            if date_value and isinstance(date_value, str) and 'T' in date_value:
+                if result is value:
+                    result = dict(value)
+                result[date_field] = date_value.split('T')[0]
+    return result
+
+
+def normalize_input(data: Mapping[str, Any], rules: Mapping[str, Rule] = INPUT_RULES) -> Dict[str, Any]:
+    """
+    Prepare application data for the formatters: sections with a rule are
+    transformed by it, the rest are passed through untouched (same objects)
+    and left for copy_section().
+    """
+    return {
+        section: apply_rule(content, rules[section]) if section in rules else content
+        for section, content in data.items()
+    }
+
+
+def copy_section(section: str, content: Any, rules: Mapping[str, Rule] = INPUT_RULES) -> Any:
+    """
+    Final form of a data section copied verbatim into the response: already
+    decoded input sections only need "NA" substitution, untouched ones get
+    decoding and substitution together.
+    """
+    return apply_rule(content, NA if section in rules else COPY_RAW)
@@ -0,0 +1,66 @@
+"""
+Copy-on-write views of data sections.
+
+Formatter hooks that rewrite a section (drop the drug list, add a couple of
+keys) used to deep-copy the whole section first. A SectionOverlay records
+the edits over the original mapping instead; nothing is copied until the
+section is serialized, which the response builder does anyway
+(normalize.copy_section walks any Mapping into plain dicts).
+"""
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+_MISSING = object()
+
+
+class SectionOverlay(Mapping):
+    """
+    Read-only view of `base` with the keys in `remove` dropped and `updates`
+    applied, equivalent to doing those edits on a copy of base:
+
+        overlay = SectionOverlay(section, remove=("prescription_drug_list",), updates={"med_name": name})
+
+    iterates like the edited copy would, surviving keys of base in their
+    order (with updated values) and then new keys in update order. base is
+    never modified, and must not be modified while the overlay is in use.
+    """
+
+    __slots__ = ("_base", "_removed", "_updates")
+
+    def __init__(self, base: Mapping, remove: Iterable[Any] = (), updates: Optional[Dict[Any, Any]] = None):
+        self._base = base
+        self._removed = frozenset(remove)
+        self._updates = dict(updates or {})
+
+    def __getitem__(self, key: Any) -> Any:
+        value = self._updates.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if key in self._removed:
+            raise KeyError(key)
+        return self._base[key]
+
+    def __iter__(self) -> Iterator[Any]:
+        updates = self._updates
+        removed = self._removed
+        for key in self._base:
+            if key not in removed:
+                yield key
+        # A key removed and then set again moves to the end, as on a dict
+        for key in updates:
+            if key in removed or key not in self._base:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._updates or (key not in self._removed and key in self._base)
+
+    def __repr__(self) -> str:
+        return f"SectionOverlay({dict(self)!r})"
+
+    def materialize(self) -> Dict[Any, Any]:
+        """A plain dict with the same items (shallow: values are shared with base)."""
+        return dict(self.items())
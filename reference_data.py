@@ -0,0 +1,245 @@
+"""
+Reference data registry.
+
+Static JSON files the formatters consult (ZIP codes, producer config, the
+NAIC company list) are parsed once into indexed in-memory structures and
+reloaded only when the file's mtime changes.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+from naic_matcher import NaicMatcher
+from zipdb import ZipDatabase, build_zip_db
+
+logger = logging.getLogger(__name__)
+
+# Seconds between mtime checks; lookups in between never touch the filesystem
+REFERENCE_DATA_CHECK_INTERVAL = float(os.getenv("REFERENCE_DATA_CHECK_INTERVAL", "5"))
+# Compiled ZIP database (python zipdb.py); used instead of zipData.json when
+# present, and rebuilt from it when zipData.json is newer
+ZIP_DB_PATH = os.getenv("ZIP_DB_PATH", "zipData.bin")
+
+_NO_DEFAULT = object()
+
+
+def _load_json(path: str) -> Any:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def deep_sizeof(obj: Any) -> int:
+    """Approximate memory footprint of a structure of dicts, lists, tuples and scalars."""
+    seen = set()
+    stack = [obj]
+    size = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return size
+
+
+class ReferenceDataset:
+    """
+    A file parsed once by load() (JSON by default) and indexed by build().
+    get() returns the indexed value, reloading it first if the file changed
+    on disk.
+
+    Files listed in watch are derived from or alternatives to path (which
+    load() decides how to use); a change to any of them also reloads.
+
+    If the file cannot be loaded, get() falls back to the last good value,
+    then to default; without a default the load error is raised.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        path: str,
+        build: Callable[[Any], Any],
+        default: Any = _NO_DEFAULT,
+        check_interval: float = REFERENCE_DATA_CHECK_INTERVAL,
+        load: Callable[[str], Any] = _load_json,
+        watch: Sequence[str] = (),
+    ):
+        self.name = name
+        self.path = path
+        self.watch = tuple(watch)
+        self.build = build
+        self.load = load
+        self.default = default
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._value: Any = _NO_DEFAULT
+        # mtime of path, then of each watched file (None while missing)
+        self._mtimes: Optional[Tuple[Optional[float], ...]] = None
+        self._next_check = 0.0
+        self._error: Optional[Exception] = None
+        self._listeners = []
+
+        self._loaded_at: Optional[float] = None
+        self._load_seconds: Optional[float] = None
+        self._size_bytes: Optional[int] = None
+        self._loads = 0
+
+    def on_reload(self, listener: Callable[[Any], None]) -> None:
+        """Call listener with the new value whenever the dataset is (re)loaded."""
+        self._listeners.append(listener)
+
+    def _stat(self) -> Tuple[Optional[float], ...]:
+        mtimes = [os.stat(self.path).st_mtime]
+        for path in self.watch:
+            try:
+                mtimes.append(os.stat(path).st_mtime)
+            except FileNotFoundError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def _load(self, mtimes: Tuple[Optional[float], ...]) -> None:
+        started = time.perf_counter()
+        value = self.build(self.load(self.path))
+        self._value = value
+        self._mtimes = mtimes
+        self._error = None
+        self._load_seconds = time.perf_counter() - started
+        self._loaded_at = time.time()
+        # An mmap-backed database lives in the page cache, not the heap
+        self._size_bytes = None if isinstance(value, ZipDatabase) else deep_sizeof(value)
+        self._loads += 1
+        for listener in self._listeners:
+            listener(value)
+
+    def refresh(self, force: bool = False) -> None:
+        """Reload if the file or a watched one changed (or unconditionally with force)."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            try:
+                mtimes = self._stat()
+                if force or mtimes != self._mtimes or self._value is _NO_DEFAULT:
+                    self._load(mtimes)
+            except Exception as e:
+                if not isinstance(self._error, type(e)):
+                    logger.error("Error loading reference data %s from %s: %s", self.name, self.path, e)
+                self._error = e
+
+    def get(self) -> Any:
+        self.refresh()
+        value = self._value
+        if value is not _NO_DEFAULT:
+            return value
+        if self.default is not _NO_DEFAULT:
+            return self.default
+        raise self._error
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "loaded": self._value is not _NO_DEFAULT,
+            "loads": self._loads,
+            "loaded_at": self._loaded_at,
+            "load_seconds": round(self._load_seconds, 6) if self._load_seconds is not None else None,
+            "size_bytes": self._size_bytes,
+            "mtime": self._mtimes[0] if self._mtimes else None,
+            "error": str(self._error) if self._error else None,
+        }
+
+
+class ReferenceDataRegistry:
+    def __init__(self):
+        self._datasets: Dict[str, ReferenceDataset] = {}
+
+    def register(self, dataset: ReferenceDataset) -> ReferenceDataset:
+        self._datasets[dataset.name] = dataset
+        return dataset
+
+    def get(self, name: str) -> ReferenceDataset:
+        return self._datasets[name]
+
+    def load_all(self) -> None:
+        """Load every dataset now (at startup) instead of on first use."""
+        for dataset in self._datasets.values():
+            dataset.refresh(force=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: dataset.stats() for name, dataset in self._datasets.items()}
+
+
+def _index_zip_codes(raw: Dict[str, Any]) -> Dict[str, Tuple[str, str]]:
+    # Keep only what the formatters read: the first city and the state
+    index = {}
+    for zip5, entry in raw.items():
+        cities = entry.get("cities", [""])
+        index[zip5] = (cities[0] if cities else "", entry.get("state", ""))
+    return index
+
+def _load_zip_codes(path: str) -> Any:
+    """
+    The compiled ZIP database if it is at least as new as the JSON at path.
+    A stale one is rebuilt from the JSON first; if that fails (e.g. a
+    read-only deploy) the JSON is indexed instead. Without a compiled
+    database the JSON is used as is.
+    """
+    try:
+        compiled_mtime = os.stat(ZIP_DB_PATH).st_mtime
+    except FileNotFoundError:
+        return _index_zip_codes(_load_json(path))
+    if compiled_mtime >= os.stat(path).st_mtime:
+        return ZipDatabase(ZIP_DB_PATH)
+    raw = _load_json(path)
+    try:
+        build_zip_db(raw, ZIP_DB_PATH)
+    except OSError as e:
+        logger.warning("Could not rebuild %s from %s, using the JSON: %s", ZIP_DB_PATH, path, e)
+        return _index_zip_codes(raw)
+    logger.info("Rebuilt %s from %s", ZIP_DB_PATH, path)
+    return ZipDatabase(ZIP_DB_PATH)
+
+def _index_producers(raw: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    # Producers keyed by first name; the first listed wins on duplicates
+    index = {}
+    for producer in raw["producers"]:
+        index.setdefault(producer["first_name"], producer)
+    return index
+
+def _index_companies(raw: list) -> NaicMatcher:
+    return NaicMatcher(raw)
+
+
+registry = ReferenceDataRegistry()
+
+# With ZIP_DB_PATH present lookups are mmap-backed: pages are shared between
+# workers through the page cache
+zip_codes = registry.register(ReferenceDataset(
+    "zip_codes", "zipData.json", lambda index: index, load=_load_zip_codes, watch=[ZIP_DB_PATH]
+))
+producers = registry.register(ReferenceDataset("producers", "producer_config.json", _index_producers, default={}))
+naic_companies = registry.register(ReferenceDataset(
+    "naic_companies", "supp_companies_full.json", _index_companies, default=NaicMatcher([])
+))
+
+
+def lookup_zip(zip5: Optional[str]) -> Tuple[str, str]:
+    """Return (city, state) for a ZIP code, or empty strings if unknown."""
+    if not zip5:
+        return "", ""
+    return zip_codes.get().get(zip5, ("", ""))
+
+def get_producer(first_name: str) -> Dict[str, Any]:
+    """Return the producer with this first name from producer_config.json, or {}."""
+    return producers.get().get(first_name, {})
@@ -1,85 +1,205 @@
+import asyncio
+import logging
 from fastapi import APIRouter, HTTPException, Depends
-from database import execute_query
-from typing import Dict, Any
-import json
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from database import execute_query, DatabaseBusyError
+from typing import Dict, Any, List, Optional
+import json_codec
 from datetime import datetime, timezone
-from application_formatter import format_application
-from urllib.parse import unquote
+from application_formatter import ApplicationContext, format_application
+from normalize import NA, DECODE, apply_rule, normalize_input, copy_section
+from format_cache import formatted_application_cache, application_version
 from pprint import pprint
 from auth import get_current_user
 
+logger = logging.getLogger(__name__)
 
 formatter_router = APIRouter()
 
-async def get_application_by_id(application_id: str) -> Dict[str, Any]:
-    """Retrieve application from database by ID."""
-    try:
-        query = """
-        SELECT 
+APPLICATION_COLUMNS = """
             applications.id, 
             applications.data, 
             applications.naic, 
             applications.schema, 
             applications.original_schema, 
             user.email,
-            onboarding.data as onboarding_data
+            onboarding.data as onboarding_data"""
+
+APPLICATION_FROM = """
         FROM applications 
         JOIN user ON applications.user_id = user.id 
         LEFT JOIN onboarding ON user.id = onboarding.user_id
-        WHERE applications.id = ?
-        """
-        result = await execute_query(query, (application_id,))
+"""
+
+APPLICATION_SELECT = f"""
+        SELECT {APPLICATION_COLUMNS}{APPLICATION_FROM}"""
+
+# The same, followed by what the formatted-output cache version is made of
+APPLICATION_VERSION_SELECT = f"""
+        SELECT {APPLICATION_COLUMNS},
+            applications.updated_at,
+            applications.revision{APPLICATION_FROM}"""
+
+MAX_BATCH_SIZE = 200
+BATCH_FORMAT_CONCURRENCY = 8
+MAX_EXPORT_BATCH_SIZE = 500
+
+CARRIER_BY_NAIC = {
+    "79413": "UnitedHealthcare",
+    "78700": "Aetna",
+    "72052": "Aetna",
+    "68500": "Aetna",
+    "60380": "Allstate",
+    "82538": "Allstate",
+    "60534": "Allstate",
+    "20699": "Chubb"
+}
+
+def row_to_application(row) -> Dict[str, Any]:
+    """Convert a row selected with APPLICATION_SELECT into an application dict."""
+    application = {
+        "id": row[0],
+        "data": row[1],
+        "naic": row[2],
+        "schema": row[3],
+        "originalSchema": row[4],
+        "email": row[5],
+        "onboarding_data": row[6]  # Default value
+    }
+    
+    # Parse JSON fields
+    for field in ['data', 'schema', 'originalSchema', 'onboarding_data']:
+        if application.get(field):
+            application[field] = json_codec.loads(application[field])
+    
+    return application
+
+async def get_application_row(application_id: str, select: str = APPLICATION_SELECT) -> tuple:
+    """The application's row as selected by select, without parsing it."""
+    try:
+        result = await execute_query(select + "WHERE applications.id = ?", (application_id,))
         if not result:
             raise HTTPException(status_code=404, detail="Application not found")
-        
-        # Convert database row to dictionary
-        application = {
-            "id": result[0][0],
-            "data": result[0][1],
-            "naic": result[0][2],
-            "schema": result[0][3],
-            "originalSchema": result[0][4],
-            "email": result[0][5],
-            "onboarding_data": result[0][6]  # Default value
-        }
-        
-        # Parse JSON fields
-        for field in ['data', 'schema', 'originalSchema', 'onboarding_data']:
-            if application.get(field):
-                application[field] = json.loads(application[field])
-        
-        return application
+        return result[0]
+    except DatabaseBusyError:
+        raise
+    except Exception as e:
+        # Reports a missing application as a 500 too, as it always has
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+def parse_application_row(row) -> Dict[str, Any]:
+    try:
+        return row_to_application(row)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+async def get_application_by_id(application_id: str) -> Dict[str, Any]:
+    """Retrieve application from database by ID."""
+    return parse_application_row(await get_application_row(application_id))
+
+async def get_applications_by_ids(application_ids: List[str]) -> Dict[str, Any]:
+    """
+    Retrieve many applications in one query.
+
+    Returns a dict keyed by application ID; IDs that don't exist are absent.
+    Rows that fail to parse map to the exception instead of an application.
+    """
+    if not application_ids:
+        return {}
+    placeholders = ", ".join("?" for _ in application_ids)
+    query = APPLICATION_SELECT + f"WHERE applications.id IN ({placeholders})"
+    rows = await execute_query(query, tuple(application_ids))
+
+    applications = {}
+    for row in rows:
+        # Keep the first row per application, as get_application_by_id does
+        if row[0] in applications:
+            continue
+        try:
+            applications[row[0]] = row_to_application(row)
+        except Exception as e:
+            applications[row[0]] = e
+    return applications
+
+def cache_key_for_row(row, skip_medication: bool, skip_producer: bool) -> tuple:
+    """Formatted-output cache key for a row selected with APPLICATION_VERSION_SELECT."""
+    return (row[0], application_version(row[7], row[8]), get_carrier_name(row[2]), skip_medication, skip_producer)
+
+def without_formatted_at(response: Dict[str, Any]) -> Dict[str, Any]:
+    """response as the formatted-output cache stores it."""
+    metadata = {key: value for key, value in response["metadata"].items() if key != "formatted_at"}
+    return {**response, "metadata": metadata}
+
+def with_formatted_at(response: Dict[str, Any]) -> Dict[str, Any]:
+    """A cached response stamped with the time it is served, like a freshly formatted one."""
+    metadata = {**response["metadata"], "formatted_at": datetime.now(timezone.utc).isoformat()}
+    return {**response, "metadata": metadata}
+
 def get_carrier_name(naic: str) -> str:
     """Map NAIC number to carrier name."""
-    carrier_map = {
-        "79413": "UnitedHealthcare",
-        "78700": "Aetna",
-        "72052": "Aetna",
-        "68500": "Aetna",
-        "60380": "Allstate",
-        "82538": "Allstate",
-        "60534": "Allstate",
-        "20699": "Chubb"
-    }
-    return carrier_map.get(naic, "Unknown")
+    return CARRIER_BY_NAIC.get(naic, "Unknown")
 
 def decode_values(obj):
     """Recursively decode URL-encoded values in dictionaries and lists."""
-    if isinstance(obj, dict):
-        return {k: decode_values(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [decode_values(item) for item in obj]
-    elif isinstance(obj, str):
-        try:
-            # Only decode if the string contains URL-encoded characters
-            if '%' in obj:
-                return unquote(obj).strip()
-        except Exception:
-            pass
-    return obj
+    return apply_rule(obj, DECODE)
+
+async def build_formatted_response(
+    application: Dict[str, Any],
+    application_id: str,
+    skip_medication: bool = False,
+    skip_producer: bool = False
+) -> Dict[str, Any]:
+    """Decode, format and post-process a loaded application into the API response."""
+    medication_information = application.get("data", {}).get("medication_information")
+    health_history = application.get("data", {}).get("health_history")
+    
+    # URL decode the sections the formatters read and strip the time from
+    # applicant dates, in one pass; other sections are decoded when copied
+    if isinstance(application.get("data"), dict):
+        application["data"] = normalize_input(application["data"])
+    
+    # Get carrier name from NAIC
+    carrier = get_carrier_name(application.get('naic'))
+    if carrier == "Unknown":
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Unsupported NAIC number: {application.get('naic')}"
+        )
+    
+    # Format application; derived values (dates, ZIP lookup, producer) are
+    # computed once in the context and shared by the formatter and
+    # format_application
+    context = ApplicationContext(application, carrier)
+    formatted_data = await format_application(application, carrier, context)
+    
+    # Replace empty/null string values with "NA" recursively
+    if skip_medication and medication_information:
+        formatted_data["medication_information"] = apply_rule(medication_information, NA)
+    
+    if skip_medication and health_history:
+        formatted_data["health_history"] = apply_rule(health_history, NA)
+    
+    if skip_producer and "producer" in formatted_data:
+        del formatted_data["producer"]
+        
+    # Copy all sections from the original data
+    if isinstance(application.get("data"), dict):
+        for section, content in application["data"].items():
+            if section not in formatted_data:
+                formatted_data[section] = copy_section(section, content)
+    
+    return {
+        "success": True,
+        "data": formatted_data,
+        "metadata": {
+            "application_id": application_id,
+            "carrier": carrier,
+            "formatted_at": datetime.now(timezone.utc).isoformat(),
+            "original_status": application.get('status') or "NA",
+            "applicant_email": application.get('email') or "NA"
+        }
+    }
 
 @formatter_router.get("/api/applications/{application_id}/formatted")
 async def get_formatted_application(
@@ -97,99 +217,243 @@ async def get_formatted_application(
     
     Returns:
     - Formatted application data according to carrier specifications
+
+    Responses are cached per application version (see format_cache), so
+    reopening an unchanged application skips decoding and formatting it.
     """
     try:
-        # Get application from database
-        application = await get_application_by_id(application_id)
-        
-        medication_information = application.get("data", {}).get("medication_information")
-        health_history = application.get("data", {}).get("health_history")
-        
-        # URL decode all values in application data
-        if isinstance(application.get("data"), dict):
-            application["data"] = decode_values(application["data"])
-        
-        # Handle date fields specifically to remove time component
-        if isinstance(application.get("data"), dict) and isinstance(application["data"].get("applicant_info"), dict):
-            for date_field in ["applicant_dob", "effective_date"]:
-                if application["data"]["applicant_info"].get(date_field):
-                    date_value = application["data"]["applicant_info"][date_field]
-                    if isinstance(date_value, str) and 'T' in date_value:
-                        application["data"]["applicant_info"][date_field] = date_value.split('T')[0]
-        
-        # Get carrier name from NAIC
-        carrier = get_carrier_name(application.get('naic'))
-        if carrier == "Unknown":
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Unsupported NAIC number: {application.get('naic')}"
-            )
-        
-        # Format application
-        formatted_data = format_application(application, carrier)
-        
-        # Replace empty/null string values with "NA" recursively
-        def replace_empty_values(obj):
-            if isinstance(obj, dict):
-                return {k: replace_empty_values(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [replace_empty_values(item) for item in obj]
-            elif isinstance(obj, str) and (not obj or obj == "undefined"):
-                return "NA"
-            elif obj is None:
-                return "NA"
-            return obj
-        
-        # Apply the replacement to formatted data
-        if skip_medication and medication_information:
-            formatted_data["medication_information"] = replace_empty_values(medication_information)
-        
-        if skip_medication and health_history:
-            formatted_data["health_history"] = replace_empty_values(health_history)
-        
-        if skip_producer and "producer" in formatted_data:
-            del formatted_data["producer"]
-            
-        # Copy all sections from the original data
-        if isinstance(application.get("data"), dict):
-            for section, content in application["data"].items():
-                if section not in formatted_data:
-                    formatted_data[section] = replace_empty_values(content)
-        
-        return {
-            "success": True,
-            "data": formatted_data,
-            "metadata": {
-                "application_id": application_id,
-                "carrier": carrier,
-                "formatted_at": datetime.now(timezone.utc).isoformat(),
-                "original_status": application.get('status') or "NA",
-                "applicant_email": application.get('email') or "NA"
-            }
-        }
+        if not formatted_application_cache.enabled:
+            application = await get_application_by_id(application_id)
+            return await build_formatted_response(application, application_id, skip_medication, skip_producer)
+
+        # The version is read with the application, so the key always
+        # matches the data that gets formatted
+        row = await get_application_row(application_id, APPLICATION_VERSION_SELECT)
+        cache_key = cache_key_for_row(row, skip_medication, skip_producer)
+        cached = await formatted_application_cache.get(cache_key)
+        if cached is not None:
+            return with_formatted_at(cached)
+
+        application = parse_application_row(row)
+        response = await build_formatted_response(application, application_id, skip_medication, skip_producer)
+        formatted_application_cache.set(cache_key, without_formatted_at(response))
+        return response
         
     except HTTPException as he:
         # Re-raise HTTP exceptions
-        print(f"HTTP Exception occurred: {str(he)}")
-        print(f"Status code: {he.status_code}")
-        print(f"Detail: {he.detail}")
+        logger.info("HTTP exception formatting application %s: %s %s", application_id, he.status_code, he.detail)
         raise he
+    except DatabaseBusyError:
+        # Handled by the app-level 503 handler
+        raise
     except ValueError as ve:
         # Handle validation errors
-        print(f"Validation error occurred: {str(ve)}")
-        print(f"Error type: {type(ve)}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.warning("Validation error formatting application %s: %s", application_id, ve, exc_info=True)
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         # Handle unexpected errors
-        print(f"Unexpected error occurred: {str(e)}")
-        print(f"Error type: {type(e)}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Unexpected error formatting application %s (%s): %s", application_id, type(e).__name__, e)
         raise HTTPException(
             status_code=500,
             detail=f"Error formatting application: {str(e)}"
         )
 
+class BatchFormatRequest(BaseModel):
+    application_ids: List[str]
+    skip_medication: bool = False
+    skip_producer: bool = False
+
+def _batch_error(application_id: str, status_code: int, detail: str) -> Dict[str, Any]:
+    return {
+        "application_id": application_id,
+        "success": False,
+        "error": {"status_code": status_code, "detail": detail}
+    }
+
+def error_result(application_id: str, error: Exception) -> Dict[str, Any]:
+    """The batch result for an application that failed with error."""
+    if isinstance(error, HTTPException):
+        return _batch_error(application_id, error.status_code, str(error.detail))
+    if isinstance(error, ValueError):
+        return _batch_error(application_id, 400, str(error))
+    logger.error("Unexpected error formatting application %s: %s", application_id, error,
+                 exc_info=(type(error), error, error.__traceback__))
+    return _batch_error(application_id, 500, f"Error formatting application: {str(error)}")
+
+async def format_result(
+    application: Dict[str, Any],
+    application_id: str,
+    skip_medication: bool = False,
+    skip_producer: bool = False
+) -> Dict[str, Any]:
+    """
+    Format one loaded application as a batch result: the response tagged with
+    its application_id, or the error it failed with. Never raises for
+    formatting errors, so one bad application can't fail a batch.
+    """
+    try:
+        response = await build_formatted_response(application, application_id, skip_medication, skip_producer)
+    except Exception as e:
+        return error_result(application_id, e)
+    return {"application_id": application_id, **response}
+
+@formatter_router.post("/api/applications/formatted/batch")
+async def get_formatted_applications_batch(
+    request: BatchFormatRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Retrieve and format many applications in one call.
+
+    All applications are loaded with a single query and formatted
+    concurrently. Each result carries its own success flag; one bad
+    application does not fail the batch.
+
+    Body:
+    - application_ids: IDs to format (at most MAX_BATCH_SIZE, duplicates ignored)
+    - skip_medication / skip_producer: As for the single-application endpoint
+    """
+    application_ids = list(dict.fromkeys(request.application_ids))
+    if not application_ids:
+        raise HTTPException(status_code=400, detail="application_ids must not be empty")
+    if len(application_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_SIZE} application IDs can be formatted per batch"
+        )
+
+    try:
+        applications = await get_applications_by_ids(application_ids)
+    except DatabaseBusyError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    semaphore = asyncio.Semaphore(BATCH_FORMAT_CONCURRENCY)
+
+    async def format_one(application_id: str) -> Dict[str, Any]:
+        application = applications.get(application_id)
+        if application is None:
+            return _batch_error(application_id, 404, "Application not found")
+        if isinstance(application, Exception):
+            return _batch_error(application_id, 500, f"Database error: {str(application)}")
+        async with semaphore:
+            return await format_result(
+                application,
+                application_id,
+                request.skip_medication,
+                request.skip_producer
+            )
+
+    results = await asyncio.gather(*(format_one(application_id) for application_id in application_ids))
+    succeeded = sum(1 for result in results if result["success"])
+
+    return {
+        "success": True,
+        "results": results,
+        "summary": {
+            "requested": len(application_ids),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded
+        }
+    }
+
+async def _fetch_export_batch(conditions: List[str], params: List[Any], after: tuple, batch_size: int):
+    """One keyset page of applications for the export, newest first."""
+    conditions = list(conditions)
+    params = list(params)
+    if after:
+        conditions.append("(applications.created_at, applications.id) < (?, ?)")
+        params += list(after)
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"""
+        SELECT {APPLICATION_COLUMNS}, applications.created_at{APPLICATION_FROM}
+        {where_clause}
+        ORDER BY applications.created_at DESC, applications.id DESC
+        LIMIT ?"""
+    return await execute_query(query, tuple(params + [batch_size]))
+
+@formatter_router.get("/api/applications/formatted/export")
+async def export_formatted_applications(
+    carrier: str = None,
+    status: str = None,
+    created_from: str = None,
+    created_to: str = None,
+    skip_medication: bool = False,
+    skip_producer: bool = False,
+    batch_size: int = 100,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Stream every matching application, formatted for its carrier, as NDJSON.
+
+    Applications are read from the database in keyset batches and formatted
+    one at a time, so server memory stays constant regardless of table size.
+    Each line has the same shape as a batch endpoint result.
+
+    Parameters:
+    - carrier: Only applications for this carrier (e.g. "Aetna")
+    - status: Only applications with this status
+    - created_from: Only applications created at or after this ISO date/time
+    - created_to: Only applications created before this ISO date/time
+    - skip_medication / skip_producer: As for the single-application endpoint
+    - batch_size: Rows fetched per database round-trip (max 500)
+    """
+    batch_size = max(min(batch_size, MAX_EXPORT_BATCH_SIZE), 1)
+
+    conditions = []
+    params = []
+    if carrier:
+        naics = [naic for naic, name in CARRIER_BY_NAIC.items() if name.lower() == carrier.lower()]
+        if not naics:
+            raise HTTPException(status_code=400, detail=f"Unsupported carrier: {carrier}")
+        conditions.append(f"applications.naic IN ({', '.join('?' for _ in naics)})")
+        params += naics
+    if status:
+        conditions.append("applications.status = ?")
+        params.append(status)
+    if created_from:
+        conditions.append("applications.created_at >= ?")
+        params.append(created_from)
+    if created_to:
+        conditions.append("applications.created_at < ?")
+        params.append(created_to)
+
+    # Fetch the first batch up front so database errors still become a proper status code
+    try:
+        first_rows = await _fetch_export_batch(conditions, params, None, batch_size)
+    except DatabaseBusyError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    async def lines():
+        rows = first_rows
+        last_id = None
+        while rows:
+            for row in rows:
+                application_id = row[0]
+                # The onboarding join can repeat an application; keep its first row
+                if application_id == last_id:
+                    continue
+                last_id = application_id
+                try:
+                    application = row_to_application(row)
+                except Exception as e:
+                    result = error_result(application_id, e)
+                else:
+                    result = await format_result(application, application_id, skip_medication, skip_producer)
+                yield json_codec.dumps(result) + "\n"
+
+            if len(rows) < batch_size:
+                break
+            try:
+                rows = await _fetch_export_batch(conditions, params, (rows[-1][7], rows[-1][0]), batch_size)
+            except Exception as e:
+                # Headers are already sent; report the failure in-band and stop
+                yield json_codec.dumps({"success": False, "error": {"status_code": 500, "detail": f"Database error: {str(e)}"}}) + "\n"
+                break
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 # Add the router to main.py
\ No newline at end of file
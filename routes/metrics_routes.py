@@ -0,0 +1,34 @@
+import asyncio
+from fastapi import APIRouter, Depends
+from database import pool_stats, executor_stats
+from auth import get_current_user
+from api_endpoints import list_cache_stats
+from format_cache import format_cache_stats
+from routing_number import routing_stats
+from medications import parse_cache_stats
+from reference_data import registry as reference_data, naic_companies
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("")
+async def get_metrics(current_user: dict = Depends(get_current_user)):
+    """
+    Runtime metrics for sizing and tuning the service under load.
+    """
+    return {
+        "success": True,
+        "database": {
+            "pool": pool_stats(),
+            "executor": executor_stats()
+        },
+        "caches": {
+            "application_list": list_cache_stats(),
+            "formatted_applications": format_cache_stats(),
+            "naic_matcher": naic_companies.get().stats(),
+            # Counts directory rows: a blocking SQLite read
+            "routing_numbers": await asyncio.to_thread(routing_stats),
+            "medication_parser": parse_cache_stats()
+        },
+        "reference_data": reference_data.stats()
+    }
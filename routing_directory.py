@@ -0,0 +1,146 @@
+"""
+Local routing number -> bank name directory.
+
+A SQLite file (ROUTING_DB_PATH) that answers most bank-name lookups without
+a network call. It holds two kinds of rows:
+
+    directory   imported from the Federal Reserve E-Payments Routing
+                Directory (FedACHdir.txt); kept until the next import
+    api         results of routingnumbers.info lookups, found or not found,
+                kept for ROUTING_CACHE_TTL and ROUTING_NEGATIVE_TTL seconds
+
+Import (or refresh) the Fed directory with:
+
+    python routing_directory.py FedACHdir.txt [routing.db]
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import threading
+from typing import Iterator, Optional, Tuple
+
+ROUTING_DB_PATH = os.getenv("ROUTING_DB_PATH", "routing.db")
+ROUTING_CACHE_TTL = float(os.getenv("ROUTING_CACHE_TTL", str(30 * 86400)))
+ROUTING_NEGATIVE_TTL = float(os.getenv("ROUTING_NEGATIVE_TTL", "86400"))
+
+DIRECTORY = "directory"
+API = "api"
+
+# FedACHdir.txt is fixed width, 155 characters per record
+_ROUTING_NUMBER = slice(0, 9)
+_CUSTOMER_NAME = slice(35, 71)
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS routing_numbers (
+    routing_number TEXT PRIMARY KEY,
+    bank_name TEXT,
+    found INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)"""
+
+
+def parse_fed_ach_directory(lines) -> Iterator[Tuple[str, str]]:
+    """(routing_number, bank_name) for each well-formed record of a FedACHdir.txt file."""
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if len(line) < _CUSTOMER_NAME.stop:
+            continue
+        routing_number = line[_ROUTING_NUMBER]
+        name = " ".join(line[_CUSTOMER_NAME].split())
+        if routing_number.isdigit() and name:
+            yield routing_number, name
+
+
+class RoutingDirectory:
+    """
+    The routing_numbers table. Methods are blocking (reads, and committed
+    writes that fsync); async callers run them in a worker thread. The
+    connection is shared between threads behind a lock.
+    """
+
+    def __init__(self, path: str = ROUTING_DB_PATH, ttl: float = ROUTING_CACHE_TTL, negative_ttl: float = ROUTING_NEGATIVE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+
+    def get(self, routing_number: str) -> Optional[Tuple[bool, Optional[str], str]]:
+        """(found, bank_name, source) if the directory has a current answer, else None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT found, bank_name, source, updated_at FROM routing_numbers WHERE routing_number = ?",
+                (routing_number,)
+            ).fetchone()
+        if row is None:
+            return None
+        found, bank_name, source, updated_at = row
+        if source != DIRECTORY:
+            ttl = self.ttl if found else self.negative_ttl
+            if updated_at + ttl <= time.time():
+                return None
+        return bool(found), bank_name, source
+
+    def put(self, routing_number: str, bank_name: Optional[str]) -> None:
+        """Remember a network lookup result; a bank_name of None caches "not found"."""
+        with self._lock:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO routing_numbers (routing_number, bank_name, found, source, updated_at)
+                VALUES (?, ?, ?, ?, ?)""",
+                (routing_number, bank_name, int(bank_name is not None), API, time.time())
+            )
+
+    def import_directory(self, records) -> int:
+        """Replace the imported directory with records ((routing_number, bank_name) pairs)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM routing_numbers WHERE source = ?", (DIRECTORY,))
+                cursor = self._conn.executemany(
+                    """INSERT OR REPLACE INTO routing_numbers (routing_number, bank_name, found, source, updated_at)
+                    VALUES (?, ?, 1, ?, ?)""",
+                    ((routing_number, name, DIRECTORY, now) for routing_number, name in records)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return cursor.rowcount
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, found, count(*) FROM routing_numbers GROUP BY source, found"
+            ).fetchall()
+        counts = {"directory": 0, "cached_found": 0, "cached_not_found": 0}
+        for source, found, count in rows:
+            if source == DIRECTORY:
+                counts["directory"] += count
+            else:
+                counts["cached_found" if found else "cached_not_found"] += count
+        return counts
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def main() -> None:
+    if len(sys.argv) < 2:
+        print("usage: python routing_directory.py FedACHdir.txt [routing.db]")
+        sys.exit(2)
+    source = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) > 2 else ROUTING_DB_PATH
+    directory = RoutingDirectory(target)
+    with open(source, "r", encoding="latin-1") as f:
+        count = directory.import_directory(parse_fed_ach_directory(f))
+    directory.close()
+    print(f"Imported {count} routing numbers into {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,202 @@
+import os
+import asyncio
+import logging
+import threading
 import httpx
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
+from routing_directory import RoutingDirectory, ROUTING_DB_PATH
 
-def lookup_routing_number(routing_number: str) -> Dict:
+logger = logging.getLogger(__name__)
+
+# Bank-name lookups go to routingnumbers.info (or ROUTING_LOOKUP_URL, e.g. a
+# local stub) over one pooled, keep-alive client opened in the app lifespan
+ROUTING_LOOKUP_URL = os.getenv("ROUTING_LOOKUP_URL", "https://www.routingnumbers.info/api/name.json")
+ROUTING_LOOKUP_CONNECT_TIMEOUT = float(os.getenv("ROUTING_LOOKUP_CONNECT_TIMEOUT", "2"))
+ROUTING_LOOKUP_READ_TIMEOUT = float(os.getenv("ROUTING_LOOKUP_READ_TIMEOUT", "3"))
+ROUTING_LOOKUP_CONCURRENCY = int(os.getenv("ROUTING_LOOKUP_CONCURRENCY", "10"))
+
+
+class RoutingNumberClient:
     """
-    Look up bank name for a routing number using routingnumbers.info API.
-    
-    Args:
-        routing_number: The routing number to look up
-        
-    Returns:
-        Dict containing response code, message and bank name if found
+    Async routing-number lookups over a shared httpx.AsyncClient.
+
+    At most `concurrency` lookups are in flight at once; the rest wait for a
+    slot. Connect and read timeouts are explicit, so a slow upstream costs a
+    lookup a few seconds at most and never blocks the event loop.
+
+    With a RoutingDirectory, lookups are answered from it first (imported Fed
+    directory, then cached results including "not found"), and network
+    results are written back to it. Directory reads and writes run in a
+    worker thread. Only an explicit not-found (code 404) is cached as
+    negative; other replies (rate limits, upstream errors) count as errors
+    and are never cached.
     """
-    if not routing_number:
-        return {
-            "code": 400,
-            "message": "Routing number is required"
-        }
-        
-    try:
-        with httpx.Client() as client:
-            response = client.get(
-                f"https://www.routingnumbers.info/api/name.json",
-                params={"rn": routing_number}
-            )
-            data = response.json()
-            
-            if data.get("code") == 200:
+
+    SOURCES = ("directory", "cache", "negative_cache", "network", "error")
+
+    def __init__(
+        self,
+        url: str = ROUTING_LOOKUP_URL,
+        connect_timeout: float = ROUTING_LOOKUP_CONNECT_TIMEOUT,
+        read_timeout: float = ROUTING_LOOKUP_READ_TIMEOUT,
+        concurrency: int = ROUTING_LOOKUP_CONCURRENCY,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        directory: Optional[RoutingDirectory] = None
+    ):
+        self.url = url
+        self.directory = directory
+        self._counts = dict.fromkeys(self.SOURCES, 0)
+        self._counts_lock = threading.Lock()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            transport=transport
+        )
+
+    async def lookup(self, routing_number: str) -> Dict:
+        """
+        Look up bank name for a routing number.
+
+        Args:
+            routing_number: The routing number to look up
+
+        Returns:
+            Dict containing response code, message and bank name if found
+        """
+        if not routing_number:
+            return {
+                "code": 400,
+                "message": "Routing number is required"
+            }
+
+        if self.directory is not None:
+            known = await asyncio.to_thread(self.directory.get, routing_number)
+            if known is not None:
+                found, bank_name, source = known
+                if not found:
+                    self._count("negative_cache")
+                    return {
+                        "code": 404,
+                        "message": "Bank not found"
+                    }
+                self._count("directory" if source == "directory" else "cache")
                 return {
                     "code": 200,
                     "message": "OK",
                     "rn": routing_number,
-                    "name": data.get("name")
+                    "name": bank_name
                 }
-            else:
-                return {
-                    "code": 404, 
-                    "message": "Bank not found"
-                }
-                
-    except Exception as e:
-        print(f"Error looking up routing number: {str(e)}")
+
+        try:
+            async with self._semaphore:
+                response = await self._client.get(self.url, params={"rn": routing_number})
+        except Exception as e:
+            self._count("error")
+            logger.warning("Error looking up routing number: %s: %s", type(e).__name__, e)
+            return self._error_result()
+        try:
+            data = response.json()
+        except ValueError:
+            # Only trusted for its status code (e.g. a bare HTTP 404)
+            data = None
+
+        code = data.get("code") if isinstance(data, dict) else None
+        if code == 200:
+            self._count("network")
+            await self._remember(routing_number, data.get("name"))
+            return {
+                "code": 200,
+                "message": "OK",
+                "rn": routing_number,
+                "name": data.get("name")
+            }
+        if code == 404 or response.status_code == 404:
+            self._count("network")
+            await self._remember(routing_number, None)
+            return {
+                "code": 404,
+                "message": "Bank not found"
+            }
+        # Rate limited, upstream error or an unexpected reply: not an answer
+        self._count("error")
+        logger.warning(
+            "Routing number lookup failed: HTTP %s, code %r, message %r",
+            response.status_code, code, data.get("message") if isinstance(data, dict) else None
+        )
+        return self._error_result()
+
+    @staticmethod
+    def _error_result() -> Dict:
         return {
             "code": 500,
             "message": "Error looking up bank name"
         }
+
+    def _count(self, source: str) -> None:
+        with self._counts_lock:
+            self._counts[source] += 1
+
+    async def _remember(self, routing_number: str, bank_name: Optional[str]) -> None:
+        if self.directory is None:
+            return
+        try:
+            await asyncio.to_thread(self.directory.put, routing_number, bank_name)
+        except Exception as e:
+            logger.warning("Could not cache routing number %s: %s", routing_number, e)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._counts_lock:
+            counts = dict(self._counts)
+        lookups = sum(counts.values())
+        local = counts["directory"] + counts["cache"] + counts["negative_cache"]
+        stats: Dict[str, Any] = {
+            "lookups": lookups,
+            "sources": counts,
+            "hit_ratio": round(local / lookups, 4) if lookups else None,
+        }
+        if self.directory is not None:
+            stats["entries"] = self.directory.counts()
+        return stats
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+        if self.directory is not None:
+            self.directory.close()
+
+
+_client: Optional[RoutingNumberClient] = None
+
+
+def init_routing_client() -> RoutingNumberClient:
+    global _client
+    if _client is None:
+        directory = None
+        if ROUTING_DB_PATH:
+            try:
+                directory = RoutingDirectory(ROUTING_DB_PATH)
+            except Exception as e:
+                logger.warning("Routing directory %s unavailable, looking up every routing number online: %s", ROUTING_DB_PATH, e)
+        _client = RoutingNumberClient(directory=directory)
+    return _client
+
+
+def get_routing_client() -> RoutingNumberClient:
+    # Scripts that never start the app lifespan get a client on first use
+    return _client if _client is not None else init_routing_client()
+
+
+async def close_routing_client() -> None:
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+
+def routing_stats() -> Dict[str, Any]:
+    return _client.stats() if _client is not None else {}
+
+
+async def lookup_routing_number(routing_number: str) -> Dict:
+    """Look up bank name for a routing number with the shared client."""
+    return await get_routing_client().lookup(routing_number)
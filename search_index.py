@@ -0,0 +1,84 @@
+"""
+FTS5 search index over applications.
+
+applications_fts holds one row per application (sharing its rowid) with the
+columns the admin UI searches on. Triggers keep it in sync with inserts,
+updates and deletes on applications and with email changes on user.
+"""
+
+import re
+from typing import List, Optional
+from database import execute_transaction
+
+# Applicant fields pulled out of applications.data, keyed by index column
+_DATA_FIELDS = {
+    "applicant_name": ["$.applicant_info.f_name", "$.applicant_info.l_name"],
+    "applicant_email": ["$.applicant_info.email"],
+    "applicant_phone": ["$.applicant_info.applicant_phone", "$.applicant_info.phone"],
+    "address": ["$.applicant_info.address_line1"],
+}
+
+_MAX_SEARCH_TOKENS = 8
+
+def _data_expr(row: str, paths: List[str]) -> str:
+    # Values are often URL-encoded in data; undo the common space escape so names tokenize
+    parts = " || ' ' || ".join(f"coalesce(json_extract({row}.data, '{path}'), '')" for path in paths)
+    return f"CASE WHEN json_valid({row}.data) THEN replace({parts}, '%20', ' ') ELSE '' END"
+
+def _index_row_select(row: str) -> str:
+    """SELECT producing the index row for an applications row aliased as `row`."""
+    data_columns = ",\n        ".join(_data_expr(row, paths) for paths in _DATA_FIELDS.values())
+    return f"""SELECT
+        {row}.rowid,
+        {row}.id,
+        {row}.zip,
+        {row}.county,
+        (SELECT email FROM user WHERE user.id = {row}.user_id),
+        {data_columns}"""
+
+_INDEX_COLUMNS = "rowid, application_id, zip, county, email, " + ", ".join(_DATA_FIELDS)
+
+# Only reindex when an indexed source column changes, not on status or
+# derived-column updates
+UPDATE_TRIGGER = f"""CREATE TRIGGER IF NOT EXISTS applications_fts_after_update
+    AFTER UPDATE OF id, user_id, zip, county, data ON applications BEGIN
+        DELETE FROM applications_fts WHERE rowid = old.rowid;
+        INSERT INTO applications_fts ({_INDEX_COLUMNS}) {_index_row_select("new")};
+    END"""
+
+CREATE_STATEMENTS = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS applications_fts USING fts5(
+        application_id, zip, county, email, {", ".join(_DATA_FIELDS)},
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS applications_fts_after_insert AFTER INSERT ON applications BEGIN
+        INSERT INTO applications_fts ({_INDEX_COLUMNS}) {_index_row_select("new")};
+    END""",
+    UPDATE_TRIGGER,
+    """CREATE TRIGGER IF NOT EXISTS applications_fts_after_delete AFTER DELETE ON applications BEGIN
+        DELETE FROM applications_fts WHERE rowid = old.rowid;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS applications_fts_after_user_email_update AFTER UPDATE OF email ON user BEGIN
+        UPDATE applications_fts SET email = new.email
+        WHERE rowid IN (SELECT rowid FROM applications WHERE user_id = new.id);
+    END""",
+]
+
+REBUILD_STATEMENTS = [
+    "DELETE FROM applications_fts",
+    f"INSERT INTO applications_fts ({_INDEX_COLUMNS}) {_index_row_select('applications')} FROM applications",
+]
+
+def build_match_query(search: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 MATCH expression: every word must match as a
+    prefix. Returns None when the text has no searchable words.
+    """
+    tokens = re.findall(r"\w+", search or "")[:_MAX_SEARCH_TOKENS]
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+async def rebuild_search_index() -> None:
+    """Repopulate the index from scratch (e.g. after a VACUUM renumbered rowids)."""
+    await execute_transaction([(statement, ()) for statement in REBUILD_STATEMENTS])
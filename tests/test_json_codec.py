@@ -0,0 +1,93 @@
+import json
+import math
+import importlib
+
+import pytest
+
+import json_codec
+
+BACKENDS = [
+    "json",
+    pytest.param("auto", marks=pytest.mark.skipif(
+        importlib.util.find_spec("orjson") is None, reason="orjson is not installed"
+    )),
+]
+
+# Values every backend must encode as the standard library does
+VALUES = [
+    {"name": "José O'Neil", "zip": "66210", "tags": ["a", "b"], "nested": {"x": None, "y": True}},
+    [1, 2.5, -3, 0, ""],
+    {"big": 2 ** 70},
+    {1: "non-string key"},
+]
+
+# Documents orjson rejects but the standard library accepts
+LENIENT = ['{"a": NaN}', '[Infinity, -Infinity]']
+
+
+@pytest.fixture(params=BACKENDS)
+def codec(request, monkeypatch):
+    monkeypatch.setenv("JSON_CODEC", request.param)
+    yield importlib.reload(json_codec)
+    monkeypatch.delenv("JSON_CODEC")
+    importlib.reload(json_codec)
+
+
+def stdlib_dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def test_backend_follows_json_codec(codec):
+    expected = "orjson" if codec.JSON_CODEC == "auto" else "json"
+    assert codec.BACKEND == expected
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_dumps_matches_stdlib(codec, value):
+    assert codec.dumps(value) == stdlib_dumps(value)
+    assert codec.dumps_bytes(value) == stdlib_dumps(value).encode("utf-8")
+
+
+@pytest.mark.parametrize("value", VALUES[:3])
+def test_loads_round_trips(codec, value):
+    text = stdlib_dumps(value)
+    assert codec.loads(text) == json.loads(text)
+    assert codec.loads(text.encode("utf-8")) == json.loads(text)
+
+
+@pytest.mark.parametrize("text", LENIENT)
+def test_loads_accepts_what_stdlib_accepts(codec, text):
+    decoded = codec.loads(text)
+    if isinstance(decoded, dict):
+        assert math.isnan(decoded["a"])
+    else:
+        assert decoded == json.loads(text)
+
+
+# The documented differences under orjson
+def test_integers_beyond_64_bits(codec):
+    decoded = codec.loads('{"a": 123456789012345678901234567890}')["a"]
+    if codec.BACKEND == "json":
+        assert decoded == 123456789012345678901234567890
+    else:
+        assert decoded == pytest.approx(1.2345678901234568e29)
+
+
+def test_non_finite_floats(codec):
+    encoded = codec.dumps([float("nan"), float("inf")])
+    assert encoded == ("[NaN,Infinity]" if codec.BACKEND == "json" else "[null,null]")
+
+
+def test_dumps_uses_default(codec):
+    class Point:
+        def __init__(self, x):
+            self.x = x
+
+    assert codec.dumps({"p": Point(1)}, default=lambda obj: {"x": obj.x}) == '{"p":{"x":1}}'
+    with pytest.raises(TypeError):
+        codec.dumps({"p": Point(1)})
+
+
+def test_response_renders_with_codec(codec):
+    response = codec.CodecJSONResponse({"name": "José", "n": 1})
+    assert response.body == stdlib_dumps({"name": "José", "n": 1}).encode("utf-8")
@@ -0,0 +1,65 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+import database
+import migrations
+
+# Tables as they exist before any migration
+BASE_SCHEMA = [
+    "CREATE TABLE user(id text primary key, email text, is_temporary int, is_anonymous int, created_at text, updated_at text)",
+    "CREATE TABLE onboarding(id text primary key, user_id text not null, created_at text, updated_at text, data text not null)",
+    """CREATE TABLE applications(id text primary key, user_id text not null, status text not null, created_at text,
+        updated_at text, data text not null, name text, naic text, zip text not null, county text not null,
+        dob text not null, schema text not null, original_schema text not null, underwriting_type int default 0)""",
+]
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "app.db")
+    conn = sqlite3.connect(path)
+    for statement in BASE_SCHEMA:
+        conn.execute(statement)
+    conn.execute(
+        "INSERT INTO applications (id, user_id, status, data, zip, county, dob, schema, original_schema) "
+        "VALUES ('app-1', 'user-1', 'submitted', '{\"applicant_info\": {\"f_name\": \"Mary\", \"l_name\": \"Smith\"}}', "
+        "'66210', 'Johnson', '1959-01-01', '{}', '{}')"
+    )
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(database, "DB_BACKEND", "sqlite")
+    monkeypatch.setattr(database, "DB_SQLITE_PATH", path)
+    database.close_backend()
+    database.close_executor()
+    yield path
+    database.close_executor()
+    database.close_backend()
+
+
+def test_concurrent_runs_apply_each_migration_once(sqlite_db):
+    async def run_twice():
+        return await asyncio.gather(migrations.apply_migrations(), migrations.apply_migrations())
+
+    first, second = asyncio.run(run_twice())
+
+    names = [name for name, _ in migrations.MIGRATIONS]
+    assert sorted([first, second], key=len) == [[], names]
+    conn = sqlite3.connect(sqlite_db)
+    assert [row[0] for row in conn.execute("SELECT name FROM schema_migrations ORDER BY name")] == names
+    assert conn.execute("SELECT applicant_name FROM applications").fetchone() == ("Mary Smith",)
+    conn.close()
+
+
+def test_rerun_is_a_no_op(sqlite_db):
+    assert asyncio.run(migrations.apply_migrations()) == [name for name, _ in migrations.MIGRATIONS]
+    assert asyncio.run(migrations.apply_migrations()) == []
+
+
+def test_auto_migrate_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("DB_AUTO_MIGRATE", raising=False)
+    assert not migrations.auto_migrate_enabled()
+    monkeypatch.setenv("DB_AUTO_MIGRATE", "true")
+    assert migrations.auto_migrate_enabled()
@@ -0,0 +1,136 @@
+"""
+Compact ZIP code database.
+
+zipData.json is compiled into a read-only binary file that workers mmap and
+binary-search, so the pages are shared through the OS page cache instead of
+every worker holding a dict of dicts.
+
+Layout (little-endian):
+
+    header   magic b"ZIPD", version u16, reserved u16, count u32, strings_offset u32
+    zips     count x u32, sorted ZIP codes as integers
+    offsets  count x u32, offset of each entry's record in the string table
+    strings  NUL-terminated UTF-8 records "city\\x1fstate", deduplicated
+
+Build it with:
+
+    python zipdb.py [zipData.json] [zipData.bin]
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+from typing import Any, Dict, Optional
+
+MAGIC = b"ZIPD"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+U32 = struct.Struct("<I")
+FIELD_SEPARATOR = "\x1f"
+
+
+def _zip_int(zip5: Any) -> Optional[int]:
+    if isinstance(zip5, str) and len(zip5) == 5 and zip5.isdigit():
+        return int(zip5)
+    return None
+
+
+def build_zip_db(raw: Dict[str, Any], path: str) -> int:
+    """
+    Write raw zipData (zip5 -> {"cities": [...], "state": ...}) to path and
+    return the number of ZIP codes stored. Keys that aren't 5-digit strings
+    are skipped. The file is replaced atomically so readers holding the old
+    mapping are unaffected.
+    """
+    entries = []
+    for zip5, entry in raw.items():
+        number = _zip_int(zip5)
+        if number is None:
+            continue
+        cities = entry.get("cities", [""])
+        entries.append((number, f"{cities[0] if cities else ''}{FIELD_SEPARATOR}{entry.get('state', '')}"))
+    entries.sort()
+
+    strings = bytearray()
+    record_offsets: Dict[str, int] = {}
+    offsets = []
+    for _, record in entries:
+        offset = record_offsets.get(record)
+        if offset is None:
+            offset = record_offsets[record] = len(strings)
+            strings += record.encode("utf-8") + b"\0"
+        offsets.append(offset)
+
+    count = len(entries)
+    strings_offset = HEADER.size + count * 8
+    # Per process, so workers rebuilding at once don't share a temp file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, count, strings_offset))
+        f.write(struct.pack(f"<{count}I", *(number for number, _ in entries)))
+        f.write(struct.pack(f"<{count}I", *offsets))
+        f.write(strings)
+    os.replace(tmp_path, path)
+    return count
+
+
+class ZipDatabase:
+    """Read-only, mmap-backed view of a file written by build_zip_db()."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise ValueError(f"{path} is not a ZIP database")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.count, self._strings_offset = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} ZIP database")
+        self._offsets_offset = HEADER.size + self.count * 4
+
+    def _find(self, number: int) -> Optional[int]:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = U32.unpack_from(self._mm, HEADER.size + mid * 4)[0]
+            if value < number:
+                lo = mid + 1
+            elif value > number:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def get(self, zip5: Any, default: Any = None) -> Any:
+        """(city, state) for a 5-digit ZIP string, or default."""
+        number = _zip_int(zip5)
+        if number is None:
+            return default
+        position = self._find(number)
+        if position is None:
+            return default
+        start = self._strings_offset + U32.unpack_from(self._mm, self._offsets_offset + position * 4)[0]
+        end = self._mm.find(b"\0", start)
+        city, _, state = self._mm[start:end].decode("utf-8").partition(FIELD_SEPARATOR)
+        return city, state
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+def main() -> None:
+    source = sys.argv[1] if len(sys.argv) > 1 else "zipData.json"
+    target = sys.argv[2] if len(sys.argv) > 2 else "zipData.bin"
+    with open(source, "r") as f:
+        raw = json.load(f)
+    count = build_zip_db(raw, target)
+    print(f"Wrote {count} ZIP codes to {target} ({os.path.getsize(target)} bytes)")
+
+
+if __name__ == "__main__":
+    main()